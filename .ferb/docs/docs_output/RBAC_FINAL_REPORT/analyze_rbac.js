@@ -1,292 +1,113 @@
 const fs = require('fs');
 const path = require('path');
 
+// Repository root, same as BASE_DIR in analyze_rbac.py
+const baseDir = path.join(__dirname, '../../../../');
+
 // Read the file list
-const fileList = fs.readFileSync(path.join(__dirname, '../../../files.txt'), 'utf8')
+const fileList = fs.readFileSync(path.join(baseDir, 'files.txt'), 'utf8')
   .split('\n')
   .filter(l => l.trim());
 
+// Classification rules shared with analyze_rbac.py. Only the rules are
+// shared: analyze_rbac.py also turns requirePageAccess() calls naming pages
+// missing from the RBAC pages catalog into ❌, and notes unguarded
+// controllers reached only through requireRole routes (❌ here as well), so
+// the two reports differ on those rows
+const rules = JSON.parse(fs.readFileSync(path.join(__dirname, 'rbac_rules.json'), 'utf8'));
+
+const featureRegexes = Object.fromEntries(
+  Object.entries(rules.features.regexes)
+    .map(([name, spec]) => [name, new RegExp(spec.pattern, spec.ignore_case ? 'i' : '')])
+);
+
+// An opening tag whose text starts with one of a few texts, ignoring case,
+// as tag_text_matches() in analyze_rbac.py: tags before the same '>' share it
+const hasTagText = (contentLower, spec) => {
+  const tag = spec.tag.toLowerCase();
+  const texts = spec.texts.map(text => text.toLowerCase());
+  let pos = contentLower.indexOf(tag);
+  while (pos !== -1) {
+    const close = contentLower.indexOf('>', pos + tag.length);
+    if (close === -1) return false;
+    if (texts.some(text => contentLower.startsWith(text, close + 1))) return true;
+    pos = contentLower.indexOf(tag, close + 1);
+  }
+  return false;
+};
+
 // Output CSV
 let csv = 'File Path,Status,Notes,RBAC_Issues,Implementation_Plan\n';
 let stats = { compliant: 0, notNeeded: 0, needsMigration: 0, partial: 0, notFound: 0 };
 
-// Analysis functions
-const analyzeBackendFile = (filePath) => {
-  if (!fs.existsSync(filePath)) {
-    stats.notFound++;
-    return { status: '➖', notes: 'File not found', issues: '', plan: '' };
-  }
-
-  const content = fs.readFileSync(filePath, 'utf8');
-  const pathLower = filePath.toLowerCase();
-
-  // Tests - no RBAC needed
-  if (pathLower.includes('test') || pathLower.includes('__tests__') || pathLower.includes('spec')) {
-    stats.notNeeded++;
-    return { status: '➖', notes: 'Test file - no RBAC needed', issues: '', plan: '' };
-  }
-
-  // Seeds/scripts - usually no RBAC
-  if (pathLower.includes('seed') || pathLower.includes('script') || pathLower.includes('migration')) {
-    stats.notNeeded++;
-    return { status: '➖', notes: 'Seed/migration script - no RBAC needed', issues: '', plan: '' };
-  }
-
-  // Models - schema definitions
-  if (pathLower.includes('models') && (pathLower.includes('.schema.js') || pathLower.includes('.model.js'))) {
-    stats.notNeeded++;
-    return { status: '➖', notes: 'Schema definition - no RBAC needed', issues: '', plan: '' };
-  }
-
-  // Config files
-  if (pathLower.includes('config')) {
-    stats.notNeeded++;
-    return { status: '➖', notes: 'Configuration file - no RBAC needed', issues: '', plan: '' };
-  }
-
-  // Check for RBAC compliance
-  const hasRequirePageAccess = content.includes('requirePageAccess');
-  const hasRequireRole = content.includes('requireRole(') || content.includes('requireRole (');
-  const hasRoleCheck = content.includes('user.role') || content.includes('req.user.role') || content.includes('user?.role');
-  const hasPermissionCheck = content.includes('hasPermission') || content.includes('checkPermission');
-
-  // Controllers/Routes
-  if (pathLower.includes('controller') || pathLower.includes('routes')) {
-    if (hasRequirePageAccess) {
-      stats.compliant++;
-      return { status: '✅', notes: 'Using requirePageAccess middleware', issues: '', plan: '' };
-    }
-    if (hasRequireRole) {
-      stats.needsMigration++;
-      return { status: '❌', notes: 'Using legacy requireRole middleware', issues: 'requireRole() should be replaced with requirePageAccess()', plan: 'Replace requireRole with requirePageAccess' };
-    }
-    stats.needsMigration++;
-    return { status: '❌', notes: 'No RBAC middleware found', issues: 'Missing requirePageAccess middleware', plan: 'Add requirePageAccess middleware to routes' };
-  }
-
-  // Socket controllers - check for permission checks
-  if (pathLower.includes('socket')) {
-    if (hasPermissionCheck || hasRequirePageAccess) {
-      stats.compliant++;
-      return { status: '✅', notes: 'Socket controller with permission checks', issues: '', plan: '' };
-    }
-    stats.needsMigration++;
-    return { status: '❌', notes: 'Socket controller without explicit permission checks', issues: 'Socket operations need permission validation', plan: 'Add permission checks to socket handlers' };
-  }
+// Content features are evaluated lazily and remembered per file
+const hasFeature = (name, ctx) => {
+  if (!(name in ctx.features)) {
+    const { literals, words, tags } = rules.features;
+    if (literals[name]) {
+      ctx.features[name] = literals[name].some(literal => ctx.content.includes(literal));
+    } else if (words[name] || tags[name]) {
+      ctx.contentLower = ctx.contentLower || ctx.content.toLowerCase();
+      ctx.features[name] = words[name]
+        ? ctx.contentLower.includes(words[name])
+        : hasTagText(ctx.contentLower, tags[name]);
+    } else {
+      ctx.features[name] = featureRegexes[name].test(ctx.content);
+    }
+  }
+  return ctx.features[name];
+};
 
-  // Services
-  if (pathLower.includes('service')) {
-    if (hasRoleCheck) {
-      stats.needsMigration++;
-      return { status: '❌', notes: 'Service contains role-based logic', issues: 'Role checks in service layer', plan: 'Move permission checks to controller/middleware layer' };
-    }
-    stats.notNeeded++;
-    return { status: '➖', notes: 'Service file - business logic only', issues: '', plan: '' };
-  }
+// Same condition keys as RULE_CONDITIONS in analyze_rbac.py
+const conditions = {
+  path_any: (needles, ctx) => needles.some(n => ctx.pathLower.includes(n)),
+  path_all: (needles, ctx) => needles.every(n => ctx.pathLower.includes(n)),
+  file_any: (needles, ctx) => needles.some(n => ctx.relativePath.includes(n)),
+  file_lower_any: (needles, ctx) => needles.some(n => ctx.relativePath.toLowerCase().includes(n)),
+  features_any: (names, ctx) => names.some(n => hasFeature(n, ctx)),
+  features_all: (names, ctx) => names.every(n => hasFeature(n, ctx)),
+  features_none: (names, ctx) => !names.some(n => hasFeature(n, ctx))
+};
 
-  // Middleware
-  if (pathLower.includes('middleware')) {
-    if (filePath.includes('auth.js')) {
-      stats.partial++;
-      return { status: '🔄', notes: 'Auth middleware has both requireRole and modern auth', issues: 'Still exports requireRole for backward compatibility', plan: 'Keep for backward compatibility, use requirePageAccess in new code' };
-    }
-    if (filePath.includes('pageAccess.js') || filePath.includes('pageaccess.js')) {
-      stats.compliant++;
-      return { status: '✅', notes: 'Page access middleware - core RBAC component', issues: '', plan: '' };
-    }
-    stats.notNeeded++;
-    return { status: '➖', notes: 'Middleware file', issues: '', plan: '' };
+// First matching rule wins; a group whose children all fail falls through
+const applyRules = (ruleList, ctx) => {
+  for (const rule of ruleList) {
+    const matches = Object.keys(conditions).every(key => !(key in rule) || conditions[key](rule[key], ctx));
+    if (!matches) continue;
+    if (rule.result) return rule.result;
+    const result = applyRules(rule.rules, ctx);
+    if (result) return result;
   }
+  return null;
+};
 
-  stats.notNeeded++;
-  return { status: '➖', notes: 'Backend utility/file', issues: '', plan: '' };
+const countResult = (result) => {
+  if (result.status === '✅') stats.compliant++;
+  else if (result.status === '❌') stats.needsMigration++;
+  else if (result.status === '🔄') stats.partial++;
+  else stats.notNeeded++;
+  return { status: result.status, notes: result.notes, issues: result.issues || '', plan: result.plan || '' };
 };
 
-const analyzeReactFile = (filePath) => {
+// Analysis functions
+const analyzeFile = (ruleList, filePath, relativePath) => {
   if (!fs.existsSync(filePath)) {
     stats.notFound++;
     return { status: '➖', notes: 'File not found', issues: '', plan: '' };
   }
 
-  const content = fs.readFileSync(filePath, 'utf8');
-  const pathLower = filePath.toLowerCase();
-
-  // Auth pages - public
-  if (pathLower.includes('feature-module/auth') ||
-      pathLower.includes('login') ||
-      pathLower.includes('register') ||
-      pathLower.includes('forgotpassword') ||
-      pathLower.includes('resetpassword') ||
-      pathLower.includes('emailverification') ||
-      pathLower.includes('twostep')) {
-    stats.notNeeded++;
-    return { status: '➖', notes: 'Auth/public page - no RBAC needed', issues: '', plan: '' };
-  }
-
-  // UI Interface - demo pages
-  if (pathLower.includes('uiinterface') || pathLower.includes('ui-interface')) {
-    stats.notNeeded++;
-    return { status: '➖', notes: 'UI Interface demo page - no RBAC needed', issues: '', plan: '' };
-  }
-
-  // Data files
-  if (pathLower.includes('data/json')) {
-    if (filePath.includes('sidebarMenu.jsx')) {
-      stats.needsMigration++;
-      return { status: '❌', notes: 'Hardcoded role-based sidebar menu filtering', issues: 'Uses switch statement with hardcoded roles (superadmin, hr, admin, etc.)', plan: 'Replace with permission-based filtering using PermissionContext' };
-    }
-    if (filePath.includes('horizontalSidebar.tsx')) {
-      stats.needsMigration++;
-      return { status: '❌', notes: 'Hardcoded role-based horizontal menu filtering', issues: 'Uses roles: [] arrays with hardcoded role values', plan: 'Replace with permission-based filtering' };
-    }
-    if (filePath.includes('all_routes.tsx')) {
-      stats.notNeeded++;
-      return { status: '➖', notes: 'Route definitions file - no RBAC needed', issues: '', plan: '' };
-    }
-    stats.notNeeded++;
-    return { status: '➖', notes: 'Static data file', issues: '', plan: '' };
-  }
-
-  // Router files
-  if (pathLower.includes('router')) {
-    if (filePath.includes('withRoleCheck.jsx')) {
-      stats.needsMigration++;
-      return { status: '❌', notes: 'Legacy role-based route protection HOC', issues: 'withRoleCheck uses hardcoded roles instead of permissions', plan: 'Replace with PageAccessGuard or usePageAccess hook' };
-    }
-    if (filePath.includes('router.jsx') || filePath.includes('router.link')) {
-      stats.notNeeded++;
-      return { status: '➖', notes: 'Router configuration file', issues: '', plan: '' };
-    }
-    stats.notNeeded++;
-    return { status: '➖', notes: 'Router utility file', issues: '', plan: '' };
-  }
-
-  // Modals
-  if (pathLower.includes('modal')) {
-    const hasPermissionCheck = content.includes('PermissionButton') ||
-                               content.includes('usePageAccess') ||
-                               content.includes('can(') ||
-                               content.includes('hasPermission(');
-    const hasUnprotectedButton = /<Button[^>]*>(Edit|Delete|Add|Create|Save|Update|Remove|Submit)/i.test(content);
-    const hasActionButtons = hasUnprotectedButton || content.includes('onClick') && content.includes('delete') || content.includes('edit');
-
-    if (hasPermissionCheck) {
-      stats.compliant++;
-      return { status: '✅', notes: 'Modal uses permission-based controls', issues: '', plan: '' };
-    }
-    if (hasActionButtons) {
-      stats.needsMigration++;
-      return { status: '❌', notes: 'Modal has action buttons without permission checks', issues: 'Edit/Delete/Create buttons need PermissionButton wrapper', plan: 'Wrap action buttons with PermissionButton component' };
-    }
-    stats.partial++;
-    return { status: '🔄', notes: 'Modal file - needs manual review for action buttons', issues: '', plan: 'Review for action button permissions' };
-  }
-
-  // Hooks
-  if (pathLower.includes('hooks')) {
-    if (filePath.includes('usePageAccess') || filePath.includes('useAuth')) {
-      stats.compliant++;
-      return { status: '✅', notes: 'Core permission/authorization hook', issues: '', plan: '' };
-    }
-    if (filePath.includes('dashboardRoleFilter')) {
-      stats.needsMigration++;
-      return { status: '❌', notes: 'Hook contains role-based filtering logic', issues: 'Hardcoded role filtering', plan: 'Replace with permission-based filtering' };
-    }
-    stats.notNeeded++;
-    return { status: '➖', notes: 'Utility hook - no RBAC needed', issues: '', plan: '' };
-  }
-
-  // Services
-  if (pathLower.includes('services')) {
-    stats.notNeeded++;
-    return { status: '➖', notes: 'API service layer - no RBAC needed', issues: '', plan: '' };
-  }
-
-  // Feature modules
-  if (pathLower.includes('feature-module')) {
-    const hasPermissionCheck = content.includes('PermissionButton') ||
-                               content.includes('usePageAccess') ||
-                               content.includes('PageAccessGuard') ||
-                               content.includes('can(') ||
-                               content.includes('hasPermission(');
-    const hasWithRoleCheck = content.includes('withRoleCheck');
-    const hasRoleComparison = content.includes('user?.role ===') ||
-                             content.includes('user.role ===') ||
-                             content.includes('publicMetadata?.role ===');
-    const hasUnprotectedButton = /<Button[^>]*>(Edit|Delete|Add|Create|Save|Update|Remove)/i.test(content);
-    const hasHardcodedRoles = content.includes('allowedRoles:') ||
-                              content.includes("['admin',") ||
-                              content.includes("['hr',");
-
-    if (hasPermissionCheck && !hasWithRoleCheck && !hasRoleComparison && !hasHardcodedRoles) {
-      stats.compliant++;
-      return { status: '✅', notes: 'Uses permission-based access control', issues: '', plan: '' };
-    }
-    if (hasWithRoleCheck) {
-      stats.needsMigration++;
-      return { status: '❌', notes: 'Uses legacy withRoleCheck HOC', issues: 'withRoleCheck should be replaced with PageAccessGuard', plan: 'Replace withRoleCheck HOC with PageAccessGuard or usePageAccess hook' };
-    }
-    if (hasRoleComparison || hasHardcodedRoles) {
-      stats.needsMigration++;
-      return { status: '❌', notes: 'Contains hardcoded role comparisons', issues: 'user?.role === or allowedRoles array found', plan: 'Replace with permission checks using usePageAccess hook' };
-    }
-    if (hasUnprotectedButton) {
-      stats.partial++;
-      return { status: '🔄', notes: 'May have unprotected action buttons', issues: 'Potential unprotected buttons', plan: 'Review and wrap with PermissionButton' };
-    }
-    stats.partial++;
-    return { status: '🔄', notes: 'Feature module - needs manual review for RBAC', issues: '', plan: 'Review for permission-based access controls' };
-  }
-
-  // Core components
-  if (pathLower.includes('core/components')) {
-    if (filePath.includes('RoleBasedRenderer') ||
-        filePath.includes('PermissionField') ||
-        filePath.includes('RoleDebugger')) {
-      stats.compliant++;
-      return { status: '✅', notes: 'Permission-related component', issues: '', plan: '' };
-    }
-    stats.notNeeded++;
-    return { status: '➖', notes: 'UI component - no RBAC needed', issues: '', plan: '' };
-  }
-
-  // Common components
-  if (pathLower.includes('core/common')) {
-    stats.notNeeded++;
-    return { status: '➖', notes: 'Common UI component - no RBAC needed', issues: '', plan: '' };
-  }
-
-  // Utils
-  if (pathLower.includes('utils')) {
-    stats.notNeeded++;
-    return { status: '➖', notes: 'Utility function - no RBAC needed', issues: '', plan: '' };
-  }
-
-  // Types
-  if (pathLower.includes('types')) {
-    stats.notNeeded++;
-    return { status: '➖', notes: 'Type definition file - no RBAC needed', issues: '', plan: '' };
-  }
-
-  // Contexts
-  if (pathLower.includes('contexts')) {
-    if (filePath.includes('Permission') || filePath.includes('permission')) {
-      stats.compliant++;
-      return { status: '✅', notes: 'Permission context provider', issues: '', plan: '' };
-    }
-    stats.notNeeded++;
-    return { status: '➖', notes: 'Context provider - no RBAC needed', issues: '', plan: '' };
-  }
+  const ctx = {
+    content: fs.readFileSync(filePath, 'utf8'),
+    pathLower: filePath.toLowerCase(),
+    relativePath,
+    features: {}
+  };
+  return countResult(applyRules(ruleList, ctx));
+};
 
-  // Config
-  if (pathLower.includes('config')) {
-    stats.notNeeded++;
-    return { status: '➖', notes: 'Configuration file - no RBAC needed', issues: '', plan: '' };
-  }
+const analyzeBackendFile = (filePath, relativePath) => analyzeFile(rules.backend, filePath, relativePath);
 
-  stats.partial++;
-  return { status: '🔄', notes: 'React file - needs manual review', issues: '', plan: 'Review for RBAC compliance' };
-};
+const analyzeReactFile = (filePath, relativePath) => analyzeFile(rules.react, filePath, relativePath);
 
 // Process files
 console.log('Analyzing files for RBAC compliance...\n');
@@ -296,14 +117,14 @@ fileList.forEach((line, index) => {
 
   // Convert backslashes to forward slashes
   const normalizedPath = cleanLine.replace(/\\/g, '/');
-  const fullPath = path.join(__dirname, '../../../', normalizedPath);
+  const fullPath = path.join(baseDir, normalizedPath);
 
   let analysis;
 
   if (normalizedPath.startsWith('backend')) {
-    analysis = analyzeBackendFile(fullPath);
+    analysis = analyzeBackendFile(fullPath, normalizedPath);
   } else if (normalizedPath.startsWith('react')) {
-    analysis = analyzeReactFile(fullPath);
+    analysis = analyzeReactFile(fullPath, normalizedPath);
   } else {
     stats.notNeeded++;
     analysis = { status: '➖', notes: 'Unknown file type', issues: '', plan: '' };
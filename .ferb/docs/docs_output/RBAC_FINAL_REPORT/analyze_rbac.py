@@ -6,618 +6,3703 @@ Analyzes all files in the codebase for RBAC compliance
 
 import os
 import re
+import sys
 import csv
+import mmap
+import errno
+import struct
+import json
+import time
+import heapq
+import bisect
+import posixpath
+import queue
+import hashlib
+import functools
+import argparse
+import threading
+from collections import Counter, deque
+from itertools import islice
 from pathlib import Path
-from typing import Dict, Tuple, List
+from typing import (Dict, Tuple, List, Optional, Iterable, Iterator, Set, FrozenSet, NamedTuple, Union, Callable,
+                    TYPE_CHECKING)
+if TYPE_CHECKING:
+    import socket
+    import sqlite3
+# sqlite3, socket, subprocess, select, signal and concurrent.futures are
+# imported by the sinks, daemon, watchers and executors that need them, so
+# embedding the Analyzer does not pay for them; annotations naming them rely
+# on the TYPE_CHECKING imports above
 
-# File lists from files.txt
-FILES_TXT = Path(__file__).parent.parent.parent.parent.parent / 'files.txt'
+# Repository root and the file list from files.txt
+BASE_DIR = Path(__file__).parent.parent.parent.parent.parent
+FILES_TXT = BASE_DIR / 'files.txt'
 
 # Output paths
 OUTPUT_DIR = Path(__file__).parent
 CSV_OUTPUT = OUTPUT_DIR / 'files_status_detailed.csv'
+JSONL_OUTPUT = OUTPUT_DIR / 'files_status_detailed.jsonl'
+SARIF_OUTPUT = OUTPUT_DIR / 'rbac_findings.sarif'
 SUMMARY_OUTPUT = OUTPUT_DIR / 'rbac_summary.txt'
+CACHE_OUTPUT = OUTPUT_DIR / '.rbac_analysis_cache.json'
+DELTA_CSV_OUTPUT = OUTPUT_DIR / 'files_status_delta.csv'
+DELTA_SUMMARY_OUTPUT = OUTPUT_DIR / 'rbac_delta_summary.txt'
+ENDPOINTS_CSV_OUTPUT = OUTPUT_DIR / 'endpoints_rbac.csv'
+PROFILE_OUTPUT = OUTPUT_DIR / 'rbac_profile.json'
+DUPLICATES_CSV_OUTPUT = OUTPUT_DIR / 'files_duplicates.csv'
+HISTORY_DB = OUTPUT_DIR / 'rbac_history.sqlite'
+FINDINGS_CSV_OUTPUT = OUTPUT_DIR / 'rbac_findings.csv'
+BUTTONS_CSV_OUTPUT = OUTPUT_DIR / 'action_buttons.csv'
+SOCKET_EVENTS_CSV_OUTPUT = OUTPUT_DIR / 'socket_events.csv'
+ROLLUPS_OUTPUT = OUTPUT_DIR / 'rbac_rollups.txt'
+# --shard i/N writes its partial here, in OUTPUT_DIR
+SHARD_OUTPUT_NAME = 'rbac_shard_{index}_of_{count}.json'
+# Kept in the cache_dir of an Analyzer with repository checks (OUTPUT_DIR
+# for the command line)
+CATALOG_CACHE_NAME = '.rbac_pages_catalog.json'
+IMPORT_GRAPH_CACHE_NAME = '.rbac_import_graph.json'
 
-# Statistics tracking
-stats = {
-    'compliant': 0,
-    'not_needed': 0,
-    'needs_migration': 0,
-    'partial': 0,
-    'not_found': 0
+CSV_HEADER = ('File Path', 'Status', 'Notes', 'RBAC_Issues', 'Implementation_Plan')
+DELTA_CSV_HEADER = ('File Path', 'Change', 'Old Path', 'Old Status', 'New Status',
+                    'Notes', 'RBAC_Issues', 'Implementation_Plan')
+DUPLICATES_CSV_HEADER = ('Group', 'SHA1', 'File Path', 'Status', 'Notes')
+BUTTONS_CSV_HEADER = ('File Path', 'Line', 'Column', 'Element', 'Label', 'Guard', 'Status')
+FINDINGS_CSV_HEADER = ('File Path', 'Line', 'Column', 'End Line', 'End Column', 'Finding', 'Match', 'Status')
+ENDPOINTS_CSV_HEADER = ('File Path', 'Line', 'Method', 'Route', 'Guard', 'Page Access', 'Roles',
+                        'Status', 'Notes', 'RBAC_Issues', 'Implementation_Plan')
+SOCKET_EVENTS_CSV_HEADER = ('File Path', 'Line', 'Event', 'Controller', 'Handler', 'Roles', 'Check',
+                            'Status', 'Notes', 'RBAC_Issues', 'Implementation_Plan')
+
+# Run history: paths and verdicts are stored once, results reference both.
+# Results are keyed by run first; the path index serves per-file history.
+HISTORY_SCHEMA = '''
+CREATE TABLE IF NOT EXISTS runs (
+    id INTEGER PRIMARY KEY,
+    started TEXT NOT NULL,
+    head TEXT,
+    rules_version TEXT,
+    complete INTEGER NOT NULL DEFAULT 0,
+    files INTEGER,
+    compliant INTEGER,
+    not_needed INTEGER,
+    needs_migration INTEGER,
+    partial INTEGER,
+    not_found INTEGER
+);
+CREATE TABLE IF NOT EXISTS paths (
+    id INTEGER PRIMARY KEY,
+    path TEXT NOT NULL UNIQUE,
+    directory TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS verdicts (
+    id INTEGER PRIMARY KEY,
+    status TEXT NOT NULL,
+    notes TEXT NOT NULL,
+    issues TEXT NOT NULL,
+    plan TEXT NOT NULL,
+    UNIQUE (status, notes, issues, plan)
+);
+CREATE TABLE IF NOT EXISTS results (
+    run INTEGER NOT NULL REFERENCES runs (id),
+    path INTEGER NOT NULL REFERENCES paths (id),
+    verdict INTEGER NOT NULL REFERENCES verdicts (id),
+    PRIMARY KEY (run, path)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS results_by_path ON results (path, run);
+'''
+# Worse statuses rank higher; a rise between two runs is a regression
+STATUS_RANK = {'✅': 0, '🔄': 1, '❌': 2}
+# --trend: leading path components grouped together, and runs shown
+HISTORY_TREND_DEPTH = 3
+HISTORY_TREND_RUNS = 8
+
+# --findings: content features located in ❌/🔄 files, in priority order -
+# a match starting where an earlier one did is not reported again
+FINDING_FEATURES = {
+    'require_role': 'Legacy requireRole() call',
+    'with_role_check': 'Legacy withRoleCheck HOC',
+    'role_comparison': 'Hardcoded role comparison',
+    'role_check': 'Role check outside middleware',
+    'hardcoded_roles': 'Hardcoded role list',
+    'action_button': 'Action button without permission check',
+    'modal_action_button': 'Action button without permission check',
+}
+FINDING_MATCH_LENGTH = 80
+FINDING_STATUSES = ('❌', '🔄')
+
+# Paths handed to each worker at a time in --jobs mode
+PARALLEL_CHUNK_SIZE = 64
+
+# --prefetch: reads queued ahead of the classifier, and the threads doing them
+PREFETCH_DEPTH = 64
+PREFETCH_THREADS = 8
+
+# Source files the analyzer understands
+SOURCE_EXTENSIONS = ('.js', '.jsx', '.ts', '.tsx')
+
+# Trees walked when files.txt is missing or --discover is given, and the
+# directories pruned before their contents are listed
+DISCOVERY_ROOTS = ('backend', 'react')
+PRUNED_DIRS = frozenset(('node_modules', 'dist', '.git'))
+PRUNED_DIR_PREFIXES = ('tmpclaude-',)
+
+# Discovered paths buffered ahead of the analyzer
+DISCOVERY_QUEUE_SIZE = 1024
+
+# --watch: pause after the first change event so a burst of writes (an
+# editor save, a git checkout) becomes one update; the polling fallback
+# rescans at this interval
+WATCH_DEBOUNCE = 0.05
+WATCH_POLL_INTERVAL = 1.0
+
+# --serve: the daemon's socket, how long it stays up without a request, and
+# how long a client may take to send one; --query waits this long for a
+# daemon it started
+DAEMON_SOCKET = OUTPUT_DIR / '.rbac_analyzer.sock'
+DAEMON_IDLE_TIMEOUT = 600.0
+DAEMON_REQUEST_TIMEOUT = 10.0
+DAEMON_START_TIMEOUT = 5.0
+
+# inotify event bits (linux/inotify.h)
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_FROM = 0x00000040
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_DELETE = 0x00000200
+IN_Q_OVERFLOW = 0x00004000
+IN_IGNORED = 0x00008000
+IN_ISDIR = 0x40000000
+
+# Express route modules analyzed per endpoint by --endpoints, the router
+# methods that declare endpoints and the middleware recognized as guards
+ROUTE_FILE_GLOBS = ('backend/routes/api/*.js', 'backend/routes/*.routes.js')
+ROUTE_METHODS = frozenset(('get', 'post', 'put', 'patch', 'delete', 'all'))
+ROUTE_GUARDS = ('requirePageAccess', 'requireRole')
+
+# Page seed files the requirePageAccess() page names are checked against -
+# not the check, diagnose and fix scripts next to them. An object literal is
+# a page definition when its name is a string literal matching PAGE_NAME_RE
+# and it has one of PAGE_DEFINITION_KEYS. Pages listing no actions get the
+# default of PAGE_SCHEMA, which is only read for that default;
+# requirePageAccess() checks PAGE_DEFAULT_ACTION when called without one, and
+# PAGE_ACTION_ALL grants all
+PAGE_CATALOG_GLOBS = ('backend/seed/*.seed.js', 'backend/seed/add*Page.js', 'backend/seed/add*Pages.js',
+                      'backend/seed/seed*Pages.js', 'backend/seed/setup*Page.js')
+PAGE_SCHEMA = 'backend/models/rbac/page.schema.js'
+PAGE_NAME_RE = re.compile(r'[A-Za-z][\w.-]*')
+PAGE_DEFINITION_KEYS = frozenset(('displayName', 'route', 'availableActions'))
+PAGE_DEFAULT_ACTION = 'read'
+PAGE_ACTION_ALL = 'all'
+# Content feature whose ✅ results have their requirePageAccess() calls checked
+PAGE_ACCESS_FEATURE = 'require_page_access'
+UNKNOWN_PAGE_NOTES = 'requirePageAccess names pages or actions missing from the RBAC catalog'
+
+# Import graph of backend/: relative import/export/require() specifiers are
+# resolved against its modules, trying each suffix in turn. Each import has a
+# guard level: a route module (one declaring router endpoints) guards what an
+# endpoint reaches as that endpoint's guards do, and any other module guards
+# all of its imports when it calls requirePageAccess or a permission check.
+# Legacy role checks never make a page guard. Test, seed and script modules
+# are not counted as importers (the paths the first backend rules exclude)
+IMPORT_GRAPH_ROOT = 'backend'
+IMPORT_RESOLVE_SUFFIXES = ('', '.js', '.ts', '/index.js')
+IMPORT_SPECIFIER_RE = re.compile(rb'''(?:\bfrom|\bimport\s*\(?|\brequire\s*\()\s*['"](\.[^'"\n]*)['"]''')
+IMPORT_GUARD_RE = re.compile(rb'\b(?:requirePageAccess|hasPermission|checkPermission)\s*\(')
+IMPORT_UNGUARDED, IMPORT_LEGACY_GUARD, IMPORT_PAGE_GUARD = 0, 1, 2
+# --importers: how a module is guarded, and the mark of a guarding import
+IMPORT_GUARD_NAMES = ('not guarded', 'only guarded by requireRole', 'guarded')
+IMPORT_GUARD_MARKS = ('', 'requireRole guard', 'guard')
+IMPORT_IGNORED_PARTS = ('test', '__tests__', 'spec', 'seed', 'script', 'migration')
+
+# JavaScript tokens for the route tokenizer; template and regex literals
+# need context and are handled by tokenize_js() itself
+JS_TOKEN_RE = re.compile(r'''
+    (?P<skip>\s+|//[^\n]*|/\*(?:[^*]|\*(?!/))*(?:\*/)?)
+  | (?P<str>'(?:[^'\\\n]|\\.)*'?|"(?:[^"\\\n]|\\.)*"?)
+  | (?P<name>[A-Za-z_$][\w$]*)
+  | (?P<num>\d[\w.]*)
+  | (?P<punct>[\s\S])
+''', re.VERBOSE)
+# A '/' after these starts a regex literal rather than a division
+JS_REGEX_PRECEDERS = frozenset('(,=:[!&|?{};+-*%<>~^')
+JS_REGEX_KEYWORDS = frozenset(('return', 'typeof', 'case', 'in', 'of', 'new', 'delete', 'void'))
+# Names followed by '(' that never define a function, and the keywords that
+# end an unterminated variable initializer
+JS_CONTROL_KEYWORDS = frozenset(('if', 'for', 'while', 'switch', 'catch', 'with', 'return', 'function',
+                                 'async', 'await', 'typeof', 'new', 'super'))
+JS_DECLARATION_KEYWORDS = frozenset(('const', 'let', 'var', 'function', 'class', 'export', 'import'))
+
+# --socket-events: the Socket.IO entry point and the router binding
+# controllers per role. A handler calling one of SOCKET_PERMISSION_CHECKS is
+# ✅, one only reading the role of the user (a SOCKET_ROLE_OWNERS object) is 🔄
+SOCKET_INDEX = 'backend/socket/index.js'
+SOCKET_ROUTER = 'backend/socket/router.js'
+SOCKET_PERMISSION_CHECKS = frozenset(('hasPermission', 'checkPermission', 'checkRolePermission',
+                                      'requirePageAccess'))
+SOCKET_ROLE_OWNERS = frozenset(('socket', 'user', 'userMetadata', 'publicMetadata', 'public_metadata'))
+
+# --buttons: JSX scanned for action buttons (Button or <button> elements
+# whose text starts with one of the labels) and the elements guarding them
+JSX_SCAN_ROOT = 'react/src/feature-module'
+JSX_SCAN_EXTENSIONS = ('.js', '.jsx', '.tsx')
+JSX_GUARDS = ('PermissionButton', 'PageAccessGuard')
+ACTION_BUTTON_LABELS = frozenset(('edit', 'delete', 'add', 'create', 'save', 'update', 'remove', 'submit'))
+JSX_NAME_RE = re.compile(r'[A-Za-z][\w.:-]*')
+JSX_TEXT_RE = re.compile(r'[^<{]*')
+JSX_CODE_RE = re.compile(r'[^\'"`/{}<]+')
+JSX_EXPRESSION_RE = re.compile(r'[^\'"`/{}]*')
+JSX_ATTRIBUTES_RE = re.compile(r'[^\'"{/>]*')
+JSX_WORD_RE = re.compile(r'[A-Za-z]+')
+
+# Files are scanned as raw bytes; larger ones are memory-mapped instead of read
+MMAP_THRESHOLD = 64 * 1024
+
+# Bundles above this size, or mapped files whose leading lines look minified,
+# are not scanned
+MAX_SCAN_BYTES = 2 * 1024 * 1024
+MINIFIED_SAMPLE_BYTES = 64 * 1024
+MINIFIED_MIN_LINE_LENGTH = 1000
+
+# Status counters, in report order
+STAT_KEYS = ('compliant', 'not_needed', 'needs_migration', 'partial', 'not_found')
+
+# Incremental cache effectiveness
+cache_stats = {
+    'hits': 0,
+    'misses': 0
 }
 
+# Files decided by the path stage without being opened, and files passed on
+# to the read-and-match stage
+stage_stats = {
+    'path': 0,
+    'content': 0
+}
+
+# Set by --profile; every instrumentation point is skipped while it is None
+profiler: Optional['Profiler'] = None
+PROFILE_SLOWEST = 10
+
+# Classification rules and content features shared with analyze_rbac.js
+RULES_FILE = OUTPUT_DIR / 'rbac_rules.json'
+
+# Keys a rule may use; every condition present must hold (see apply_rules)
+RULE_CONDITIONS = {
+    'path_any': ('path', 'any'),
+    'path_all': ('path', 'all'),
+    'file_any': ('file', 'any'),
+    'file_lower_any': ('file_lower', 'any'),
+    'features_any': ('features', 'any'),
+    'features_all': ('features', 'all'),
+    'features_none': ('features', 'none'),
+}
+RESULT_FIELDS = ('status', 'notes', 'issues', 'plan')
+
+
+class Verdict(NamedTuple):
+    """A classification result
+
+    Each rule owns one Verdict with interned strings, which every file it
+    matches shares, so classifying a file allocates nothing for its result.
+    """
+    status: str
+    notes: str
+    issues: str = ''
+    plan: str = ''
+
+
+def make_verdict(status: str, notes: str, issues: str = '', plan: str = '') -> Verdict:
+    """Build a Verdict from interned strings"""
+    return Verdict(sys.intern(status), sys.intern(notes), sys.intern(issues), sys.intern(plan))
+
+
+# Results that do not come from rbac_rules.json
+NOT_FOUND = make_verdict('➖', 'File not found')
+UNREADABLE = make_verdict('➖', 'Cannot read file')
+BUNDLE = make_verdict('➖', 'Generated/minified bundle - content not scanned')
+UNKNOWN_TYPE = make_verdict('➖', 'Unknown file type')
+OUTSIDE_REPOSITORY = make_verdict('➖', 'Outside the repository')
+IMPORT_GUARDED = make_verdict('✅', 'Controller only reachable through guarded importers')
+IMPORT_LEGACY_GUARDED = make_verdict('❌', 'Controller only reachable through legacy requireRole routes',
+                                     'Every route reaching it is guarded by requireRole() alone',
+                                     'Replace requireRole with requirePageAccess on the routes reaching it')
+
+# Results of files whose content is never scanned; they join no duplicate group
+UNSCANNED_NOTES = frozenset((UNREADABLE.notes, BUNDLE.notes))
+
+# Controller results that become IMPORT_GUARDED when every import of the
+# controller is page-guarded, or IMPORT_LEGACY_GUARDED when some are only
+# guarded by requireRole (see ImportGraph)
+IMPORT_GUARDABLE_NOTES = frozenset(('Controller without RBAC middleware',
+                                    'Socket controller without explicit permission checks'))
+
+
+def load_rules(path: Path = RULES_FILE) -> dict:
+    """Load the rule data file"""
+    with open(path, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+
+def compile_literal_features(literals: Dict[str, List[str]], anchors: List[str], bits: Dict[str, int]
+                             ) -> List[Tuple[bytes, Tuple[Tuple[bytes, int, int], ...], int]]:
+    """Group literal features by anchor: [(anchor, ((literal, offset, bit), ...), bits)]"""
+    groups: Dict[bytes, List[Tuple[bytes, int, int]]] = {}
+    for name, needles in literals.items():
+        for literal in needles:
+            anchor = next((a for a in anchors if a in literal), literal)
+            groups.setdefault(anchor.encode('ascii'), []).append(
+                (literal.encode('ascii'), literal.index(anchor), bits[name]))
+
+    table = []
+    for anchor, entries in groups.items():
+        mask = 0
+        for _, _, bit in entries:
+            mask |= bit
+        table.append((anchor, tuple(entries), mask))
+    return table
+
+
+def tag_text_matches(content: bytes, tag: re.Pattern, texts: Tuple[bytes, ...]) -> Iterator[Tuple[int, int]]:
+    """(start, end) of each opening tag whose text starts with one of texts
+
+    Matches what ``<tag[^>]*>(text|...)`` finds, ignoring case, without its
+    backtracking: every tag before the same '>' shares that '>' and the text
+    after it, so a failed tag resumes the search past the '>'.
+    """
+    width = max(map(len, texts))
+    match = tag.search(content)
+    while match:
+        close = content.find(b'>', match.end())
+        if close == -1:
+            return
+        text = content[close + 1:close + 1 + width].lower()
+        found = next((t for t in texts if text.startswith(t)), None)
+        if found:
+            yield match.start(), close + 1 + len(found)
+        match = tag.search(content, close + 1 + len(found or b''))
+
+
+def features_mask(*names: str, bits: Optional[Dict[str, int]] = None) -> int:
+    """Combine feature names into a bitset (of the default rules unless bits is given)"""
+    bits = compiled_rules().feature_bits if bits is None else bits
+    mask = 0
+    for name in names:
+        mask |= bits[name]
+    return mask
+
+
+def compile_needles(needles: List[str]) -> Tuple[re.Pattern, Dict[str, int], Dict[str, int]]:
+    """Compile path substrings into one overlapping-match regex
+
+    Returns the regex, each needle's bit, and for each needle the bits of
+    every needle it contains. A match only reports the longest needle
+    starting at a position, so the contained ones are added from there.
+    """
+    ordered = sorted(set(needles), key=lambda n: (-len(n), n))
+    bits = {needle: 1 << i for i, needle in enumerate(ordered)}
+    implied = {
+        needle: sum(bits[other] for other in ordered if other in needle)
+        for needle in ordered
+    }
+    alternation = '|'.join(map(re.escape, ordered)) or '(?!)'
+    return re.compile(f'(?=({alternation}))'), bits, implied
+
+
+def compile_rules(rules: List[dict], needles: Dict[str, set], feature_bits: Dict[str, int],
+                  depth: int = 0) -> List[tuple]:
+    """Turn rule dicts into (conditions, result, children, children_features) tuples
+
+    Needle masks are filled in by compile_rule_set() once every rule has
+    been seen, so conditions first hold the raw needle lists.
+    """
+    compiled = []
+    for rule in rules:
+        unknown = set(rule) - set(RULE_CONDITIONS) - {'result', 'rules'}
+        if unknown or ('result' in rule) == ('rules' in rule):
+            raise ValueError(f"Invalid rule in {RULES_FILE.name}: {rule}")
+
+        conditions = []
+        for key, (kind, mode) in RULE_CONDITIONS.items():
+            if key not in rule:
+                continue
+            if kind == 'features':
+                conditions.append((kind, mode, features_mask(*rule[key], bits=feature_bits)))
+            else:
+                needles[kind].update(rule[key])
+                conditions.append((kind, mode, tuple(rule[key])))
+
+        result = None
+        children = None
+        children_features = 0
+        if 'result' in rule:
+            result = make_verdict(**{field: rule['result'].get(field, '') for field in RESULT_FIELDS})
+        else:
+            children = compile_rules(rule['rules'], needles, feature_bits, depth + 1)
+            children_features = rules_features(children)
+        compiled.append((conditions, result, children, children_features))
+    return compiled
+
+
+def rules_features(rules: List[tuple]) -> int:
+    """Features tested directly by the conditions of a rule list"""
+    mask = 0
+    for conditions, _, _, _ in rules:
+        for kind, _, value in conditions:
+            if kind == 'features':
+                mask |= value
+    return mask
+
+
+def resolve_needles(rules: List[tuple], bits: Dict[str, Dict[str, int]]) -> List[tuple]:
+    """Replace needle lists in compiled conditions with bitmasks"""
+    resolved = []
+    for conditions, result, children, children_features in rules:
+        conditions = tuple(
+            (kind, mode, value if kind == 'features' else sum(bits[kind][n] for n in set(value)))
+            for kind, mode, value in conditions
+        )
+        if children is not None:
+            children = resolve_needles(children, bits)
+        resolved.append((conditions, result, children, children_features))
+    return resolved
+
+
+def compile_rule_set(rules: List[dict], feature_bits: Dict[str, int]) -> dict:
+    """Compile one classifier's rules and the needle matchers its paths need"""
+    needles = {'path': set(), 'file': set(), 'file_lower': set()}
+    compiled = compile_rules(rules, needles, feature_bits)
+
+    matchers = {}
+    bits = {}
+    for kind, kind_needles in needles.items():
+        regex, kind_bits, implied = compile_needles(sorted(kind_needles))
+        matchers[kind] = (regex, implied)
+        bits[kind] = kind_bits
+
+    return {
+        'rules': resolve_needles(compiled, bits),
+        'features': rules_features(compiled),
+        'matchers': matchers,
+    }
+
+
+class CompiledRules:
+    """A rule data file compiled for matching
+
+    Content features get one bit each. Literal features sharing an anchor
+    substring are answered by a single scan for the anchor, and only the
+    features a rule group refers to are evaluated.
+    """
+
+    def __init__(self, source: dict):
+        self.source = source
+        features = source['features']
+
+        # Patterns are ASCII, so everything is compiled for bytes and run on the raw file
+        regexes = {
+            name: re.compile(spec['pattern'].encode('ascii'), re.IGNORECASE if spec.get('ignore_case') else 0)
+            for name, spec in features['regexes'].items()
+        }
+        self.feature_bits = {
+            name: 1 << bit
+            for bit, name in enumerate(list(features['literals']) + list(features['words']) + list(regexes)
+                                       + list(features['tags']))
+        }
+        self.literal_features = compile_literal_features(features['literals'], features['anchors'],
+                                                         self.feature_bits)
+        # Case-insensitive words, then the regexes
+        self.regex_features = [
+            (re.compile(re.escape(word.encode('ascii')), re.IGNORECASE), self.feature_bits[name])
+            for name, word in features['words'].items()
+        ] + [(regex, self.feature_bits[name]) for name, regex in regexes.items()]
+        # Opening tags followed by one of a few texts, both ignoring case
+        self.tag_features = [
+            (re.compile(re.escape(spec['tag'].encode('ascii')), re.IGNORECASE),
+             tuple(text.lower().encode('ascii') for text in spec['texts']), self.feature_bits[name])
+            for name, spec in features['tags'].items()
+        ]
+
+        self.backend = compile_rule_set(source['backend'], self.feature_bits)
+        self.react = compile_rule_set(source['react'], self.feature_bits)
+
+    def scan_features(self, content: bytes, wanted: int) -> int:
+        """Return the bitset of wanted features present in content (bytes or mmap)"""
+        found = 0
+        for anchor, literals, bits in self.literal_features:
+            pending = bits & wanted
+            pos = content.find(anchor) if pending else -1
+            while pos != -1:
+                for literal, offset, bit in literals:
+                    start = pos - offset
+                    if bit & pending and start >= 0 and content[start:start + len(literal)] == literal:
+                        found |= bit
+                        pending &= ~bit
+                if not pending:
+                    break
+                pos = content.find(anchor, pos + 1)
+
+        for regex, bit in self.regex_features:
+            if bit & wanted and regex.search(content):
+                found |= bit
+        for tag, texts, bit in self.tag_features:
+            if bit & wanted and next(tag_text_matches(content, tag, texts), None):
+                found |= bit
+        return found
+
+    def feature_matches(self, content: bytes, wanted: int) -> List[Tuple[int, int, int]]:
+        """(start, end, bit) of every occurrence of the wanted features, in file order"""
+        matches = []
+        for _, literals, bits in self.literal_features:
+            if not bits & wanted:
+                continue
+            for literal, _, bit in literals:
+                if not bit & wanted:
+                    continue
+                pos = content.find(literal)
+                while pos != -1:
+                    matches.append((pos, pos + len(literal), bit))
+                    pos = content.find(literal, pos + 1)
+
+        for regex, bit in self.regex_features:
+            if bit & wanted:
+                matches.extend((match.start(), match.end(), bit) for match in regex.finditer(content))
+        for tag, texts, bit in self.tag_features:
+            if bit & wanted:
+                matches.extend((start, end, bit) for start, end in tag_text_matches(content, tag, texts))
+        matches.sort()
+        return matches
+
+
+@functools.lru_cache(maxsize=None)
+def compiled_rules(path: Path = RULES_FILE) -> CompiledRules:
+    """Load and compile a rule data file, once per process"""
+    return CompiledRules(load_rules(path))
+
+
+def scan_features(content: bytes, wanted: int, rules: Optional[CompiledRules] = None) -> int:
+    """Return the bitset of wanted features present in content (bytes or mmap)"""
+    return (rules or compiled_rules()).scan_features(content, wanted)
+
+
+def looks_minified(content: bytes) -> bool:
+    """True when the start of the file is made of very long lines"""
+    sample = content[:MINIFIED_SAMPLE_BYTES]
+    return sample.count(b'\n') < len(sample) // MINIFIED_MIN_LINE_LENGTH
+
+
+def read_source(file_path: str) -> Tuple[Optional[bytes], Optional[Verdict]]:
+    """Read a source file, returning (content, None) or (None, result without content)
+
+    Content stays undecoded bytes. Files of MMAP_THRESHOLD bytes or more come
+    back memory-mapped and must be handed to release_source() when done.
+    Oversized or minified bundles are reported without being scanned. A
+    missing file costs the failed open() alone.
+    """
+    try:
+        with open(file_path, 'rb') as f:
+            return load_source(f, os.fstat(f.fileno()).st_size)
+    except (FileNotFoundError, NotADirectoryError):
+        return None, NOT_FOUND
+    except (OSError, ValueError):
+        return None, UNREADABLE
+
+
+def load_source(f, size: int) -> Tuple[Optional[bytes], Optional[Verdict]]:
+    """Read an open source file of the given size the way read_source() does"""
+    if size > MAX_SCAN_BYTES:
+        return None, BUNDLE
+    if size < MMAP_THRESHOLD:
+        return f.read(), None
+
+    content = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    if looks_minified(content):
+        release_source(content)
+        return None, BUNDLE
+    return content, None
+
+
+class LineIndex:
+    """Start offsets of every line in a file, built in one pass
+
+    Offsets into bytes or text are turned into 1-based (line, column) by
+    bisecting the table; columns count characters, decoding only the start
+    of the one line.
+    """
+    __slots__ = ('content', 'starts')
+
+    def __init__(self, content: Union[bytes, str]):
+        self.content = content
+        self.starts = [0]
+        newline = '\n' if isinstance(content, str) else b'\n'
+        pos = content.find(newline)
+        while pos != -1:
+            self.starts.append(pos + 1)
+            pos = content.find(newline, pos + 1)
+
+    def position(self, offset: int) -> Tuple[int, int]:
+        line = bisect.bisect_right(self.starts, offset)
+        start = self.starts[line - 1]
+        prefix = self.content[start:offset]
+        if not isinstance(prefix, str):
+            prefix = prefix.decode('utf-8', errors='replace')
+        return line, len(prefix) + 1
+
+
+def release_source(content) -> None:
+    """Unmap content returned by read_source()"""
+    if isinstance(content, mmap.mmap):
+        content.close()
+
+
+def stat_key(analysis) -> str:
+    """Return the stats counter a result (Verdict or dict) is counted under"""
+    if isinstance(analysis, Verdict):
+        status, notes = analysis.status, analysis.notes
+    else:
+        status, notes = analysis['status'], analysis['notes']
+    if status == '✅':
+        return 'compliant'
+    if status == '❌':
+        return 'needs_migration'
+    if status == '🔄':
+        return 'partial'
+    if notes in (NOT_FOUND.notes, UNREADABLE.notes):
+        return 'not_found'
+    return 'not_needed'
+
+
+def match_needles(text: str, matcher: Tuple[re.Pattern, Dict[str, int]]) -> int:
+    """Bitset of the needles found in text, from one regex pass"""
+    regex, implied = matcher
+    found = 0
+    for needle in regex.findall(text):
+        found |= implied[needle]
+    return found
+
+
+def apply_rules(rules: List[tuple], present: Dict[str, int], content: bytes,
+                features: int, scan) -> Optional[Verdict]:
+    """Return the result of the first matching rule (first match wins)
+
+    ``present`` holds the needle bitsets for the path and is extended with
+    content features on demand: the features of a rule list are scanned,
+    with scan(content, wanted), the first time one of its rules needs them.
+    A group rule whose children all fail falls through to the next rule.
+    """
+    for rule in rules:
+        conditions, result, children, children_features = rule
+        if profiler is not None:
+            start = time.perf_counter()
+
+        matched = True
+        for kind, mode, mask in conditions:
+            if kind == 'features' and present['scanned'] & features != features:
+                missing = features & ~present['scanned']
+                present['features'] |= scan(content, missing)
+                present['scanned'] |= missing
+
+            value = present[kind] & mask
+            if (mode == 'any' and not value) or (mode == 'all' and value != mask) or (mode == 'none' and value):
+                matched = False
+                break
+
+        if profiler is not None:
+            profiler.rule_evaluated(rule, matched, time.perf_counter() - start)
+        if matched:
+            if result is not None:
+                return result
+            result = apply_rules(children, present, content, children_features, scan)
+            if result is not None:
+                return result
+    return None
+
+
+class ContentNeeded(Exception):
+    """Raised by content_needed() when a rule needs features of file content"""
+
+
+def content_needed(content: bytes, wanted: int) -> int:
+    """The scan function of path-only classification: there is no content to scan"""
+    raise ContentNeeded()
+
+
+class Analyzer:
+    """Reentrant RBAC classifier owning its configuration, counters and memos
+
+    Constructing one touches no files; rbac_rules.json is compiled on first
+    use and shared by every analyzer using the same rules file. Results are
+    shared Verdict tuples counted in ``stats``. Content features are
+    memoized by SHA-1, so identical files are scanned once, and
+    ``content_groups`` maps each digest to the paths holding that content.
+
+    Only the rules and the content classified are used unless
+    ``repository_checks`` is set: then requirePageAccess() page names are
+    checked against the page catalog of base_dir, and unguarded controllers
+    are regraded through its import graph. Both are built on first use and
+    kept in ``cache_dir`` between runs, or only in memory without one.
+    With ``locate_findings`` set, the FINDING_FEATURES of each ❌/🔄 file
+    are located while its content is at hand and kept in ``findings``.
+    """
+
+    def __init__(self, base_dir: Path = BASE_DIR, rules_file: Path = RULES_FILE,
+                 repository_checks: bool = False, cache_dir: Optional[Path] = None,
+                 locate_findings: bool = False):
+        self.base_dir = Path(base_dir)
+        self.rules_file = Path(rules_file)
+        self.repository_checks = repository_checks
+        self.locate_findings = locate_findings
+        self.cache_dir = None if cache_dir is None else Path(cache_dir)
+        self.stats = dict.fromkeys(STAT_KEYS, 0)
+        self.content_features: Dict[str, List[int]] = {}
+        self.content_groups: Dict[str, Dict[str, Verdict]] = {}
+        self.content_digests: Dict[str, str] = {}
+        self.findings: Dict[str, List[list]] = {}
+        self._page_catalog: Optional[Dict[str, FrozenSet[str]]] = None
+        self._import_graph: Optional[ImportGraph] = None
+
+    @property
+    def rules(self) -> CompiledRules:
+        return compiled_rules(self.rules_file)
+
+    def reset(self):
+        """Zero the counters and forget duplicate groups and findings; the feature memo is kept"""
+        for key in self.stats:
+            self.stats[key] = 0
+        self.content_groups.clear()
+        self.content_digests.clear()
+        self.findings.clear()
+
+    def analyze(self, items: Iterable[Union[str, Tuple[str, bytes]]]) -> List[Tuple[str, Verdict]]:
+        """Classify a batch of relative paths or (relative path, content) pairs"""
+        results = []
+        for item in items:
+            if isinstance(item, str):
+                results.append((item, self.classify(item)))
+            else:
+                results.append((item[0], self.classify(item[0], item[1])))
+        return results
+
+    def reads(self, relative_path: str) -> bool:
+        """True when classify() needs the file's content"""
+        return relative_path.startswith(('backend', 'react'))
+
+    def classify_path(self, relative_path: str, exists: Optional[Callable[[str], bool]] = None
+                      ) -> Optional[Verdict]:
+        """Classify and count a file whose result follows from its path alone
+
+        Returns None, counting nothing, when a rule on the way needs content
+        features, or when findings are located and the result is ❌/🔄. Only
+        existence is checked, with exists(relative_path) when given; the
+        file is never opened.
+        """
+        if relative_path.startswith('backend'):
+            rule_set = self.rules.backend
+        elif relative_path.startswith('react'):
+            rule_set = self.rules.react
+        else:
+            self.stats['not_needed'] += 1
+            return UNKNOWN_TYPE
+
+        full_path = os.path.join(self.base_dir, relative_path)
+        matchers = rule_set['matchers']
+        present = {
+            'path': match_needles(full_path.lower(), matchers['path']),
+            'file': match_needles(relative_path, matchers['file']),
+            'file_lower': match_needles(relative_path.lower(), matchers['file_lower']),
+            'features': 0,
+            'scanned': 0,
+        }
+        try:
+            result = apply_rules(rule_set['rules'], present, b'', rule_set['features'], content_needed)
+        except ContentNeeded:
+            return None
+        if result is None:
+            return None
+        if not (os.path.exists(full_path) if exists is None else exists(relative_path)):
+            result = NOT_FOUND
+        elif self.repository_checks and result.notes in IMPORT_GUARDABLE_NOTES:
+            result = self.import_guard_verdict(relative_path, result)
+        if self.locate_findings and result.status in FINDING_STATUSES:
+            return None
+        self.stats[stat_key(result)] += 1
+        return result
+
+    def classify(self, relative_path: str, content: Optional[bytes] = None,
+                 full_path: Optional[str] = None, digest: Optional[str] = None) -> Verdict:
+        """Run the backend or React rules that match the path
+
+        The file is read from base_dir unless its content, and optionally
+        its SHA-1, are given.
+        """
+        if relative_path.startswith('backend'):
+            rule_set = self.rules.backend
+        elif relative_path.startswith('react'):
+            rule_set = self.rules.react
+        else:
+            self.stats['not_needed'] += 1
+            return UNKNOWN_TYPE
+
+        if full_path is None:
+            full_path = os.path.join(self.base_dir, relative_path)
+        return self.classify_with(rule_set, full_path, relative_path, content, digest)
+
+    def classify_with(self, rule_set: dict, file_path: str, relative_path: str,
+                      content: Optional[bytes] = None, digest: Optional[str] = None) -> Verdict:
+        """Classify a file with one compiled rule set, reading it unless content is given"""
+        if content is not None:
+            return self.classify_content(rule_set, file_path, relative_path, content, digest)
+
+        if profiler is None:
+            content, unreadable = read_source(file_path)
+        else:
+            content, unreadable = profiler.timed('read', read_source, file_path)
+        if unreadable:
+            self.stats[stat_key(unreadable)] += 1
+            return unreadable
+        try:
+            return self.classify_content(rule_set, file_path, relative_path, content)
+        finally:
+            release_source(content)
+
+    def classify_content(self, rule_set: dict, file_path: str, relative_path: str,
+                         content: bytes, digest: Optional[str] = None) -> Verdict:
+        """Classify content with a compiled rule set and count the result
+
+        Path rules run for every path, but content features already scanned in
+        another file with the same bytes are reused rather than scanned again.
+        """
+        matchers = rule_set['matchers']
+        if profiler is not None:
+            start = time.perf_counter()
+        digest = digest or hashlib.sha1(content).hexdigest()
+        found, scanned = self.content_features.get(digest, (0, 0))
+        present = {
+            'path': match_needles(file_path.lower(), matchers['path']),
+            'file': match_needles(relative_path, matchers['file']),
+            'file_lower': match_needles(relative_path.lower(), matchers['file_lower']),
+            'features': found,
+            'scanned': scanned,
+        }
+        if profiler is None:
+            result = apply_rules(rule_set['rules'], present, content, rule_set['features'],
+                                 self.rules.scan_features)
+        else:
+            profiler.phases['path'] += time.perf_counter() - start
+            result = profiler.timed('rules', apply_rules, rule_set['rules'], present, content,
+                                    rule_set['features'], profiler.scan_features)
+        if result is None:
+            raise ValueError(f"No rule in {self.rules_file.name} matched {relative_path}")
+        if self.repository_checks:
+            page_access = self.rules.feature_bits.get(PAGE_ACCESS_FEATURE, 0)
+            if result.status == '✅' and present['scanned'] & present['features'] & page_access:
+                result = self.check_page_access(result, content)
+            elif result.notes in IMPORT_GUARDABLE_NOTES:
+                result = self.import_guard_verdict(relative_path, result)
+        if present['scanned'] != scanned:
+            self.content_features[digest] = [present['features'], present['scanned']]
+
+        self.stats[stat_key(result)] += 1
+        self.record_content(digest, relative_path, result)
+        if self.locate_findings and result.status in FINDING_STATUSES:
+            self.findings[relative_path] = self.locate(content)
+        return result
+
+    def locate(self, content: bytes) -> List[list]:
+        """[line, column, end line, end column, finding, match] of every FINDING_FEATURES
+        match in content
+
+        Matches are taken in file order; of those starting at the same
+        offset only the feature listed first in FINDING_FEATURES is kept.
+        """
+        rules = self.rules
+        names = {bit: name for name, bit in rules.feature_bits.items() if name in FINDING_FEATURES}
+        priority = {bit: list(FINDING_FEATURES).index(name) for bit, name in names.items()}
+        located = []
+        index = None
+        last_start = -1
+        for start, end, bit in sorted(rules.feature_matches(content, sum(names)),
+                                      key=lambda match: (match[0], priority[match[2]])):
+            if start == last_start:
+                continue
+            last_start = start
+            index = index or LineIndex(content)
+            line, column = index.position(start)
+            end_line, end_column = index.position(end)
+            match = ' '.join(content[start:end].decode('utf-8', errors='replace').split())
+            located.append([line, column, end_line, end_column, FINDING_FEATURES[names[bit]],
+                            match[:FINDING_MATCH_LENGTH]])
+        return located
+
+    def cache_path(self, name: str) -> Optional[Path]:
+        return None if self.cache_dir is None else self.cache_dir / name
+
+    @property
+    def page_catalog(self) -> Dict[str, FrozenSet[str]]:
+        if self._page_catalog is None:
+            self._page_catalog = load_page_catalog(self.base_dir, self.cache_path(CATALOG_CACHE_NAME))
+        return self._page_catalog
+
+    def check_page_access(self, result: Verdict, content: bytes) -> Verdict:
+        """Turn a requirePageAccess ✅ into ❌ when a call names an unknown page or action"""
+        calls = route_guards(tokenize_js(content[:].decode('utf-8', errors='ignore')))['requirePageAccess']
+        problems = page_access_problems(calls, self.page_catalog)
+        return unknown_page_verdict(problems) if problems else result
+
+    @property
+    def import_graph(self) -> 'ImportGraph':
+        if self._import_graph is None:
+            path = self.cache_path(IMPORT_GRAPH_CACHE_NAME)
+            graph = ImportGraph(self.base_dir) if path is None else ImportGraph.load(self.base_dir, path)
+            graph.update()
+            self._import_graph = graph
+        return self._import_graph
+
+    def import_guard_verdict(self, relative_path: str, result: Verdict) -> Verdict:
+        """The verdict of an unguarded controller given the guards on every import of it"""
+        level = self.import_graph.guard_level(relative_path)
+        if level == IMPORT_PAGE_GUARD:
+            return IMPORT_GUARDED
+        if level == IMPORT_LEGACY_GUARD:
+            return IMPORT_LEGACY_GUARDED
+        return result
+
+    def record_content(self, digest: str, relative_path: str, analysis: Verdict):
+        """Note that relative_path currently holds the content with this digest"""
+        self.forget_content(relative_path)
+        self.content_digests[relative_path] = digest
+        self.content_groups.setdefault(digest, {})[relative_path] = analysis
+
+    def forget_content(self, relative_path: str):
+        """Drop relative_path from its duplicate group"""
+        digest = self.content_digests.pop(relative_path, None)
+        if digest is not None:
+            group = self.content_groups[digest]
+            del group[relative_path]
+            if not group:
+                del self.content_groups[digest]
+
+    def duplicate_groups(self) -> List[Dict[str, Verdict]]:
+        """Paths sharing identical content, in the order they were analyzed"""
+        return [group for group in self.content_groups.values() if len(group) > 1]
+
+    def unique_content_stats(self) -> Dict[str, int]:
+        """Status counters with every extra copy of a duplicated file left out"""
+        counters = dict(self.stats)
+        for group in self.duplicate_groups():
+            for analysis in list(group.values())[1:]:
+                counters[stat_key(analysis)] -= 1
+        return counters
+
+
+# The analyzer behind the module-level functions and the command line, and
+# its counters
+default_analyzer = Analyzer(repository_checks=True, cache_dir=OUTPUT_DIR)
+stats = default_analyzer.stats
+
+
+def analyze_backend_file(file_path: str, relative_path: str,
+                         content: Optional[bytes] = None) -> Dict[str, str]:
+    """Analyze a backend file for RBAC compliance"""
+    rules = default_analyzer.rules.backend
+    return default_analyzer.classify_with(rules, file_path, relative_path, content)._asdict()
+
+
+def analyze_react_file(file_path: str, relative_path: str,
+                       content: Optional[bytes] = None) -> Dict[str, str]:
+    """Analyze a React file for RBAC compliance"""
+    rules = default_analyzer.rules.react
+    return default_analyzer.classify_with(rules, file_path, relative_path, content)._asdict()
+
+
+def parse_file_line(line: str) -> Optional[str]:
+    """Extract the relative path from a files.txt line ("123→filepath")"""
+    match = re.match(r'\s*\d+→(.+)', line)
+    if not match:
+        return None
+
+    relative_path = match.group(1).strip().replace('\\', '/')
+    return relative_path or None
+
+
+def classify_file(full_path: str, relative_path: str,
+                  content: Optional[bytes] = None) -> Dict[str, str]:
+    """Run the backend or React classifier that matches the path"""
+    return default_analyzer.classify(relative_path, content, full_path)._asdict()
+
+
+class Profiler:
+    """Timings and counters collected by --profile
+
+    Phases are cumulative seconds per analyzed file: 'read' (open, mmap and
+    the minified check), 'path' (lowercasing and needle matching), 'content'
+    (feature scans) and 'rules' (rule evaluation including the scans it
+    triggers), plus 'output' for the sinks. Content is scanned as bytes, so
+    there is no separate decode phase. While profiling, each content
+    feature is scanned on its own to attribute time to it.
+    """
+
+    def __init__(self, slowest: int = PROFILE_SLOWEST, rules: Optional[CompiledRules] = None):
+        self.compiled = rules or default_analyzer.rules
+        self.slowest_count = slowest
+        self.files = 0
+        self.phases = Counter()
+        self.rules: Dict[str, List[float]] = {}
+        self.features: Dict[str, List[float]] = {}
+        self.slowest: List[Tuple[float, str]] = []
+        self.labels = {}
+        for name in ('backend', 'react'):
+            self.label_rules(getattr(self.compiled, name)['rules'], self.compiled.source[name], name)
+
+    def label_rules(self, compiled: List[tuple], rules: List[dict], prefix: str):
+        """Name every compiled rule after its position and conditions in rbac_rules.json"""
+        for index, (rule, source) in enumerate(zip(compiled, rules)):
+            position = f"{prefix}.{index}"
+            conditions = ' '.join(f"{key}={','.join(source[key])}"
+                                  for key in RULE_CONDITIONS if key in source)
+            outcome = f"{source['result']['status']} {source['result']['notes']}" if 'result' in source else 'group'
+            self.labels[id(rule)] = f"{position} {conditions} -> {outcome}".replace('  ', ' ')
+            if rule[2] is not None:
+                self.label_rules(rule[2], source['rules'], position)
+
+    def timed(self, phase: str, func, *args):
+        """Call func(*args), adding its duration to phase"""
+        start = time.perf_counter()
+        try:
+            return func(*args)
+        finally:
+            self.phases[phase] += time.perf_counter() - start
+
+    def rule_evaluated(self, rule: tuple, matched: bool, seconds: float):
+        entry = self.rules.setdefault(self.labels[id(rule)], [0, 0, 0.0])
+        entry[0] += 1
+        entry[1] += matched
+        entry[2] += seconds
+
+    def scan_features(self, content: bytes, wanted: int) -> int:
+        """scan_features() one feature at a time, timing each"""
+        found = 0
+        start = time.perf_counter()
+        for name, bit in self.compiled.feature_bits.items():
+            if not bit & wanted:
+                continue
+            feature_start = time.perf_counter()
+            hit = self.compiled.scan_features(content, bit)
+            entry = self.features.setdefault(name, [0, 0, 0.0])
+            entry[0] += 1
+            entry[1] += bool(hit)
+            entry[2] += time.perf_counter() - feature_start
+            found |= hit
+        self.phases['content'] += time.perf_counter() - start
+        return found
+
+    def file_done(self, relative_path: str, seconds: float):
+        self.files += 1
+        self.phases['file'] += seconds
+        item = (seconds, relative_path)
+        if len(self.slowest) < self.slowest_count:
+            heapq.heappush(self.slowest, item)
+        elif item > self.slowest[0]:
+            heapq.heapreplace(self.slowest, item)
+
+    def state(self) -> dict:
+        """Picklable counters, for merging worker results"""
+        return {'files': self.files, 'phases': dict(self.phases), 'rules': self.rules,
+                'features': self.features, 'slowest': self.slowest}
+
+    def merge(self, state: dict):
+        self.files += state['files']
+        self.phases.update(state['phases'])
+        for mine, theirs in ((self.rules, state['rules']), (self.features, state['features'])):
+            for name, (count, hits, seconds) in theirs.items():
+                entry = mine.setdefault(name, [0, 0, 0.0])
+                entry[0] += count
+                entry[1] += hits
+                entry[2] += seconds
+        self.slowest = heapq.nlargest(self.slowest_count, self.slowest + state['slowest'])
+        heapq.heapify(self.slowest)
+
+    def report(self) -> dict:
+        """The profile as JSON-ready data"""
+        phases = dict(self.phases)
+        other = phases.get('file', 0.0) - sum(phases.get(phase, 0.0) for phase in ('read', 'path', 'rules'))
+        return {
+            'files': self.files,
+            'phases': {
+                'read': phases.get('read', 0.0),
+                'path': phases.get('path', 0.0),
+                'content': phases.get('content', 0.0),
+                'rules': phases.get('rules', 0.0) - phases.get('content', 0.0),
+                'cache_and_other': max(other, 0.0),
+                'output': phases.get('output', 0.0),
+                'files_total': phases.get('file', 0.0),
+            },
+            'rules': [{'rule': name, 'evaluated': count, 'hits': hits, 'seconds': seconds}
+                      for name, (count, hits, seconds) in
+                      sorted(self.rules.items(), key=lambda item: -item[1][2])],
+            'features': [{'feature': name, 'scans': count, 'hits': hits, 'seconds': seconds}
+                         for name, (count, hits, seconds) in
+                         sorted(self.features.items(), key=lambda item: -item[1][2])],
+            'slowest': [{'path': path, 'seconds': seconds}
+                        for seconds, path in sorted(self.slowest, reverse=True)],
+        }
+
+
+def print_profile(report: dict):
+    """Print a --profile report as tables"""
+    print()
+    print("=" * 50)
+    print(f"Profile ({report['files']} files analyzed)")
+    print("=" * 50)
+    print(f"{'Phase':<20}{'ms':>10}")
+    for phase, seconds in report['phases'].items():
+        print(f"{phase:<20}{seconds * 1000:>10.1f}")
+
+    print()
+    print(f"{'Feature':<24}{'scans':>8}{'hits':>8}{'ms':>10}")
+    for entry in report['features']:
+        print(f"{entry['feature']:<24}{entry['scans']:>8}{entry['hits']:>8}{entry['seconds'] * 1000:>10.1f}")
+
+    print()
+    print(f"{'evaluated':>9}{'hits':>7}{'ms':>9}  Rule")
+    for entry in report['rules']:
+        print(f"{entry['evaluated']:>9}{entry['hits']:>7}{entry['seconds'] * 1000:>9.1f}  {entry['rule']}")
+
+    print()
+    print(f"{'ms':>9}  Slowest files")
+    for entry in report['slowest']:
+        print(f"{entry['seconds'] * 1000:>9.2f}  {entry['path']}")
+
+
+def rules_fingerprint() -> str:
+    """Fingerprint of this analyzer and its rules alone, without the repository state"""
+    digest = hashlib.sha1(Path(__file__).read_bytes())
+    digest.update(RULES_FILE.read_bytes())
+    return digest.hexdigest()
+
+
+def rules_version() -> str:
+    """Fingerprint of the rule set - any edit to this analyzer, its rules, the page
+    catalog or the controllers guarded through the import graph changes it"""
+    digest = hashlib.sha1(rules_fingerprint().encode('ascii'))
+    digest.update(page_catalog_fingerprint().encode('ascii'))
+    digest.update(default_analyzer.import_graph.fingerprint().encode('ascii'))
+    return digest.hexdigest()
+
+
+def load_cache(path: Path = CACHE_OUTPUT) -> Dict[str, dict]:
+    """Load cached results, discarding them if the rule set has changed"""
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            data = json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+    if data.get('rules_version') != rules_version():
+        return {}
+    return data.get('files', {})
+
+
+def save_cache(entries: Dict[str, dict], path: Path = CACHE_OUTPUT):
+    """Write cache entries atomically so an interrupted run never corrupts it"""
+    tmp_path = path.with_name(path.name + '.tmp')
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump({'rules_version': rules_version(), 'files': entries}, f,
+                  ensure_ascii=False, separators=(',', ':'))
+    os.replace(tmp_path, path)
+
+
+def file_digest(path: str) -> str:
+    """SHA-1 of a file, read in blocks so large bundles are never held whole"""
+    digest = hashlib.sha1()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(1024 * 1024), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def analyze_cached(full_path: str, relative_path: str, cache: Dict[str, dict],
+                   updated: Dict[str, dict]) -> Dict[str, str]:
+    """Classify a file, reusing the cached result when its fingerprint matches
+
+    Size and mtime are checked first; the content hash is only computed when
+    they differ, so untouched files are never opened.
+    """
+    try:
+        st = os.stat(full_path)
+    except OSError:
+        # Missing files are cheap to report and never cached
+        return classify_file(full_path, relative_path)
+
+    entry = cache.get(relative_path)
+    if entry and entry['size'] == st.st_size and entry['mtime_ns'] == st.st_mtime_ns:
+        return reuse_cached(relative_path, entry, updated)
+
+    try:
+        digest = file_digest(full_path)
+    except OSError:
+        return classify_file(full_path, relative_path)
+    if entry and entry['sha1'] == digest:
+        return reuse_cached(relative_path, dict(entry, size=st.st_size, mtime_ns=st.st_mtime_ns), updated)
+
+    cache_stats['misses'] += 1
+    updated[relative_path] = new_cache_entry(relative_path, st, digest, classify_file(full_path, relative_path))
+    return updated[relative_path]['analysis']
+
+
+def new_cache_entry(relative_path: str, st: os.stat_result, digest: str, analysis: Dict[str, str]) -> dict:
+    """The cache entry of a freshly classified file, with its findings when they were located"""
+    entry = {
+        'size': st.st_size,
+        'mtime_ns': st.st_mtime_ns,
+        'sha1': digest,
+        'analysis': analysis
+    }
+    if relative_path in default_analyzer.findings:
+        entry['findings'] = default_analyzer.findings[relative_path]
+    return entry
+
+
+def reuse_cached(relative_path: str, entry: dict, updated: Dict[str, dict]) -> Dict[str, str]:
+    """Count a cache entry's result as this run's and keep the entry"""
+    cache_stats['hits'] += 1
+    updated[relative_path] = entry
+    analysis = entry['analysis']
+    stats[stat_key(analysis)] += 1
+    if analysis['notes'] not in UNSCANNED_NOTES:
+        default_analyzer.record_content(entry['sha1'], relative_path, Verdict(**analysis))
+    if default_analyzer.locate_findings and 'findings' in entry:
+        default_analyzer.findings[relative_path] = entry['findings']
+    return analysis
+
+
+def decide_by_path(relative_path: str, exists: Optional[Callable[[str], bool]] = None
+                   ) -> Optional[Dict[str, str]]:
+    """The path stage: a file's result when its path alone decides it, else None
+
+    Such files are never opened or cached here; exists() (a stat by
+    default) only tells a listed file from a missing one. Their duplicate
+    groups are filled in after the run by record_decided_content().
+    """
+    if profiler is not None:
+        start = time.perf_counter()
+    verdict = default_analyzer.classify_path(relative_path, exists)
+    if profiler is not None:
+        profiler.phases['path'] += time.perf_counter() - start
+    if verdict is None:
+        stage_stats['content'] += 1
+        return None
+    stage_stats['path'] += 1
+    return verdict._asdict()
+
+
+class Prefetched(NamedTuple):
+    """A Prefetcher read: the file's stat, then its content or the result it
+    gets without one, and its SHA-1; all None but stat for a file whose
+    cache entry still matches"""
+    stat: Optional[os.stat_result]
+    content: Optional[bytes]
+    verdict: Optional[Verdict]
+    digest: Optional[str]
+
+
+def record_decided_content(decided: Dict[str, Dict[str, str]], hash_all: bool = False) -> int:
+    """Add files decided by path to the duplicate groups and return how many were hashed
+
+    A file whose size no other listed file shares has no copy, so only the
+    decided files sharing a size with a decided or read file are hashed. A
+    shard only lists its own files, so it hashes all of them (hash_all).
+    """
+    sizes = {}
+    for relative_path in (*default_analyzer.content_digests, *decided):
+        try:
+            sizes[relative_path] = os.stat(BASE_DIR / relative_path).st_size
+        except OSError:
+            pass
+    counts = Counter(sizes.values())
+
+    hashed = 0
+    for relative_path, analysis in decided.items():
+        size = sizes.get(relative_path)
+        if size is None or not hash_all and counts[size] < 2:
+            continue
+        try:
+            digest = file_digest(str(BASE_DIR / relative_path))
+        except OSError:
+            continue
+        default_analyzer.record_content(digest, relative_path, Verdict(**analysis))
+        hashed += 1
+    return hashed
+
+
+class DirectoryListings:
+    """Answers existence checks from one listing per directory rather than a stat per file"""
+
+    def __init__(self, base_dir: Path = BASE_DIR):
+        self.base_dir = base_dir
+        self.listings: Dict[str, FrozenSet[str]] = {}
+
+    def __call__(self, relative_path: str) -> bool:
+        directory, name = os.path.split(relative_path)
+        names = self.listings.get(directory)
+        if names is None:
+            try:
+                with os.scandir(os.path.join(self.base_dir, directory)) as entries:
+                    names = frozenset(entry.name for entry in entries)
+            except OSError:
+                names = frozenset()
+            self.listings[directory] = names
+        return name in names
+
+
+class Prefetcher:
+    """Reads files on a bounded thread pool ahead of the classifier
+
+    At most ``depth`` reads are in flight or waiting to be classified, so
+    memory stays bounded however long the path stream is. Existence comes
+    from DirectoryListings, and a file whose size and mtime still match its
+    cache entry is opened but not read. Hashing happens on the pool too.
+    """
+
+    def __init__(self, depth: int = PREFETCH_DEPTH, threads: int = PREFETCH_THREADS,
+                 cache: Optional[Dict[str, dict]] = None, base_dir: Path = BASE_DIR):
+        self.depth = depth
+        self.threads = threads
+        self.cache = cache
+        self.base_dir = base_dir
+        self.listed = DirectoryListings(base_dir)
+
+    def fetch(self, relative_path: str) -> Prefetched:
+        """Read one file on a pool thread"""
+        if not self.listed(relative_path):
+            return Prefetched(None, None, NOT_FOUND, None)
+
+        full_path = os.path.join(self.base_dir, relative_path)
+        entry = self.cache.get(relative_path) if self.cache is not None else None
+        try:
+            with open(full_path, 'rb') as f:
+                st = os.fstat(f.fileno())
+                if entry and entry['size'] == st.st_size and entry['mtime_ns'] == st.st_mtime_ns:
+                    return Prefetched(st, None, None, None)
+                content, verdict = load_source(f, st.st_size)
+            if content is not None:
+                digest = hashlib.sha1(content).hexdigest()
+            else:
+                digest = file_digest(full_path) if self.cache is not None else None
+        except (OSError, ValueError):
+            return Prefetched(None, None, UNREADABLE, None)
+        return Prefetched(st, content, verdict, digest)
+
+    def iter(self, paths: Iterable[str]) -> Iterator[Tuple[str, Optional[Prefetched]]]:
+        """Yield (relative_path, read) in input order; paths whose content the
+        analyzer never reads come with None"""
+        from concurrent.futures import ThreadPoolExecutor
+
+        paths = iter(paths)
+        pending = deque()
+
+        def submit(pool, relative_path):
+            if default_analyzer.reads(relative_path):
+                pending.append((relative_path, pool.submit(self.fetch, relative_path)))
+            else:
+                pending.append((relative_path, None))
+
+        with ThreadPoolExecutor(max_workers=self.threads) as pool:
+            for relative_path in islice(paths, self.depth):
+                submit(pool, relative_path)
+            while pending:
+                relative_path, future = pending.popleft()
+                if future is None:
+                    prefetched = None
+                elif profiler is None:
+                    prefetched = future.result()
+                else:
+                    prefetched = profiler.timed('read', future.result)
+                for next_path in islice(paths, 1):
+                    submit(pool, next_path)
+                yield relative_path, prefetched
+
+
+def analyze_prefetched(relative_path: str, prefetched: Prefetched, cache: Optional[Dict[str, dict]],
+                       updated: Optional[Dict[str, dict]]) -> Dict[str, str]:
+    """Classify a Prefetcher read, reusing cached results like analyze_cached()"""
+    st, content, verdict, digest = prefetched
+    try:
+        if verdict is not None and (cache is None or st is None):
+            # Missing and unreadable files are never cached
+            stats[stat_key(verdict)] += 1
+            return verdict._asdict()
+        full_path = str(BASE_DIR / relative_path)
+        if cache is None:
+            return default_analyzer.classify(relative_path, content, full_path, digest)._asdict()
+
+        entry = cache.get(relative_path)
+        if digest is None:
+            return reuse_cached(relative_path, entry, updated)
+        if entry and entry['sha1'] == digest:
+            return reuse_cached(relative_path, dict(entry, size=st.st_size, mtime_ns=st.st_mtime_ns), updated)
+
+        cache_stats['misses'] += 1
+        if verdict is None:
+            analysis = default_analyzer.classify(relative_path, content, full_path, digest)._asdict()
+        else:
+            stats[stat_key(verdict)] += 1
+            analysis = verdict._asdict()
+        updated[relative_path] = new_cache_entry(relative_path, st, digest, analysis)
+        return analysis
+    finally:
+        release_source(content)
+
+
+def analyze_path(relative_path: str, cache: Optional[Dict[str, dict]] = None,
+                 updated: Optional[Dict[str, dict]] = None,
+                 prefetched: Optional[Prefetched] = None) -> Dict[str, str]:
+    """Analyze a single repository-relative path
+
+    When a cache is given, results are looked up in it and every entry
+    used or produced is recorded in ``updated``. A Prefetcher read of the
+    file is used instead of reading it here.
+    """
+    full_path = str(BASE_DIR / relative_path)
+    if profiler is not None:
+        start = time.perf_counter()
+    if prefetched is not None:
+        analysis = analyze_prefetched(relative_path, prefetched, cache, updated)
+    elif cache is None:
+        analysis = classify_file(full_path, relative_path)
+    else:
+        analysis = analyze_cached(full_path, relative_path, cache, updated)
+    if profiler is not None:
+        profiler.file_done(relative_path, time.perf_counter() - start)
+    return analysis
+
+
+def iter_file_list(files_txt: Path = FILES_TXT) -> Iterator[str]:
+    """Yield relative paths from files.txt as the file is read"""
+    with open(files_txt, 'r', encoding='utf-8') as f:
+        for line in f:
+            relative_path = parse_file_line(line)
+            if relative_path:
+                yield relative_path
+
+
+def gitignore_regex(pattern: str) -> str:
+    """Translate one .gitignore glob into a regex over '/'-separated paths"""
+    anchored = '/' in pattern.rstrip('/')
+    pattern = pattern.strip('/')
+    regex, i = '', 0
+    while i < len(pattern):
+        if pattern.startswith('**/', i):
+            regex += '(?:.*/)?'
+            i += 3
+        elif pattern.startswith('**', i):
+            regex += '.*'
+            i += 2
+        elif pattern[i] == '*':
+            regex += '[^/]*'
+            i += 1
+        elif pattern[i] == '?':
+            regex += '[^/]'
+            i += 1
+        elif pattern[i] == '[' and ']' in pattern[i + 2:]:
+            end = pattern.index(']', i + 2)
+            regex += '[' + pattern[i + 1:end].replace('!', '^', 1) + ']'
+            i = end + 1
+        else:
+            regex += re.escape(pattern[i])
+            i += 1
+    # Patterns without an inner slash match at any depth
+    return regex if anchored else '(?:.*/)?' + regex
+
+
+def load_gitignore(directory: str) -> List[Tuple[re.Pattern, bool, bool]]:
+    """Compile directory/.gitignore into (regex, negated, dir_only) rules
+
+    Covers the usual subset of the format: comments, ``!`` negation,
+    trailing-slash directory patterns, leading-slash anchors, ``*``, ``?``,
+    ``**`` and character classes.
+    """
+    try:
+        with open(os.path.join(directory, '.gitignore'), 'r', encoding='utf-8', errors='ignore') as f:
+            lines = f.read().splitlines()
+    except OSError:
+        return []
+
+    rules = []
+    for line in lines:
+        line = line.rstrip()
+        if not line or line.startswith('#'):
+            continue
+        negated = line.startswith('!')
+        if negated:
+            line = line[1:]
+        if line.startswith('\\'):
+            line = line[1:]
+        rules.append((re.compile(gitignore_regex(line)), negated, line.endswith('/')))
+    return rules
+
+
+def is_ignored(relative_path: str, is_dir: bool, ignores: List[Tuple[str, list]]) -> bool:
+    """True if the innermost matching .gitignore rule excludes relative_path"""
+    ignored = False
+    for base, rules in ignores:
+        local = relative_path[len(base):]
+        for regex, negated, dir_only in rules:
+            if (is_dir or not dir_only) and regex.fullmatch(local):
+                ignored = not negated
+    return ignored
+
+
+def walk_tree(directory: str, relative_dir: str, ignores: List[Tuple[str, list]],
+              directories: Optional[List[str]] = None) -> Iterator[str]:
+    """Yield source files under directory depth first, in name order
+
+    Pruned and ignored directories are skipped before they are listed, and
+    each directory's own .gitignore applies to everything below it. Every
+    directory walked is appended to ``directories`` when it is given.
+    """
+    if directories is not None:
+        directories.append(relative_dir)
+    rules = load_gitignore(directory)
+    if rules:
+        ignores = ignores + [(relative_dir + '/', rules)]
+
+    try:
+        with os.scandir(directory) as it:
+            entries = sorted(it, key=lambda entry: entry.name)
+    except OSError:
+        return
+
+    for entry in entries:
+        relative_path = f"{relative_dir}/{entry.name}"
+        try:
+            is_dir = entry.is_dir(follow_symlinks=False)
+        except OSError:
+            continue
+        if is_dir:
+            if (entry.name in PRUNED_DIRS or entry.name.startswith(PRUNED_DIR_PREFIXES) or
+                    is_ignored(relative_path, True, ignores)):
+                continue
+            yield from walk_tree(entry.path, relative_path, ignores, directories)
+        elif entry.name.endswith(SOURCE_EXTENSIONS) and not is_ignored(relative_path, False, ignores):
+            yield relative_path
+
+
+def discover_files(roots: Iterable[str] = DISCOVERY_ROOTS, directories: Optional[List[str]] = None,
+                   base_dir: Path = BASE_DIR) -> Iterator[str]:
+    """Yield repository-relative source paths under roots as they are found"""
+    ignores = []
+    root_rules = load_gitignore(str(base_dir))
+    if root_rules:
+        ignores.append(('', root_rules))
+    for root in roots:
+        if (base_dir / root).is_dir() and not is_ignored(root, True, ignores):
+            yield from walk_tree(str(base_dir / root), root, ignores, directories)
+
+
+def iter_discovered(roots: Iterable[str] = DISCOVERY_ROOTS) -> Iterator[str]:
+    """Yield discover_files() paths from a background thread
+
+    The walk runs ahead of the analyzer through a bounded queue, so
+    directory listing overlaps with reading and classifying files.
+    """
+    found = queue.Queue(maxsize=DISCOVERY_QUEUE_SIZE)
+    done = object()
+    failure = []
+
+    def walk():
+        try:
+            for relative_path in discover_files(roots):
+                found.put(relative_path)
+        except BaseException as e:
+            failure.append(e)
+        finally:
+            found.put(done)
+
+    threading.Thread(target=walk, name='rbac-discovery', daemon=True).start()
+    for relative_path in iter(found.get, done):
+        yield relative_path
+    if failure:
+        raise failure[0]
+
+
+def analyze_chunk(paths: List[str], cache: Optional[Dict[str, dict]] = None, profile_slowest: int = 0,
+                  prefetch: int = 0, io_threads: int = PREFETCH_THREADS, locate_findings: bool = False
+                  ) -> Tuple[List[Tuple[str, Dict[str, str]]], Dict[str, int], Dict[str, int],
+                             Dict[str, dict], Dict[str, str], Dict[str, List[list]], Optional[dict]]:
+    """Analyze a chunk of paths and return its results, counters and cache entries
+
+    Runs inside a worker process, so the module-level counters are reset
+    first and only this chunk's counts, content digests and findings are
+    handed back for merging. Scanned content features are kept across
+    chunks. With profile_slowest set, the chunk is profiled and its profile
+    returned too.
+    """
+    global profiler
+    default_analyzer.reset()
+    default_analyzer.locate_findings = locate_findings
+    for key in cache_stats:
+        cache_stats[key] = 0
+    profiler = Profiler(profile_slowest) if profile_slowest else None
+
+    updated = {}
+    results = list(iter_read_results(paths, 1, cache, updated, prefetch, io_threads))
+    return (results, dict(stats), dict(cache_stats), updated, dict(default_analyzer.content_digests),
+            dict(default_analyzer.findings), profiler and profiler.state())
+
+
+def iter_parallel(paths: Iterable[str], jobs: int, cache: Optional[Dict[str, dict]] = None,
+                  updated: Optional[Dict[str, dict]] = None, prefetch: int = 0,
+                  io_threads: int = PREFETCH_THREADS) -> Iterator[Tuple[str, Dict[str, str]]]:
+    """Analyze paths across a process pool, yielding results in input order
+
+    At most two chunks per worker are in flight, so memory stays bounded
+    however long the path stream is. With prefetch set, each worker reads
+    its chunk through its own Prefetcher.
+    """
+    from concurrent.futures import ProcessPoolExecutor
+
+    paths = iter(paths)
+    pending = deque()
+
+    def finished(future):
+        (results, chunk_stats, chunk_cache_stats, chunk_updated, chunk_digests, chunk_findings,
+         chunk_profile) = future.result()
+        if chunk_profile:
+            profiler.merge(chunk_profile)
+        default_analyzer.findings.update(chunk_findings)
+        for path, analysis in results:
+            if path in chunk_digests:
+                default_analyzer.record_content(chunk_digests[path], path, Verdict(**analysis))
+        for key, count in chunk_stats.items():
+            stats[key] += count
+        for key, count in chunk_cache_stats.items():
+            cache_stats[key] += count
+        if updated is not None:
+            updated.update(chunk_updated)
+        return results
+
+    with ProcessPoolExecutor(max_workers=jobs) as executor:
+        for chunk in iter(lambda: list(islice(paths, PARALLEL_CHUNK_SIZE)), []):
+            # Ship each worker only the cache entries its chunk can use
+            chunk_cache = None
+            if cache is not None:
+                chunk_cache = {path: cache[path] for path in chunk if path in cache}
+            profile_slowest = profiler.slowest_count if profiler is not None else 0
+            pending.append(executor.submit(analyze_chunk, chunk, chunk_cache, profile_slowest,
+                                           prefetch, io_threads, default_analyzer.locate_findings))
+
+            if len(pending) >= jobs * 2:
+                yield from finished(pending.popleft())
+        while pending:
+            yield from finished(pending.popleft())
+
+
+def iter_results(paths: Iterable[str], jobs: int = 1, cache: Optional[Dict[str, dict]] = None,
+                 updated: Optional[Dict[str, dict]] = None, prefetch: int = 0,
+                 io_threads: int = PREFETCH_THREADS, decided: Optional[Dict[str, Dict[str, str]]] = None
+                 ) -> Iterator[Tuple[str, Dict[str, str]]]:
+    """Yield (relative_path, analysis) for each path, in order, in two stages
+
+    The path stage decides every file it can by path in this process,
+    listing each directory once; only the remaining files go on to the
+    read-and-match stage (iter_read_results()) and its workers. A decided
+    result waits only for the reads of files listed before it. Existing
+    files decided by path are also added to ``decided`` when it is given.
+    """
+    exists = DirectoryListings()
+    order = deque()
+
+    def undecided() -> Iterator[str]:
+        for relative_path in paths:
+            analysis = decide_by_path(relative_path, exists)
+            order.append((relative_path, analysis))
+            if analysis is None:
+                yield relative_path
+            elif decided is not None and analysis['notes'] != NOT_FOUND.notes:
+                decided[relative_path] = analysis
+
+    for relative_path, analysis in iter_read_results(undecided(), jobs, cache, updated, prefetch, io_threads):
+        while order[0][1] is not None:
+            yield order.popleft()
+        order.popleft()
+        yield relative_path, analysis
+    yield from order
+
+
+def iter_read_results(paths: Iterable[str], jobs: int = 1, cache: Optional[Dict[str, dict]] = None,
+                      updated: Optional[Dict[str, dict]] = None, prefetch: int = 0,
+                      io_threads: int = PREFETCH_THREADS) -> Iterator[Tuple[str, Dict[str, str]]]:
+    """Read and classify each path, yielding (relative_path, analysis) in order
+
+    With prefetch set, up to that many files are read ahead on io_threads
+    threads while earlier ones are classified.
+    """
+    if jobs > 1:
+        yield from iter_parallel(paths, jobs, cache, updated, prefetch, io_threads)
+        return
+    if prefetch > 0:
+        for path, prefetched in Prefetcher(prefetch, io_threads, cache).iter(paths):
+            yield path, analyze_path(path, cache, updated, prefetched)
+        return
+    for path in paths:
+        yield path, analyze_path(path, cache, updated)
+
+
+class CsvSink:
+    """Writes files_status_detailed.csv one row at a time"""
+
+    label = 'CSV'
+
+    def __init__(self, path: Path):
+        self.path = path
+        # Line buffered, so an interrupted run leaves every finished row on disk
+        self.file = open(path, 'w', encoding='utf-8', newline='', buffering=1)
+        csv.writer(self.file, lineterminator='\n').writerow(CSV_HEADER)
+        self.writer = csv.writer(self.file, quoting=csv.QUOTE_ALL, lineterminator='\n')
+
+    def write(self, relative_path: str, analysis: Dict[str, str]):
+        self.writer.writerow((relative_path, analysis['status'], analysis['notes'],
+                              analysis['issues'], analysis['plan']))
+
+    def close(self):
+        self.file.close()
+
+
+class JsonlSink:
+    """Writes one JSON object per analyzed file"""
+
+    label = 'JSONL'
+
+    def __init__(self, path: Path):
+        self.path = path
+        self.file = open(path, 'w', encoding='utf-8', buffering=1)
+
+    def write(self, relative_path: str, analysis: Dict[str, str]):
+        record = {'path': relative_path}
+        record.update(analysis)
+        self.file.write(json.dumps(record, ensure_ascii=False) + '\n')
+
+    def close(self):
+        self.file.close()
+
+
+class SarifSink:
+    """Writes ❌ and 🔄 results as a SARIF 2.1.0 log for code-scanning dashboards
+
+    Results are streamed into the log as they arrive; the tool section with
+    the rule descriptions seen during the run is written when it is closed.
+    """
+
+    label = 'SARIF'
+    LEVELS = {'❌': 'error', '🔄': 'warning'}
+
+    def __init__(self, path: Path):
+        self.path = path
+        self.file = open(path, 'w', encoding='utf-8')
+        self.rules: Dict[str, dict] = {}
+        self.count = 0
+        self.file.write('{"$schema": "https://json.schemastore.org/sarif-2.1.0.json", '
+                        '"version": "2.1.0", "runs": [{"results": [\n')
+
+    @staticmethod
+    def rule_id(notes: str) -> str:
+        return 'rbac/' + re.sub(r'[^a-z0-9]+', '-', notes.lower()).strip('-')
+
+    def write(self, relative_path: str, analysis: Dict[str, str]):
+        level = self.LEVELS.get(analysis['status'])
+        if not level:
+            return
+
+        rule_id = self.rule_id(analysis['notes'])
+        if rule_id not in self.rules:
+            rule = {'id': rule_id, 'shortDescription': {'text': analysis['notes']}}
+            if analysis['plan']:
+                rule['help'] = {'text': analysis['plan']}
+            self.rules[rule_id] = rule
+
+        message = analysis['notes']
+        if analysis['issues']:
+            message += f" - {analysis['issues']}"
+        result = {
+            'ruleId': rule_id,
+            'level': level,
+            'message': {'text': message},
+            'locations': [{'physicalLocation': {
+                'artifactLocation': {'uri': relative_path, 'uriBaseId': '%SRCROOT%'}
+            }}]
+        }
+        self.file.write((',\n' if self.count else '') + json.dumps(result, ensure_ascii=False))
+        self.count += 1
+
+    def close(self):
+        tool = {'driver': {'name': 'analyze_rbac', 'rules': list(self.rules.values())}}
+        self.file.write('\n], "tool": ' + json.dumps(tool, ensure_ascii=False) + '}]}\n')
+        self.file.close()
+
+
+def open_history(path: Path) -> 'sqlite3.Connection':
+    """Open the run history database, creating its tables on first use"""
+    import sqlite3
+
+    conn = sqlite3.connect(path)
+    conn.executescript(HISTORY_SCHEMA)
+    return conn
+
+
+class HistorySink:
+    """Records every result of the run in the SQLite run history
+
+    Paths and verdicts are stored once and referenced by id, so a run costs
+    one small row per file. Rows are inserted in batches inside a single
+    transaction; the run only counts for the history queries once finish()
+    marks it complete.
+    """
+
+    label = 'History'
+    BATCH_SIZE = 1000
+
+    def __init__(self, path: Path):
+        import subprocess
+
+        self.path = path
+        self.conn = open_history(path)
+        self.paths = dict(self.conn.execute('SELECT path, id FROM paths'))
+        self.verdicts = {row[1:]: row[0] for row in
+                         self.conn.execute('SELECT id, status, notes, issues, plan FROM verdicts')}
+        try:
+            head = run_git('rev-parse', 'HEAD').decode('ascii').strip()
+        except (OSError, subprocess.CalledProcessError):
+            head = None
+        self.run = self.conn.execute('INSERT INTO runs (started, head, rules_version) VALUES (?, ?, ?)',
+                                     (time.strftime('%Y-%m-%d %H:%M:%S'), head, rules_version())).lastrowid
+        self.rows: List[Tuple[int, int, int]] = []
+
+    def write(self, relative_path: str, analysis: Dict[str, str]):
+        path_id = self.paths.get(relative_path)
+        if path_id is None:
+            path_id = self.conn.execute('INSERT INTO paths (path, directory) VALUES (?, ?)',
+                                        (relative_path, os.path.dirname(relative_path))).lastrowid
+            self.paths[relative_path] = path_id
+        verdict = (analysis['status'], analysis['notes'], analysis['issues'], analysis['plan'])
+        verdict_id = self.verdicts.get(verdict)
+        if verdict_id is None:
+            verdict_id = self.conn.execute('INSERT INTO verdicts (status, notes, issues, plan) '
+                                           'VALUES (?, ?, ?, ?)', verdict).lastrowid
+            self.verdicts[verdict] = verdict_id
+        self.rows.append((self.run, path_id, verdict_id))
+        if len(self.rows) >= self.BATCH_SIZE:
+            self.flush()
+
+    def flush(self):
+        self.conn.executemany('INSERT OR REPLACE INTO results (run, path, verdict) VALUES (?, ?, ?)', self.rows)
+        self.rows = []
+
+    def finish(self, counters: Dict[str, int]):
+        """Store the run's counters and mark it complete"""
+        self.conn.execute(f"UPDATE runs SET complete = 1, files = ?, "
+                          f"{', '.join(f'{key} = ?' for key in STAT_KEYS)} WHERE id = ?",
+                          (sum(counters.values()), *(counters[key] for key in STAT_KEYS), self.run))
+
+    def close(self):
+        self.flush()
+        self.conn.commit()
+        self.conn.close()
+
+
+def history_runs(conn: 'sqlite3.Connection', count: Optional[int] = None) -> List[int]:
+    """Ids of the most recent complete runs, oldest first"""
+    rows = conn.execute('SELECT id FROM runs WHERE complete ORDER BY id DESC LIMIT ?',
+                        (-1 if count is None else count,))
+    return sorted(run for run, in rows)
+
+
+def print_runs(path: Path):
+    """List the recorded runs with their counters"""
+    conn = open_history(path)
+    print(f"{'Run':>5}  {'Started':<20}{'Head':<10}{'Files':>7}{'✅':>6}{'❌':>6}{'🔄':>6}{'Rate':>8}")
+    for row in conn.execute(f"SELECT id, started, head, files, {', '.join(STAT_KEYS)} "
+                            f"FROM runs WHERE complete ORDER BY id"):
+        run, started, head, files = row[:4]
+        counters = dict(zip(STAT_KEYS, row[4:]))
+        rate = compliance_rate(counters)
+        print(f"{run:>5}  {started:<20}{(head or '-')[:8]:<10}{files:>7}{counters['compliant']:>6}"
+              f"{counters['needs_migration']:>6}{counters['partial']:>6}"
+              + (f"{rate:>7.1f}%" if rate is not None else f"{'-':>8}"))
+    conn.close()
+
+
+def print_regressions(path: Path, since: int):
+    """List files whose status got worse between run since and the latest run
+
+    Only rows whose verdict differs are read; ranks are compared for the
+    statuses in STATUS_RANK, so files that became ➖ or disappeared are not
+    regressions.
+    """
+    conn = open_history(path)
+    runs = history_runs(conn, 1)
+    if not runs or runs[-1] <= since:
+        print(f"No complete run after run {since} in {path}")
+        conn.close()
+        return
+    latest = runs[-1]
+    rows = conn.execute('''
+        SELECT p.path, old.status, new.status, new.notes
+        FROM results AS a
+        JOIN results AS b ON b.run = ? AND b.path = a.path AND b.verdict != a.verdict
+        JOIN paths AS p ON p.id = a.path
+        JOIN verdicts AS old ON old.id = a.verdict
+        JOIN verdicts AS new ON new.id = b.verdict
+        WHERE a.run = ?
+        ORDER BY p.path
+    ''', (latest, since))
+    regressions = [row for row in rows
+                   if row[1] in STATUS_RANK and row[2] in STATUS_RANK and STATUS_RANK[row[2]] > STATUS_RANK[row[1]]]
+    conn.close()
+
+    print(f"Regressions from run {since} to run {latest}: {len(regressions)}")
+    for relative_path, old_status, new_status, notes in regressions:
+        print(f"  {old_status} -> {new_status}  {relative_path} - {notes}")
+
+
+def print_trend(path: Path, depth: int = HISTORY_TREND_DEPTH, count: int = HISTORY_TREND_RUNS):
+    """Print the compliance rate per directory for the most recent runs"""
+    conn = open_history(path)
+    conn.create_function('dir_prefix', 2, lambda directory, n: '/'.join(directory.split('/')[:n]),
+                         deterministic=True)
+    runs = history_runs(conn, count)
+    rates: Dict[str, Dict[int, Optional[float]]] = {}
+    if runs:
+        rows = conn.execute(f'''
+            SELECT r.run, dir_prefix(p.directory, ?) AS dir,
+                   SUM(v.status = '✅'), SUM(v.status IN ('✅', '❌', '🔄'))
+            FROM results AS r
+            JOIN paths AS p ON p.id = r.path
+            JOIN verdicts AS v ON v.id = r.verdict
+            WHERE r.run IN ({', '.join('?' * len(runs))})
+            GROUP BY r.run, dir
+        ''', (depth, *runs))
+        for run, directory, compliant, actionable in rows:
+            rates.setdefault(directory, {})[run] = compliant / actionable * 100 if actionable else None
+    conn.close()
+
+    print(f"Compliance rate by directory (depth {depth}), runs {', '.join(map(str, runs)) or '-'}")
+    width = max((len(directory) for directory in rates), default=9)
+    print(f"{'Directory':<{width}}" + ''.join(f"{'#' + str(run):>8}" for run in runs))
+    for directory in sorted(rates):
+        cells = (rates[directory].get(run) for run in runs)
+        print(f"{directory:<{width}}" + ''.join(f"{'-':>8}" if rate is None else f"{rate:>7.1f}%"
+                                                for rate in cells))
+
+
+def print_stuck(path: Path, count: int):
+    """List files that were 🔄 in each of the last count runs"""
+    conn = open_history(path)
+    runs = history_runs(conn, count)
+    rows = []
+    if len(runs) == count:
+        rows = conn.execute(f'''
+            SELECT p.path, MAX(v.notes)
+            FROM results AS r
+            JOIN paths AS p ON p.id = r.path
+            JOIN verdicts AS v ON v.id = r.verdict
+            WHERE r.run IN ({', '.join('?' * len(runs))}) AND v.status = '🔄'
+            GROUP BY r.path
+            HAVING COUNT(*) = ?
+            ORDER BY p.path
+        ''', (*runs, count)).fetchall()
+    conn.close()
+
+    if len(runs) < count:
+        print(f"Only {len(runs)} complete runs recorded in {path}")
+        return
+    print(f"Files in 🔄 for the last {count} runs: {len(rows)}")
+    for relative_path, notes in rows:
+        print(f"  {relative_path} - {notes}")
+
+
+class FindingsSink:
+    """Writes one row per located finding in ❌ and 🔄 files
+
+    The findings are located by the analyzer while it has each file's
+    content (see Analyzer.locate()) or come with its cache entry, so no
+    file is read again here.
+    """
+
+    label = 'Findings'
+
+    def __init__(self, path: Path):
+        self.path = path
+        self.count = 0
+        default_analyzer.locate_findings = True
+        self.file = open(path, 'w', encoding='utf-8', newline='', buffering=1)
+        csv.writer(self.file, lineterminator='\n').writerow(FINDINGS_CSV_HEADER)
+        self.writer = csv.writer(self.file, quoting=csv.QUOTE_ALL, lineterminator='\n')
+
+    def write(self, relative_path: str, analysis: Dict[str, str]):
+        for finding in default_analyzer.findings.pop(relative_path, ()):
+            self.writer.writerow((relative_path, *finding, analysis['status']))
+            self.count += 1
+
+    def close(self):
+        self.file.close()
+
+
+class DirectoryRollup:
+    """Status counters for every directory above each file, kept as a prefix tree
+
+    A node is [counters, children by name]; the root counts the whole run.
+    Adding or removing a result touches one node per path component, so a
+    run costs O(files x depth) and --watch updates the tree in place.
+    """
+
+    def __init__(self):
+        self.root = [dict.fromkeys(STAT_KEYS, 0), {}]
+
+    def add(self, relative_path: str, analysis: Dict[str, str], count: int = 1):
+        key = stat_key(analysis)
+        node = self.root
+        node[0][key] += count
+        nodes = []
+        for part in relative_path.split('/')[:-1]:
+            nodes.append((node, part))
+            node = node[1].setdefault(part, [dict.fromkeys(STAT_KEYS, 0), {}])
+            node[0][key] += count
+        if count < 0:
+            # Drop directories left without files, deepest first
+            for parent, part in reversed(nodes):
+                if any(parent[1][part][0].values()):
+                    break
+                del parent[1][part]
+
+    def remove(self, relative_path: str, analysis: Dict[str, str]):
+        self.add(relative_path, analysis, -1)
+
+    def rows(self) -> Iterator[Tuple[str, int, Dict[str, int]]]:
+        """(directory, depth, counters) for every directory, parents before
+        their children and siblings by name; the root is '.'"""
+        stack = [('.', 0, self.root)]
+        while stack:
+            directory, depth, (counters, children) = stack.pop()
+            yield directory, depth, counters
+            prefix = '' if directory == '.' else directory + '/'
+            stack.extend((prefix + name, depth + 1, children[name]) for name in sorted(children, reverse=True))
+
+    def write(self, path: Path, json_path: Path):
+        """Write the sorted text report to path and the same numbers as JSON to json_path"""
+        rows = list(self.rows())
+        width = max(len(directory) for directory, _, _ in rows)
+        with open(path, 'w', encoding='utf-8') as f:
+            f.write(f"{'Directory':<{width}} {'Files':>6}   ✅    ➖    ❌    🔄    ❓    Rate\n")
+            for directory, _, counters in rows:
+                rate = compliance_rate(counters)
+                f.write(f"{directory:<{width}} {sum(counters.values()):>6}"
+                        + ''.join(f" {counters[key]:>5}" for key in STAT_KEYS)
+                        + (f" {rate:>6.1f}%" if rate is not None else f" {'-':>7}") + "\n")
+        with open(json_path, 'w', encoding='utf-8') as f:
+            json.dump({directory: dict(counters, depth=depth, files=sum(counters.values()),
+                                       rate=compliance_rate(counters))
+                       for directory, depth, counters in rows}, f, indent=1, ensure_ascii=False)
+
+
+class RollupSink:
+    """Aggregates results per directory as they stream past, see DirectoryRollup"""
+
+    label = 'Rollups'
+
+    def __init__(self, path: Path):
+        self.path = path
+        self.rollup = DirectoryRollup()
+
+    def write(self, relative_path: str, analysis: Dict[str, str]):
+        self.rollup.add(relative_path, analysis)
+
+    def close(self):
+        self.rollup.write(self.path, self.path.with_suffix('.json'))
+
+
+def shard_of(relative_path: str, count: int) -> int:
+    """The 1-based shard a path belongs to - stable across runs, machines and Python versions"""
+    return int.from_bytes(hashlib.sha1(relative_path.encode('utf-8')).digest()[:8], 'big') % count + 1
+
+
+def parse_shard(value: str) -> Tuple[int, int]:
+    """Parse --shard i/N"""
+    try:
+        index, count = (int(part) for part in value.split('/'))
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"expected i/N, got {value!r}")
+    if not 1 <= index <= count:
+        raise argparse.ArgumentTypeError(f"shard {index} is not between 1 and {count}")
+    return index, count
+
+
+class ShardSink:
+    """Collects one shard's results into a partial for --merge
+
+    Each row keeps the path's position in the whole input and its content
+    SHA-1, so partials merged in any order give back the single-run order
+    and duplicate groups. Verdicts are stored once and referenced by index.
+    The partial is only written by finish(), once the input is exhausted.
+    """
+
+    label = 'Partial'
+
+    def __init__(self, path: Path, shard: Tuple[int, int], positions: deque):
+        self.path = path
+        self.shard = shard
+        self.positions = positions
+        self.verdicts: Dict[Tuple[str, str, str, str], int] = {}
+        self.rows: List[list] = []
+
+    def write(self, relative_path: str, analysis: Dict[str, str]):
+        verdict = (analysis['status'], analysis['notes'], analysis['issues'], analysis['plan'])
+        verdict_id = self.verdicts.setdefault(verdict, len(self.verdicts))
+        self.rows.append([self.positions.popleft(), relative_path, verdict_id, None])
+
+    def finish(self, inputs: int, counters: Dict[str, int]):
+        """Write the partial; inputs is the length of the whole, unsharded input"""
+        for row in self.rows:
+            row[3] = default_analyzer.content_digests.get(row[1])
+        tmp_path = self.path.with_name(self.path.name + '.tmp')
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump({'shard': self.shard[0], 'shards': self.shard[1], 'inputs': inputs,
+                       'rules_version': rules_version(), 'stats': counters,
+                       'verdicts': list(self.verdicts), 'rows': self.rows},
+                      f, ensure_ascii=False, separators=(',', ':'))
+        os.replace(tmp_path, self.path)
+
+    def close(self):
+        pass
+
+
+def merge_shards(paths: List[Path], rollups: Optional[Path] = None) -> int:
+    """Combine --shard partials into the reports a single run writes
+
+    The partials may be given in any order but must come from the same
+    input and rules, one per shard.
+    """
+    partials = []
+    for path in paths:
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                partials.append(json.load(f))
+        except (OSError, ValueError) as e:
+            print(f"Cannot read partial {path}: {e}")
+            return 1
+
+    first = partials[0]
+    for path, partial in zip(paths, partials):
+        if (partial['shards'], partial['inputs'], partial['rules_version']) != \
+                (first['shards'], first['inputs'], first['rules_version']):
+            print(f"{path} comes from a different input, shard count or rule set than {paths[0]}")
+            return 1
+    shards = sorted(partial['shard'] for partial in partials)
+    if shards != list(range(1, first['shards'] + 1)):
+        print(f"Expected shards 1-{first['shards']} once each, got {', '.join(map(str, shards))}")
+        return 1
+
+    def rows(partial: dict) -> Iterator[Tuple[int, str, Dict[str, str], Optional[str]]]:
+        verdicts = [dict(zip(RESULT_FIELDS, verdict)) for verdict in partial['verdicts']]
+        for position, relative_path, verdict_id, digest in partial['rows']:
+            yield position, relative_path, verdicts[verdict_id], digest
+
+    default_analyzer.reset()
+    for partial in partials:
+        for key in STAT_KEYS:
+            stats[key] += partial['stats'][key]
+
+    total = 0
+    sinks = [CsvSink(CSV_OUTPUT)]
+    if rollups:
+        sinks.append(RollupSink(rollups))
+    try:
+        for position, relative_path, analysis, digest in heapq.merge(*map(rows, partials), key=lambda row: row[0]):
+            if position != total:
+                break
+            for sink in sinks:
+                sink.write(relative_path, analysis)
+            if digest is not None:
+                default_analyzer.record_content(digest, relative_path, Verdict(**analysis))
+            total += 1
+    finally:
+        for sink in sinks:
+            sink.close()
+    if total != first['inputs']:
+        print(f"Partials cover {total} of {first['inputs']} input files; {CSV_OUTPUT} is incomplete")
+        return 1
+
+    print(f"Merged {len(partials)} partials")
+    print_summary(total)
+    for sink in sinks:
+        print(f"{sink.label} Report: {sink.path}")
+    if default_analyzer.duplicate_groups():
+        write_duplicates()
+        print(f"Duplicates Report: {DUPLICATES_CSV_OUTPUT}")
+    write_summary(total)
+    print(f"Summary: {SUMMARY_OUTPUT}")
+    return 0
+
+
+def run_git(*args: str, stdin: Optional[bytes] = None) -> bytes:
+    """Run a git command in the repository root and return its raw stdout"""
+    import subprocess
+
+    result = subprocess.run(['git', '-C', str(BASE_DIR), *args], input=stdin,
+                            capture_output=True, check=True)
+    return result.stdout
+
+
+def is_source_path(relative_path: str) -> bool:
+    """True for backend/React JS/TS files the classifiers know about"""
+    return (relative_path.startswith(('backend/', 'react/')) and
+            relative_path.endswith(SOURCE_EXTENSIONS))
+
+
+def git_changed_files(ref: str) -> List[Tuple[str, Optional[str], Optional[str]]]:
+    """List (change, old_path, new_path) for source files changed since ref
+
+    Compares ref with the working tree, so staged, unstaged and untracked
+    files all count. Change is A (added), M (modified), D (deleted) or
+    R (renamed); old_path is None for additions, new_path None for deletions.
+    """
+    fields = run_git('diff', '--name-status', '-M', '-z', ref, '--').decode('utf-8').split('\0')
+    changes = []
+    i = 0
+    while i < len(fields) - 1:
+        code = fields[i][0]
+        if code in 'RC':
+            old_path, new_path = fields[i + 1], fields[i + 2]
+            i += 3
+        else:
+            old_path = new_path = fields[i + 1]
+            i += 2
+
+        if code == 'C':
+            changes.append(('A', None, new_path))
+        elif code in 'AD':
+            changes.append((code, None if code == 'A' else old_path,
+                            None if code == 'D' else new_path))
+        else:
+            changes.append(('R' if code == 'R' else 'M', old_path, new_path))
+
+    untracked = run_git('ls-files', '--others', '--exclude-standard', '-z').decode('utf-8')
+    changes.extend(('A', None, path) for path in untracked.split('\0') if path)
+
+    return [change for change in changes
+            if any(path and is_source_path(path) for path in change[1:])]
+
+
+def read_git_blobs(ref: str, paths: List[str]) -> Dict[str, bytes]:
+    """Read the content of paths at ref with a single git cat-file process"""
+    if not paths:
+        return {}
+
+    request = ''.join(f'{ref}:{path}\n' for path in paths).encode('utf-8')
+    output = run_git('cat-file', '--batch', stdin=request)
+
+    blobs = {}
+    pos = 0
+    for path in paths:
+        eol = output.index(b'\n', pos)
+        header = output[pos:eol].split()
+        pos = eol + 1
+        if header[-1] in (b'missing', b'ambiguous'):
+            continue
+        size = int(header[2])
+        if header[1] == b'blob':
+            blobs[path] = output[pos:pos + size]
+        pos += size + 1
+    return blobs
+
+
+def summarize_delta(transitions: List[Tuple[str, str]]) -> str:
+    """Describe status transitions, e.g. '2 files moved ❌→✅, 1 new ❌'"""
+    counts = Counter(transitions)
+    parts = []
+    for (old, new), count in counts.most_common():
+        if old and new and old != new:
+            parts.append(f"{count} {'file' if count == 1 else 'files'} moved {old}→{new}")
+    for (old, new), count in counts.most_common():
+        if not old:
+            parts.append(f"{count} new {new}")
+    for (old, new), count in counts.most_common():
+        if not new:
+            parts.append(f"{count} removed {old}")
+
+    unchanged = sum(count for (old, new), count in counts.items() if old and old == new)
+    if unchanged:
+        parts.append(f"{unchanged} unchanged")
+    return ', '.join(parts) if parts else 'No changed files'
+
+
+def analyze_since(ref: str):
+    """Analyze only the files changed between ref and the working tree"""
+    import subprocess
+
+    try:
+        changes = git_changed_files(ref)
+        old_paths = [old for _, old, _ in changes if old and is_source_path(old)]
+        old_blobs = read_git_blobs(ref, old_paths)
+    except (OSError, subprocess.CalledProcessError) as e:
+        detail = getattr(e, 'stderr', b'') or b''
+        print(f"Error: cannot diff against {ref}: {detail.decode('utf-8', 'ignore').strip() or e}")
+        return
+
+    print(f"Found {len(changes)} changed files since {ref}")
+    print()
+
+    # The old revision gets its own analyzer so it does not count towards this
+    # run's stats; it checks against the working tree's catalog and import graph
+    old = Analyzer(repository_checks=True, cache_dir=OUTPUT_DIR)
+    before = {path: verdict._asdict() for path, verdict in old.analyze(old_blobs.items())}
+
+    transitions = []
+    with open(DELTA_CSV_OUTPUT, 'w', encoding='utf-8', newline='') as f:
+        csv.writer(f, lineterminator='\n').writerow(DELTA_CSV_HEADER)
+        writer = csv.writer(f, quoting=csv.QUOTE_ALL, lineterminator='\n')
+        for change, old_path, new_path in sorted(changes, key=lambda c: c[2] or c[1]):
+            old_status = before[old_path]['status'] if old_path in before else ''
+            if new_path and is_source_path(new_path):
+                analysis = classify_file(str(BASE_DIR / new_path), new_path)
+            else:
+                analysis = {'status': '', 'notes': '', 'issues': '', 'plan': ''}
+            transitions.append((old_status, analysis['status']))
+
+            writer.writerow((new_path or old_path, change, old_path if change == 'R' else '',
+                             old_status, analysis['status'], analysis['notes'],
+                             analysis['issues'], analysis['plan']))
+
+    summary = summarize_delta(transitions)
+    print("=" * 50)
+    print(f"RBAC Delta since {ref}")
+    print("=" * 50)
+    print(summary)
+    print()
+    print(f"Delta CSV: {DELTA_CSV_OUTPUT}")
+
+    with open(DELTA_SUMMARY_OUTPUT, 'w', encoding='utf-8') as f:
+        f.write(f"RBAC Compliance Delta since {ref}\n")
+        f.write("=" * 50 + "\n\n")
+        f.write(f"Changed Files Analyzed: {len(changes)}\n\n")
+        f.write(f"{summary}\n\n")
+        f.write(f"✅ Fully Compliant: {stats['compliant']}\n")
+        f.write(f"➖ No RBAC Needed: {stats['not_needed']}\n")
+        f.write(f"❌ Needs Migration: {stats['needs_migration']}\n")
+        f.write(f"🔄 Partial/Review Needed: {stats['partial']}\n")
+        f.write(f"\nDelta Report: {DELTA_CSV_OUTPUT}\n")
+
+    print(f"Summary: {DELTA_SUMMARY_OUTPUT}")
+
+
+def skip_template(text: str, i: int) -> int:
+    """Index just past the template literal whose opening backtick is at i
+
+    ``${...}`` expressions are skipped by brace depth, stepping over strings
+    and nested templates, so every character is visited once. Nesting is
+    tracked on an explicit stack rather than by recursion, so deeply nested
+    templates cannot exhaust the interpreter's recursion limit.
+    """
+    # Brace depth of each enclosing ${...} expression, innermost last
+    depths = []
+    in_template = True
+    i += 1
+    n = len(text)
+    while i < n:
+        c = text[i]
+        if in_template:
+            if c == '\\':
+                i += 2
+                continue
+            if c == '`':
+                if not depths:
+                    return i + 1
+                in_template = False
+            elif c == '$' and text.startswith('${', i):
+                depths.append(1)
+                in_template = False
+                i += 1
+        elif c == '`':
+            in_template = True
+        elif c in '\'"':
+            match = JS_TOKEN_RE.match(text, i)
+            i = match.end() if match else i + 1
+            continue
+        elif c == '{':
+            depths[-1] += 1
+        elif c == '}':
+            depths[-1] -= 1
+            if not depths[-1]:
+                depths.pop()
+                in_template = True
+        i += 1
+    return n
+
+
+def skip_regex_literal(text: str, i: int) -> int:
+    """Index just past the regex literal whose opening slash is at i"""
+    i += 1
+    n = len(text)
+    in_class = False
+    while i < n:
+        c = text[i]
+        if c == '\\':
+            i += 2
+            continue
+        if c == '\n':
+            return i
+        if in_class:
+            in_class = c != ']'
+        elif c == '[':
+            in_class = True
+        elif c == '/':
+            i += 1
+            # Flags
+            while i < n and text[i].isalpha():
+                i += 1
+            return i
+        i += 1
+    return n
+
+
+def tokenize_js(text: str) -> List[Tuple[str, str, int]]:
+    """Split JavaScript source into (kind, value, offset) tokens in one pass
+
+    Kinds are 'name', 'str' (quotes removed), 'tmpl', 'num', 'regex' and
+    'punct'. Whitespace and comments are dropped. Every alternative of
+    JS_TOKEN_RE is unambiguous, so matching never backtracks and the whole
+    pass is linear in the length of text.
+    """
+    tokens = []
+    i = 0
+    n = len(text)
+    while i < n:
+        c = text[i]
+        if c == '`':
+            end = skip_template(text, i)
+            tokens.append(('tmpl', text[i + 1:end - 1], i))
+            i = end
+            continue
+        if c == '/' and not text.startswith(('//', '/*'), i) and (
+                not tokens or tokens[-1][0] == 'punct' and tokens[-1][1] in JS_REGEX_PRECEDERS or
+                tokens[-1][0] == 'name' and tokens[-1][1] in JS_REGEX_KEYWORDS):
+            end = skip_regex_literal(text, i)
+            tokens.append(('regex', text[i:end], i))
+            i = end
+            continue
+
+        match = JS_TOKEN_RE.match(text, i)
+        kind = match.lastgroup
+        if kind == 'str':
+            value = match.group()
+            tokens.append(('str', value[1:-1] if len(value) > 1 and value[-1] == value[0] else value[1:], i))
+        elif kind != 'skip':
+            tokens.append((kind, match.group(), i))
+        i = match.end()
+    return tokens
+
+
+def call_arguments(tokens: List[Tuple[str, str, int]], start: int) -> Tuple[List[list], int]:
+    """Split the call whose '(' is tokens[start] into per-argument token lists
+
+    Returns the arguments and the index of the closing ')'.
+    """
+    args = [[]]
+    depth = 0
+    i = start + 1
+    while i < len(tokens):
+        kind, value, _ = tokens[i]
+        if kind == 'punct':
+            if value in '([{':
+                depth += 1
+            elif value in ')]}':
+                if depth == 0:
+                    break
+                depth -= 1
+            elif value == ',' and depth == 0:
+                args.append([])
+                i += 1
+                continue
+        args[-1].append(tokens[i])
+        i += 1
+    if not args[-1]:
+        args.pop()
+    return args, i
+
+
+def route_guards(tokens: List[Tuple[str, str, int]], matches: Optional[List[int]] = None,
+                 start: int = 0, end: Optional[int] = None) -> Dict[str, List[List[str]]]:
+    """Arguments of each requirePageAccess()/requireRole() call in tokens[start:end]
+
+    String literals are kept and any other argument becomes None, so
+    arguments keep their positions. Arguments are read from the
+    match_brackets() table, built here unless given, and the scan goes on
+    after each call, so a guard nested in another's arguments is not one.
+    """
+    guards = {name: [] for name in ROUTE_GUARDS}
+    if matches is None:
+        matches = match_brackets(tokens)
+    end = len(tokens) if end is None else end
+    i = start
+    while i < end - 1:
+        kind, value, _ = tokens[i]
+        if kind == 'name' and value in guards and tokens[i + 1][1] == '(':
+            spans, i = argument_spans(tokens, matches, i + 1)
+            guards[value].append([tokens[first][1] if last - first == 1 and tokens[first][0] == 'str' else None
+                                  for first, last in spans])
+        i += 1
+    return guards
+
+
+def page_catalog_sources(base_dir: Path = BASE_DIR) -> List[str]:
+    """Relative paths of the page seed files and the page schema the catalog is read from"""
+    sources = {match.relative_to(base_dir).as_posix() for pattern in PAGE_CATALOG_GLOBS
+               for match in base_dir.glob(pattern) if match.is_file()}
+    if (base_dir / PAGE_SCHEMA).is_file():
+        sources.add(PAGE_SCHEMA)
+    return sorted(sources)
+
+
+def page_catalog_fingerprint(base_dir: Path = BASE_DIR) -> str:
+    """Hash of the catalog sources' paths, sizes and mtimes - stat calls only"""
+    digest = hashlib.sha1()
+    for relative_path in page_catalog_sources(base_dir):
+        st = os.stat(base_dir / relative_path)
+        digest.update(f"{relative_path}\0{st.st_size}\0{st.st_mtime_ns}\n".encode('utf-8'))
+    return digest.hexdigest()
 
-def escape_csv(value: str) -> str:
-    """Escape a value for CSV output"""
-    if not value:
-        return '""'
-    value = str(value).replace('"', '""')
-    return f'"{value}"'
 
+def parse_page_definitions(text: str) -> Tuple[Dict[str, Optional[Set[str]]], Optional[List[str]]]:
+    """Find page objects and the schema's default actions in JavaScript source
 
-def analyze_backend_file(file_path: str, relative_path: str) -> Dict[str, str]:
-    """Analyze a backend file for RBAC compliance"""
-    path_lower = file_path.lower()
+    A page is an object literal with a literal ``name`` matching
+    PAGE_NAME_RE - not a template or a ``'$name'`` field path - and one of
+    PAGE_DEFINITION_KEYS; its actions are None when it lists none. The
+    default is the ``default`` array of an ``availableActions: {...}``
+    schema field.
+    """
+    tokens = tokenize_js(text)
+    pages: Dict[str, Optional[Set[str]]] = {}
+    default_actions = None
+    objects: List[Tuple[Optional[str], dict]] = []
+    for i, (kind, value, _) in enumerate(tokens):
+        if kind != 'punct':
+            continue
+        if value == '{':
+            parent = tokens[i - 2][1] if i >= 2 and tokens[i - 1][1] == ':' else None
+            objects.append((parent, {}))
+        elif value == '}' and objects:
+            parent, fields = objects.pop()
+            name = fields.get('name')
+            if (isinstance(name, str) and PAGE_NAME_RE.fullmatch(name) and
+                    PAGE_DEFINITION_KEYS.intersection(fields)):
+                actions = fields.get('availableActions')
+                if isinstance(actions, list):
+                    if pages.get(name, set()) is not None:
+                        pages.setdefault(name, set()).update(actions)
+                else:
+                    pages[name] = None
+            elif parent == 'availableActions' and isinstance(fields.get('default'), list):
+                default_actions = fields['default']
+        elif (value == ':' and objects and i >= 2 and i + 1 < len(tokens) and
+              tokens[i - 1][0] in ('name', 'str') and tokens[i - 2][1] in ('{', ',')):
+            # A key, not the ':' of a ternary: keep string and string-array values
+            field = True
+            if tokens[i + 1][0] == 'str':
+                field = tokens[i + 1][1]
+            elif tokens[i + 1][1] == '[':
+                args, _ = call_arguments(tokens, i + 1)
+                if all(len(arg) == 1 and arg[0][0] == 'str' for arg in args):
+                    field = [arg[0][1] for arg in args]
+            objects[-1][1][tokens[i - 1][1]] = field
+    return pages, default_actions
 
-    # File not found
-    if not os.path.exists(file_path):
-        stats['not_found'] += 1
-        return {
-            'status': '➖',
-            'notes': 'File not found',
-            'issues': '',
-            'plan': ''
-        }
 
-    # Read file content
+def build_page_catalog(base_dir: Path = BASE_DIR) -> Dict[str, FrozenSet[str]]:
+    """Map every page name defined in the PAGE_CATALOG_GLOBS seeds to its valid actions
+
+    Pages defined in several files get the union of their actions, and
+    pages that list none get the PAGE_SCHEMA default. Without a default, or
+    with 'all' among them, every action is accepted and the set is empty.
+    """
+    pages: Dict[str, Optional[Set[str]]] = {}
+    default_actions = None
+    for relative_path in page_catalog_sources(base_dir):
+        text = (base_dir / relative_path).read_bytes().decode('utf-8', errors='ignore')
+        found, default = parse_page_definitions(text)
+        if relative_path == PAGE_SCHEMA:
+            default_actions = default
+            continue
+        for name, actions in found.items():
+            if actions is None or pages.get(name, set()) is None:
+                pages[name] = None
+            else:
+                pages.setdefault(name, set()).update(actions)
+
+    catalog = {}
+    for name, actions in pages.items():
+        actions = set(default_actions or ()) if actions is None else actions
+        catalog[name] = frozenset() if not actions or PAGE_ACTION_ALL in actions else frozenset(actions)
+    return catalog
+
+
+def load_page_catalog(base_dir: Path = BASE_DIR, path: Optional[Path] = None) -> Dict[str, FrozenSet[str]]:
+    """The page catalog of base_dir, reused from path while its sources are
+    unchanged and saved there otherwise; built every time without a path"""
+    if path is None:
+        return build_page_catalog(base_dir)
+    fingerprint = page_catalog_fingerprint(base_dir)
     try:
-        with open(file_path, 'r', encoding='utf-8', errors='ignore') as f:
-            content = f.read()
-    except:
-        stats['not_found'] += 1
-        return {
-            'status': '➖',
-            'notes': 'Cannot read file',
-            'issues': '',
-            'plan': ''
-        }
+        with open(path, 'r', encoding='utf-8') as f:
+            data = json.load(f)
+        if data.get('fingerprint') == fingerprint and data.get('base_dir') == str(base_dir):
+            return {name: frozenset(actions) for name, actions in data['pages'].items()}
+    except (OSError, ValueError, KeyError):
+        pass
 
-    # Tests - no RBAC needed
-    if 'test' in path_lower or '__tests__' in path_lower or 'spec' in path_lower:
-        stats['not_needed'] += 1
-        return {
-            'status': '➖',
-            'notes': 'Test file - no RBAC needed',
-            'issues': '',
-            'plan': ''
-        }
+    catalog = build_page_catalog(base_dir)
+    tmp_path = path.with_name(path.name + '.tmp')
+    try:
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump({'fingerprint': fingerprint, 'base_dir': str(base_dir),
+                       'pages': {name: sorted(actions) for name, actions in sorted(catalog.items())}}, f)
+        os.replace(tmp_path, path)
+    except OSError:
+        pass
+    return catalog
 
-    # Seeds/scripts/migrations
-    if 'seed' in path_lower or 'script' in path_lower or 'migration' in path_lower:
-        stats['not_needed'] += 1
-        return {
-            'status': '➖',
-            'notes': 'Seed/migration script - no RBAC needed',
-            'issues': '',
-            'plan': ''
-        }
 
-    # Models - schema definitions
-    if 'models' in path_lower and ('.schema.js' in path_lower or '.model.js' in path_lower):
-        stats['not_needed'] += 1
-        return {
-            'status': '➖',
-            'notes': 'Schema definition - no RBAC needed',
-            'issues': '',
-            'plan': ''
-        }
+def page_access_problems(calls: Iterable[List[Optional[str]]],
+                         catalog: Dict[str, FrozenSet[str]]) -> List[str]:
+    """Unknown pages ('name') and actions ('name:action') among requirePageAccess() arguments
 
-    # Config files
-    if 'config' in path_lower:
-        stats['not_needed'] += 1
-        return {
-            'status': '➖',
-            'notes': 'Configuration file - no RBAC needed',
-            'issues': '',
-            'plan': ''
-        }
+    Arguments that are not string literals are None and cannot be checked.
+    """
+    problems = []
+    for args in calls:
+        if not args or args[0] is None:
+            continue
+        page = args[0]
+        action = args[1] if len(args) > 1 else PAGE_DEFAULT_ACTION
+        actions = catalog.get(page)
+        if actions is None:
+            problem = page
+        elif action is not None and actions and action not in actions:
+            problem = f"{page}:{action}"
+        else:
+            continue
+        if problem not in problems:
+            problems.append(problem)
+    return problems
 
-    # Check for RBAC patterns
-    has_require_page_access = 'requirePageAccess' in content
-    has_require_role = bool(re.search(r'requireRole\s*\(', content))
-    has_role_check = 'user.role' in content or 'req.user.role' in content or 'user?.role' in content
-    has_permission_check = 'hasPermission' in content or 'checkPermission' in content
-
-    # Controllers
-    if 'controller' in path_lower:
-        if has_require_page_access:
-            stats['compliant'] += 1
-            return {
-                'status': '✅',
-                'notes': 'Using requirePageAccess middleware',
-                'issues': '',
-                'plan': ''
-            }
-        if has_require_role:
-            stats['needs_migration'] += 1
-            return {
-                'status': '❌',
-                'notes': 'Using legacy requireRole middleware',
-                'issues': 'requireRole() should be replaced with requirePageAccess()',
-                'plan': 'Replace requireRole with requirePageAccess'
-            }
-        # Check if it's a socket controller
-        if 'socket' in path_lower:
-            if has_permission_check:
-                stats['compliant'] += 1
-                return {
-                    'status': '✅',
-                    'notes': 'Socket controller with permission checks',
-                    'issues': '',
-                    'plan': ''
-                }
-            stats['needs_migration'] += 1
-            return {
-                'status': '❌',
-                'notes': 'Socket controller without explicit permission checks',
-                'issues': 'Socket operations need permission validation',
-                'plan': 'Add permission checks to socket handlers'
-            }
-        stats['needs_migration'] += 1
-        return {
-            'status': '❌',
-            'notes': 'Controller without RBAC middleware',
-            'issues': 'Missing requirePageAccess or requireRole middleware',
-            'plan': 'Add requirePageAccess middleware to controller routes'
-        }
 
-    # Routes
-    if 'routes' in path_lower:
-        if has_require_page_access:
-            stats['compliant'] += 1
-            return {
-                'status': '✅',
-                'notes': 'Routes use requirePageAccess middleware',
-                'issues': '',
-                'plan': ''
-            }
-        if has_require_role:
-            stats['needs_migration'] += 1
-            return {
-                'status': '❌',
-                'notes': 'Routes use legacy requireRole middleware',
-                'issues': 'requireRole() should be replaced with requirePageAccess()',
-                'plan': 'Replace requireRole with requirePageAccess'
-            }
-        stats['needs_migration'] += 1
-        return {
-            'status': '❌',
-            'notes': 'Routes without RBAC middleware',
-            'issues': 'Missing requirePageAccess or requireRole middleware',
-            'plan': 'Add requirePageAccess middleware to routes'
-        }
+def unknown_page_verdict(problems: List[str]) -> Verdict:
+    """The ❌ result for requirePageAccess() calls naming pages or actions not in the catalog"""
+    return make_verdict('❌', UNKNOWN_PAGE_NOTES, f"Not in the RBAC pages catalog: {', '.join(problems)}",
+                        'Use a page name and action defined in the RBAC pages seed data')
 
-    # Services
-    if 'service' in path_lower:
-        if has_role_check:
-            stats['needs_migration'] += 1
-            return {
-                'status': '❌',
-                'notes': 'Service contains role-based logic',
-                'issues': 'Role checks should be in controller/middleware, not service',
-                'plan': 'Move permission checks to controller/middleware layer'
-            }
-        stats['not_needed'] += 1
-        return {
-            'status': '➖',
-            'notes': 'Service file - business logic only',
-            'issues': '',
-            'plan': ''
-        }
 
-    # Middleware
-    if 'middleware' in path_lower:
-        if 'auth.js' in relative_path:
-            stats['partial'] += 1
-            return {
-                'status': '🔄',
-                'notes': 'Auth middleware exports requireRole for backward compatibility',
-                'issues': 'Still exports requireRole function',
-                'plan': 'Keep for backward compatibility, use requirePageAccess in new code'
-            }
-        if 'pageaccess.js' in relative_path or 'pageAccess.js' in relative_path:
-            stats['compliant'] += 1
-            return {
-                'status': '✅',
-                'notes': 'Page access middleware - core RBAC component',
-                'issues': '',
-                'plan': ''
-            }
-        stats['not_needed'] += 1
-        return {
-            'status': '➖',
-            'notes': 'Middleware file (not auth-related)',
-            'issues': '',
-            'plan': ''
-        }
+def parse_routes(text: str, tokens: Optional[List[Tuple[str, str, int]]] = None) -> List[dict]:
+    """Find every router.<method>(path, ...middlewares, handler) in route source
 
-    # Default for other backend files
-    stats['not_needed'] += 1
-    return {
-        'status': '➖',
-        'notes': 'Backend utility/file',
-        'issues': '',
-        'plan': ''
-    }
+    Guards passed to a path-less ``router.use()`` apply to the endpoints
+    declared after it. The handler (last argument) is not searched, so a
+    requireRole() call inside an inline handler does not count as a guard.
+    ``names`` holds every name the middlewares and handler refer to.
+    """
+    if tokens is None:
+        tokens = tokenize_js(text)
+    matches = match_brackets(tokens)
+    endpoints = []
+    router_guards = {name: [] for name in ROUTE_GUARDS}
+    line, offset = 1, 0
+    i = 0
+    while i < len(tokens) - 3:
+        kind, value, _ = tokens[i]
+        if not (kind == 'name' and value == 'router' and tokens[i + 1][1] == '.' and
+                tokens[i + 2][0] == 'name' and tokens[i + 3][1] == '(' and
+                (tokens[i + 2][1] in ROUTE_METHODS or tokens[i + 2][1] == 'use') and
+                (i == 0 or tokens[i - 1][1] != '.')):
+            i += 1
+            continue
 
+        method = tokens[i + 2][1]
+        spans, end = argument_spans(tokens, matches, i + 3)
+        if method == 'use':
+            if spans and tokens[spans[0][0]][0] not in ('str', 'tmpl'):
+                for name, calls in route_guards(tokens, matches, spans[0][0], end).items():
+                    router_guards[name].extend(calls)
+        elif spans:
+            path_tokens = tokens[slice(*spans[0])]
+            if len(path_tokens) == 1 and path_tokens[0][0] in ('str', 'tmpl'):
+                route = path_tokens[0][1]
+            else:
+                route = text[path_tokens[0][2]:path_tokens[-1][2] + len(path_tokens[-1][1])]
 
-def analyze_react_file(file_path: str, relative_path: str) -> Dict[str, str]:
-    """Analyze a React file for RBAC compliance"""
-    path_lower = file_path.lower()
+            # Line numbers are counted incrementally, keeping the pass linear
+            start = tokens[i][2]
+            line += text.count('\n', offset, start)
+            offset = start
 
-    # File not found
-    if not os.path.exists(file_path):
-        stats['not_found'] += 1
-        return {
-            'status': '➖',
-            'notes': 'File not found',
-            'issues': '',
-            'plan': ''
-        }
+            # The middlewares: every argument between the path and the handler
+            guards = route_guards(tokens, matches, spans[1][0], spans[-1][0]) if len(spans) > 2 else \
+                {name: [] for name in ROUTE_GUARDS}
+            source = 'route'
+            if not any(guards.values()) and any(router_guards.values()):
+                guards, source = router_guards, 'router.use'
+            names = {value for kind, value, _ in tokens[spans[1][0] if len(spans) > 1 else end:end]
+                     if kind == 'name'}
+            endpoints.append({'line': line, 'method': method.upper(), 'route': route,
+                              'guards': guards, 'source': source, 'names': names})
+        i = end + 1
+    return endpoints
 
-    # Read file content
-    try:
-        with open(file_path, 'r', encoding='utf-8', errors='ignore') as f:
-            content = f.read()
-    except:
-        stats['not_found'] += 1
-        return {
-            'status': '➖',
-            'notes': 'Cannot read file',
-            'issues': '',
-            'plan': ''
-        }
 
-    # Auth pages - public
-    auth_patterns = ['auth', 'login', 'register', 'forgotpassword', 'resetpassword',
-                     'emailverification', 'twostep', 'lockscreen']
-    if any(pattern in path_lower for pattern in auth_patterns):
-        stats['not_needed'] += 1
-        return {
-            'status': '➖',
-            'notes': 'Auth/public page - no RBAC needed',
-            'issues': '',
-            'plan': ''
-        }
+def endpoint_result(guards: Dict[str, List[List[Optional[str]]]], source: str,
+                    catalog: Optional[Dict[str, FrozenSet[str]]] = None) -> Dict[str, str]:
+    """Classify one endpoint by the guards protecting it, checking page names against catalog"""
+    if guards['requirePageAccess'] and guards['requireRole']:
+        result = {'status': '🔄', 'notes': 'Endpoint mixes requirePageAccess and legacy requireRole',
+                  'issues': 'requireRole() is redundant next to requirePageAccess()',
+                  'plan': 'Remove requireRole from the route'}
+    elif guards['requirePageAccess']:
+        problems = page_access_problems(guards['requirePageAccess'], catalog) if catalog is not None else []
+        if problems:
+            result = unknown_page_verdict(problems)._asdict()
+        else:
+            result = {'status': '✅', 'notes': 'Endpoint uses requirePageAccess middleware',
+                      'issues': '', 'plan': ''}
+    elif guards['requireRole']:
+        result = {'status': '❌', 'notes': 'Endpoint uses legacy requireRole middleware',
+                  'issues': 'requireRole() should be replaced with requirePageAccess()',
+                  'plan': 'Replace requireRole with requirePageAccess'}
+    else:
+        result = {'status': '❌', 'notes': 'Endpoint without RBAC middleware',
+                  'issues': 'Missing requirePageAccess or requireRole middleware',
+                  'plan': 'Add requirePageAccess middleware to the route'}
+    if source == 'router.use':
+        result['notes'] += ' (via router.use)'
+    return result
 
-    # UI Interface - demo pages
-    if 'uiinterface' in path_lower or 'ui-interface' in path_lower:
-        stats['not_needed'] += 1
-        return {
-            'status': '➖',
-            'notes': 'UI Interface demo page - no RBAC needed',
-            'issues': '',
-            'plan': ''
-        }
 
-    # Data files
-    if 'data/json' in path_lower:
-        if 'sidebarmenu.jsx' in relative_path:
-            stats['needs_migration'] += 1
-            return {
-                'status': '❌',
-                'notes': 'Hardcoded role-based sidebar menu filtering',
-                'issues': 'Uses switch statement with hardcoded roles (superadmin, hr, admin, etc.)',
-                'plan': 'Replace with permission-based filtering using PermissionContext'
-            }
-        if 'horizontalsidebar.tsx' in relative_path:
-            stats['needs_migration'] += 1
-            return {
-                'status': '❌',
-                'notes': 'Hardcoded role-based horizontal menu filtering',
-                'issues': 'Uses roles: [] arrays with hardcoded role values',
-                'plan': 'Replace with permission-based filtering'
-            }
-        if 'all_routes.tsx' in relative_path or 'router' in path_lower:
-            stats['not_needed'] += 1
-            return {
-                'status': '➖',
-                'notes': 'Route definitions file - no RBAC needed',
-                'issues': '',
-                'plan': ''
-            }
-        stats['not_needed'] += 1
-        return {
-            'status': '➖',
-            'notes': 'Static data file',
-            'issues': '',
-            'plan': ''
-        }
+def route_files() -> List[Path]:
+    """Express route modules the endpoint analysis covers"""
+    files = set()
+    for pattern in ROUTE_FILE_GLOBS:
+        files.update(BASE_DIR.glob(pattern))
+    return sorted(files)
 
-    # Router files
-    if 'router' in path_lower:
-        if 'withrolecheck.jsx' in relative_path:
-            stats['needs_migration'] += 1
-            return {
-                'status': '❌',
-                'notes': 'Legacy role-based route protection HOC',
-                'issues': 'withRoleCheck uses hardcoded roles instead of permissions',
-                'plan': 'Replace with PageAccessGuard or usePageAccess hook'
-            }
-        stats['not_needed'] += 1
-        return {
-            'status': '➖',
-            'notes': 'Router configuration/utility file',
-            'issues': '',
-            'plan': ''
-        }
 
-    # Modals
-    if 'modal' in path_lower:
-        has_permission_check = ('PermissionButton' in content or
-                                'usePageAccess' in content or
-                                'can(' in content or
-                                'hasPermission(' in content)
-        has_unprotected_button = bool(re.search(r'<Button[^>]*>(Edit|Delete|Add|Create|Save|Update|Remove|Submit)', content, re.IGNORECASE))
-        has_action_buttons = has_unprotected_button or ('onClick' in content and ('delete' in content.lower() or 'edit' in content.lower()))
-
-        if has_permission_check:
-            stats['compliant'] += 1
-            return {
-                'status': '✅',
-                'notes': 'Modal uses permission-based controls',
-                'issues': '',
-                'plan': ''
-            }
-        if has_action_buttons:
-            stats['needs_migration'] += 1
-            return {
-                'status': '❌',
-                'notes': 'Modal has action buttons without permission checks',
-                'issues': 'Edit/Delete/Create buttons need PermissionButton wrapper',
-                'plan': 'Wrap action buttons with PermissionButton component'
-            }
-        stats['partial'] += 1
-        return {
-            'status': '🔄',
-            'notes': 'Modal file - needs manual review for action buttons',
-            'issues': '',
-            'plan': 'Review for action button permissions'
-        }
+def analyze_endpoints(path: Path = ENDPOINTS_CSV_OUTPUT):
+    """Write one CSV row per Express endpoint with the RBAC guard protecting it"""
+    start = time.perf_counter()
+    counts = Counter()
+    catalog = default_analyzer.page_catalog
+    files = route_files()
+    with open(path, 'w', encoding='utf-8', newline='') as f:
+        csv.writer(f, lineterminator='\n').writerow(ENDPOINTS_CSV_HEADER)
+        writer = csv.writer(f, quoting=csv.QUOTE_ALL, lineterminator='\n')
+        for file_path in files:
+            relative_path = file_path.relative_to(BASE_DIR).as_posix()
+            text = file_path.read_bytes().decode('utf-8', errors='ignore')
+            for endpoint in parse_routes(text):
+                guards = endpoint['guards']
+                names = [name for name in ROUTE_GUARDS if guards[name]]
+                result = endpoint_result(guards, endpoint['source'], catalog)
+                counts[result['status']] += 1
+                writer.writerow((relative_path, endpoint['line'], endpoint['method'], endpoint['route'],
+                                 '+'.join(names) or 'none',
+                                 '; '.join(', '.join(filter(None, args)) for args in guards['requirePageAccess']),
+                                 '|'.join(role for args in guards['requireRole'] for role in args if role),
+                                 result['status'], result['notes'], result['issues'], result['plan']))
+    elapsed = (time.perf_counter() - start) * 1000
 
-    # Hooks
-    if 'hooks' in path_lower:
-        if 'usepageaccess' in relative_path or 'useauth' in relative_path:
-            stats['compliant'] += 1
-            return {
-                'status': '✅',
-                'notes': 'Core permission/authorization hook',
-                'issues': '',
-                'plan': ''
-            }
-        if 'dashboardrolefilter' in relative_path:
-            stats['needs_migration'] += 1
-            return {
-                'status': '❌',
-                'notes': 'Hook contains role-based filtering logic',
-                'issues': 'Hardcoded role filtering',
-                'plan': 'Replace with permission-based filtering'
-            }
-        stats['not_needed'] += 1
-        return {
-            'status': '➖',
-            'notes': 'Utility hook - no RBAC needed',
-            'issues': '',
-            'plan': ''
-        }
+    print(f"Endpoints: {sum(counts.values())} in {len(files)} route files ({elapsed:.0f} ms)")
+    print(f"✅ requirePageAccess: {counts['✅']}")
+    print(f"🔄 Mixed guards: {counts['🔄']}")
+    print(f"❌ requireRole, unguarded or unknown page: {counts['❌']}")
+    print(f"Endpoint Report: {path}")
 
-    # Services
-    if 'services' in path_lower:
-        stats['not_needed'] += 1
-        return {
-            'status': '➖',
-            'notes': 'API service layer - no RBAC needed',
-            'issues': '',
-            'plan': ''
-        }
 
-    # Feature modules
-    if 'feature-module' in path_lower:
-        has_permission_check = ('PermissionButton' in content or
-                                'usePageAccess' in content or
-                                'PageAccessGuard' in content or
-                                'can(' in content or
-                                'hasPermission(' in content)
-        has_with_role_check = 'withRoleCheck' in content
-        has_role_comparison = ('user?.role ===' in content or
-                              'user.role ===' in content or
-                              'publicMetadata?.role ===' in content)
-        has_unprotected_button = bool(re.search(r'<Button[^>]*>(Edit|Delete|Add|Create|Save|Update|Remove)', content, re.IGNORECASE))
-        has_hardcoded_roles = ('allowedRoles:' in content or
-                              "['admin'," in content or
-                              "['hr'," in content)
-
-        if has_permission_check and not has_with_role_check and not has_role_comparison and not has_hardcoded_roles:
-            stats['compliant'] += 1
-            return {
-                'status': '✅',
-                'notes': 'Uses permission-based access control',
-                'issues': '',
-                'plan': ''
-            }
-        if has_with_role_check:
-            stats['needs_migration'] += 1
-            return {
-                'status': '❌',
-                'notes': 'Uses legacy withRoleCheck HOC',
-                'issues': 'withRoleCheck should be replaced with PageAccessGuard',
-                'plan': 'Replace withRoleCheck HOC with PageAccessGuard or usePageAccess hook'
-            }
-        if has_role_comparison or has_hardcoded_roles:
-            stats['needs_migration'] += 1
-            return {
-                'status': '❌',
-                'notes': 'Contains hardcoded role comparisons',
-                'issues': 'user?.role === or allowedRoles array found',
-                'plan': 'Replace with permission checks using usePageAccess hook'
-            }
-        if has_unprotected_button:
-            stats['partial'] += 1
-            return {
-                'status': '🔄',
-                'notes': 'May have unprotected action buttons',
-                'issues': 'Potential unprotected buttons',
-                'plan': 'Review and wrap with PermissionButton'
-            }
-        stats['partial'] += 1
-        return {
-            'status': '🔄',
-            'notes': 'Feature module - needs manual review for RBAC',
-            'issues': '',
-            'plan': 'Review for permission-based access controls'
-        }
+def import_bindings(tokens: List[Tuple[str, str, int]]) -> Dict[str, str]:
+    """Local names bound by import declarations and require() initializers, with their specifiers
 
-    # Core components
-    if 'core/components' in path_lower:
-        if ('rolebasedrenderer' in relative_path or
-            'permissionfield' in relative_path or
-            'roledebugger' in relative_path):
-            stats['compliant'] += 1
-            return {
-                'status': '✅',
-                'notes': 'Permission-related component',
-                'issues': '',
-                'plan': ''
-            }
-        stats['not_needed'] += 1
-        return {
-            'status': '➖',
-            'notes': 'UI component - no RBAC needed',
-            'issues': '',
-            'plan': ''
-        }
+    One pass: an import declaration is read up to its ``from 'specifier'``
+    or the end of the statement, whichever comes first, and the scan goes
+    on from there.
+    """
+    bindings = {}
+    matches = None
+    i = 0
+    while i < len(tokens) - 2:
+        kind, value, _ = tokens[i]
+        if kind != 'name' or i and tokens[i - 1][1] == '.':
+            i += 1
+            continue
+        if value == 'import' and tokens[i + 1][1] != '(':
+            names = []
+            j = i + 1
+            while j < len(tokens) - 1 and tokens[j][1] != 'from' and tokens[j][0] != 'str':
+                if tokens[j][1] == ';' or tokens[j][0] == 'name' and tokens[j][1] in ('import', 'export'):
+                    break
+                if tokens[j][0] == 'name' and tokens[j + 1][1] in (',', '}', 'from'):
+                    names.append(tokens[j][1])
+                j += 1
+            if j + 1 < len(tokens) and tokens[j][1] == 'from' and tokens[j + 1][0] == 'str':
+                bindings.update(dict.fromkeys(names, tokens[j + 1][1]))
+            i = max(j, i + 1)
+            continue
+        if value == 'require' and tokens[i + 1][1] == '(' and tokens[i + 2][0] == 'str' and i >= 2 and \
+                tokens[i - 1][1] == '=':
+            if tokens[i - 2][0] == 'name':
+                bindings[tokens[i - 2][1]] = tokens[i + 2][1]
+            elif tokens[i - 2][1] == '}':
+                # const { a, b: c } = require(...) binds a and c
+                if matches is None:
+                    matches = match_brackets(tokens)
+                for j in range(matches[i - 2] + 1 if matches[i - 2] >= 0 else i - 2, i - 2):
+                    if tokens[j][0] == 'name' and tokens[j + 1][1] in (',', '}'):
+                        bindings[tokens[j][1]] = tokens[i + 2][1]
+        i += 1
+    return bindings
 
-    # Common components
-    if 'core/common' in path_lower:
-        stats['not_needed'] += 1
-        return {
-            'status': '➖',
-            'notes': 'Common UI component - no RBAC needed',
-            'issues': '',
-            'plan': ''
-        }
 
-    # Utils
-    if 'utils' in path_lower:
-        stats['not_needed'] += 1
-        return {
-            'status': '➖',
-            'notes': 'Utility function - no RBAC needed',
-            'issues': '',
-            'plan': ''
-        }
+def endpoint_guard_level(guards: Dict[str, List[List[Optional[str]]]]) -> int:
+    """The import guard level an endpoint's guards give the modules it reaches"""
+    if guards['requirePageAccess']:
+        return IMPORT_PAGE_GUARD
+    if guards['requireRole']:
+        return IMPORT_LEGACY_GUARD
+    return IMPORT_UNGUARDED
 
-    # Types
-    if 'types' in path_lower:
-        stats['not_needed'] += 1
-        return {
-            'status': '➖',
-            'notes': 'Type definition file - no RBAC needed',
-            'issues': '',
-            'plan': ''
-        }
 
-    # Contexts
-    if 'contexts' in path_lower:
-        if 'permission' in relative_path.lower():
-            stats['compliant'] += 1
-            return {
-                'status': '✅',
-                'notes': 'Permission context provider',
-                'issues': '',
-                'plan': ''
-            }
-        stats['not_needed'] += 1
-        return {
-            'status': '➖',
-            'notes': 'Context provider - no RBAC needed',
-            'issues': '',
-            'plan': ''
-        }
+def import_levels(content: bytes) -> Dict[str, int]:
+    """Each relative specifier a module imports, with the guard level of the import
 
-    # Config
-    if 'config' in path_lower:
-        stats['not_needed'] += 1
-        return {
-            'status': '➖',
-            'notes': 'Configuration file - no RBAC needed',
-            'issues': '',
-            'plan': ''
-        }
+    In a route module an import reached by endpoints gets the lowest level
+    among them, and one no endpoint refers to the lowest of the module.
+    """
+    level = IMPORT_PAGE_GUARD if IMPORT_GUARD_RE.search(content) else IMPORT_UNGUARDED
+    levels = dict.fromkeys(sorted({specifier.decode('utf-8', errors='ignore')
+                                   for specifier in IMPORT_SPECIFIER_RE.findall(content)}), level)
+    if not levels or b'router.' not in content:
+        return levels
+    text = content.decode('utf-8', errors='ignore')
+    tokens = tokenize_js(text)
+    endpoints = parse_routes(text, tokens)
+    if not endpoints:
+        return levels
 
-    # Default
-    stats['partial'] += 1
-    return {
-        'status': '🔄',
-        'notes': 'React file - needs manual review',
-        'issues': '',
-        'plan': 'Review for RBAC compliance'
-    }
+    bindings = import_bindings(tokens)
+    reached: Dict[str, int] = {}
+    for endpoint in endpoints:
+        level = endpoint_guard_level(endpoint['guards'])
+        for name in endpoint['names']:
+            specifier = bindings.get(name)
+            if specifier in levels:
+                reached[specifier] = min(reached.get(specifier, level), level)
+    lowest = min(endpoint_guard_level(endpoint['guards']) for endpoint in endpoints)
+    return {specifier: reached.get(specifier, lowest) for specifier in levels}
 
 
-def analyze_file(line: str) -> Tuple[str, str, str, str, str]:
-    """Analyze a single file line and return CSV row"""
-    # Parse the line - format is "123→filepath"
-    match = re.match(r'\s*\d+→(.+)', line)
-    if not match:
-        return None
+class ImportGraph:
+    """Module dependency graph of backend/ and the controllers it guards
 
-    relative_path = match.group(1).strip().replace('\\', '/')
-    if not relative_path:
-        return None
+    ``modules`` maps each module to [size, mtime_ns, levels], where levels
+    maps each relative specifier it imports to the guard level of that
+    import (see import_levels()). refresh() only rereads modules whose size
+    or mtime changed, so the graph kept at ``path`` answers queries without
+    reading the tree; a graph without a path is never saved. ``directories``
+    holds the stamp() of every directory walked: while those and the
+    modules' stats match, nothing was added, removed or edited, and neither
+    the walk nor the protected sets (saved with the graph) are redone.
+    Specifiers are resolved on demand and memoized per (directory,
+    specifier) until a module is added or removed.
+    """
 
-    # Get full path
-    base_dir = Path(__file__).parent.parent.parent.parent.parent
-    full_path = base_dir / relative_path
+    def __init__(self, base_dir: Path = BASE_DIR, path: Optional[Path] = None):
+        self.base_dir = Path(base_dir)
+        self.path = path
+        self.modules: Dict[str, list] = {}
+        self.directories: Dict[str, list] = {}
+        self.resolved: Dict[Tuple[str, str], Optional[str]] = {}
+        self.dirty = False
+        self._importers: Optional[Dict[str, List[str]]] = None
+        self._protected: Dict[int, FrozenSet[str]] = {}
 
-    # Determine file type and analyze
-    if relative_path.startswith('backend'):
-        analysis = analyze_backend_file(str(full_path), relative_path)
-    elif relative_path.startswith('react'):
-        analysis = analyze_react_file(str(full_path), relative_path)
-    else:
-        stats['not_needed'] += 1
-        analysis = {
-            'status': '➖',
-            'notes': 'Unknown file type',
-            'issues': '',
-            'plan': ''
-        }
+    @staticmethod
+    def parser_key() -> List[str]:
+        """Patterns the stored modules were parsed with; the cache is dropped when they change"""
+        return [IMPORT_SPECIFIER_RE.pattern.decode('ascii'), IMPORT_GUARD_RE.pattern.decode('ascii'),
+                *ROUTE_GUARDS]
 
-    return (
-        escape_csv(relative_path),
-        escape_csv(analysis['status']),
-        escape_csv(analysis['notes']),
-        escape_csv(analysis['issues']),
-        escape_csv(analysis['plan'])
-    )
+    @classmethod
+    def load(cls, base_dir: Path, path: Path) -> 'ImportGraph':
+        """The graph saved at path by a previous run, or an empty one saved there"""
+        graph = cls(base_dir, path)
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+            if data.get('base_dir') == str(graph.base_dir) and data.get('parser') == cls.parser_key():
+                graph.modules = data['modules']
+                graph.directories = data['directories']
+                graph._protected = {int(level): frozenset(protected)
+                                    for level, protected in data['protected'].items()}
+        except (OSError, ValueError, KeyError):
+            pass
+        return graph
 
+    def save(self):
+        tmp_path = self.path.with_name(self.path.name + '.tmp')
+        try:
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump({'base_dir': str(self.base_dir), 'parser': self.parser_key(), 'modules': self.modules,
+                           'directories': self.directories,
+                           'protected': {level: sorted(protected) for level, protected in self._protected.items()}},
+                          f, separators=(',', ':'))
+            os.replace(tmp_path, self.path)
+            self.dirty = False
+        except OSError:
+            pass
 
-def main():
-    """Main analysis function"""
-    print("RBAC Compliance File Analyzer")
-    print("=" * 50)
+    def stamp(self, relative_dir: str) -> List[Optional[int]]:
+        """mtime_ns of a directory, which changes when an entry is added, removed
+        or renamed, and of its .gitignore (None without one)"""
+        directory = self.base_dir / relative_dir
+        try:
+            ignore_mtime = os.stat(directory / '.gitignore').st_mtime_ns
+        except OSError:
+            ignore_mtime = None
+        return [os.stat(directory).st_mtime_ns, ignore_mtime]
 
-    # Read file list
-    if not FILES_TXT.exists():
-        print(f"Error: files.txt not found at {FILES_TXT}")
-        return
+    def unchanged(self) -> bool:
+        """True when no walked directory or module changed since the last refresh - stat calls only"""
+        if not self.directories:
+            return False
+        try:
+            for relative_dir, stamp in self.directories.items():
+                if self.stamp(relative_dir) != stamp:
+                    return False
+            for relative_path, entry in self.modules.items():
+                st = os.stat(self.base_dir / relative_path)
+                if entry[0] != st.st_size or entry[1] != st.st_mtime_ns:
+                    return False
+        except OSError:
+            return False
+        return True
 
-    with open(FILES_TXT, 'r', encoding='utf-8') as f:
-        lines = f.readlines()
+    def refresh(self) -> bool:
+        """Reparse added and modified modules and drop deleted ones
 
-    print(f"Found {len(lines)} files to analyze")
-    print()
+        Returns True when an edge or guard changed, not merely an mtime.
+        """
+        if self.unchanged():
+            return False
+        changed = False
+        found = set()
+        walked = []
+        for relative_path in discover_files((IMPORT_GRAPH_ROOT,), walked, self.base_dir):
+            file_path = self.base_dir / relative_path
+            try:
+                st = os.stat(file_path)
+                entry = self.modules.get(relative_path)
+                if entry and entry[0] == st.st_size and entry[1] == st.st_mtime_ns:
+                    found.add(relative_path)
+                    continue
+                content = file_path.read_bytes()
+            except OSError:
+                continue
+            found.add(relative_path)
+            levels = import_levels(content)
+            if entry is None:
+                self.resolved.clear()
+            if entry is None or entry[2] != levels:
+                changed = True
+            self.modules[relative_path] = [st.st_size, st.st_mtime_ns, levels]
+            self.dirty = True
+
+        removed = self.modules.keys() - found
+        for relative_path in removed:
+            del self.modules[relative_path]
+        if removed:
+            self.resolved.clear()
+            changed = self.dirty = True
+        if changed:
+            self._importers = None
+            self._protected = {}
+
+        directories = {'': self.stamp('')}
+        for relative_dir in walked:
+            try:
+                directories[relative_dir] = self.stamp(relative_dir)
+            except OSError:
+                pass
+        if directories != self.directories:
+            self.directories = directories
+            self.dirty = True
+        return changed
+
+    def update(self) -> Set[str]:
+        """Refresh the graph, save it with its protected sets if anything
+        changed and return the modules whose protection changed"""
+        before = self._protected
+        changed = self.refresh()
+        if self.path is not None and (self.dirty or len(self._protected) < 2):
+            self.protected_at(IMPORT_LEGACY_GUARD)
+            self.protected_at(IMPORT_PAGE_GUARD)
+            self.save()
+        if not changed:
+            return set()
+        return {module for level, protected in before.items() for module in protected ^ self.protected_at(level)}
+
+    def resolve(self, importer: str, specifier: str) -> Optional[str]:
+        """The module a relative specifier in importer names, or None outside the graph"""
+        directory = posixpath.dirname(importer)
+        key = (directory, specifier)
+        try:
+            return self.resolved[key]
+        except KeyError:
+            pass
+        target = posixpath.normpath(posixpath.join(directory, specifier))
+        resolved = next((target + suffix for suffix in IMPORT_RESOLVE_SUFFIXES if target + suffix in self.modules),
+                        None)
+        self.resolved[key] = resolved
+        return resolved
+
+    @staticmethod
+    def ignored(module: str) -> bool:
+        return any(part in module.lower() for part in IMPORT_IGNORED_PARTS)
+
+    def imports(self, module: str) -> Dict[str, int]:
+        """Modules in the graph that module imports, each with its lowest import guard level"""
+        imports: Dict[str, int] = {}
+        for specifier, level in self.modules[module][2].items():
+            dependency = self.resolve(module, specifier)
+            if dependency is not None:
+                imports[dependency] = min(imports.get(dependency, level), level)
+        return imports
+
+    @property
+    def importers(self) -> Dict[str, List[str]]:
+        """Each module's direct importers, leaving out test, seed and script modules"""
+        if self._importers is None:
+            importers = {module: [] for module in self.modules}
+            for module in self.modules:
+                if not self.ignored(module):
+                    for dependency in self.imports(module):
+                        importers[dependency].append(module)
+            self._importers = importers
+        return self._importers
+
+    def protected_at(self, level: int) -> FrozenSet[str]:
+        """Modules whose every import is guarded at level or better, or comes
+        from a module that is protected itself
+
+        Computed from the guards outwards, each edge visited once; modules
+        reached only through an import cycle stay unprotected.
+        """
+        if level not in self._protected:
+            importers = self.importers
+            imports = {module: self.imports(module) for module in self.modules}
+            unguarded = {module: sum(imports[importer][module] < level for importer in found)
+                         for module, found in importers.items()}
+            pending = [module for module, count in unguarded.items() if importers[module] and not count]
+            protected = set()
+            while pending:
+                module = pending.pop()
+                protected.add(module)
+                if self.ignored(module):
+                    continue
+                for dependency, guard in imports[module].items():
+                    if guard < level:
+                        unguarded[dependency] -= 1
+                        if not unguarded[dependency]:
+                            pending.append(dependency)
+            self._protected[level] = frozenset(protected)
+        return self._protected[level]
+
+    @property
+    def protected(self) -> FrozenSet[str]:
+        """Modules only reachable through requirePageAccess or permission checks"""
+        return self.protected_at(IMPORT_PAGE_GUARD)
+
+    def guard_level(self, module: str) -> int:
+        """The best level every import path into module is guarded at"""
+        if module in self.protected:
+            return IMPORT_PAGE_GUARD
+        if module in self.protected_at(IMPORT_LEGACY_GUARD):
+            return IMPORT_LEGACY_GUARD
+        return IMPORT_UNGUARDED
+
+    def fingerprint(self) -> str:
+        digest = hashlib.sha1('\n'.join(sorted(self.protected)).encode('utf-8'))
+        digest.update(b'\0' + '\n'.join(sorted(self.protected_at(IMPORT_LEGACY_GUARD))).encode('utf-8'))
+        return digest.hexdigest()
+
+    def reachable_from(self, module: str) -> List[Tuple[int, str, int]]:
+        """Every module importing module directly or indirectly, with its
+        distance and the guard level of its import on the way"""
+        importers = self.importers
+        distances = {module: (0, IMPORT_UNGUARDED)}
+        frontier = deque([module])
+        while frontier:
+            current = frontier.popleft()
+            for importer in importers[current]:
+                if importer not in distances:
+                    distances[importer] = (distances[current][0] + 1, self.imports(importer)[current])
+                    frontier.append(importer)
+        del distances[module]
+        return sorted((distance, importer, level) for importer, (distance, level) in distances.items())
+
+
+def print_importers(paths: List[str]):
+    """Show whether each module is guarded through its importers, and what imports it"""
+    start = time.perf_counter()
+    graph = default_analyzer.import_graph
+    protected = graph.protected
+    legacy = graph.protected_at(IMPORT_LEGACY_GUARD) - protected
+    print(f"Import graph: {len(graph.modules)} modules under {IMPORT_GRAPH_ROOT}/, "
+          f"{len(protected)} guarded through their importers, {len(legacy)} only by requireRole "
+          f"({(time.perf_counter() - start) * 1000:.0f} ms)")
+    for path in paths:
+        relative_path = AnalysisDaemon.relative_path(path)
+        print()
+        if relative_path not in graph.modules:
+            print(f"{path}: not a module under {IMPORT_GRAPH_ROOT}/")
+            continue
+        print(f"{relative_path}: {IMPORT_GUARD_NAMES[graph.guard_level(relative_path)]} by its importers")
+        for distance, importer, level in graph.reachable_from(relative_path):
+            marks = f" ({IMPORT_GUARD_MARKS[level]})" if level else ''
+            print(f"  {distance:>3}  {importer}{marks}")
+
+
+def match_brackets(tokens: List[Tuple[str, str, int]]) -> List[int]:
+    """Index of the bracket matching each bracket token, -1 for other tokens and unmatched brackets"""
+    matches = [-1] * len(tokens)
+    stack = []
+    for i, (kind, value, _) in enumerate(tokens):
+        if kind != 'punct':
+            continue
+        if value in '([{':
+            stack.append(i)
+        elif value in ')]}' and stack:
+            opening = stack.pop()
+            matches[opening] = i
+            matches[i] = opening
+    return matches
+
+
+def argument_spans(tokens: List[Tuple[str, str, int]], matches: List[int], start: int
+                   ) -> Tuple[List[Tuple[int, int]], int]:
+    """Token ranges of the arguments of the call whose '(' is tokens[start]
+
+    Nested brackets are jumped over with the match_brackets() table, so
+    only the call's own tokens are visited. Returns the spans and the index
+    of the closing ')', len(tokens) when the call is never closed.
+    """
+    end = matches[start] if matches[start] > start else len(tokens)
+    spans = []
+    first = i = start + 1
+    while i < end:
+        kind, value, _ = tokens[i]
+        if kind == 'punct':
+            if value in '([{' and matches[i] > i:
+                i = matches[i]
+            elif value == ',':
+                spans.append((first, i))
+                first = i + 1
+        i += 1
+    if first < end:
+        spans.append((first, end))
+    return spans, end
+
+
+def statement_end(tokens: List[Tuple[str, str, int]], matches: List[int], i: int) -> int:
+    """Index just past the expression starting at tokens[i], jumping over brackets"""
+    while i < len(tokens):
+        kind, value, _ = tokens[i]
+        if kind == 'punct':
+            if value in '([{' and matches[i] > i:
+                i = matches[i]
+            elif value in ';,)]}':
+                return i
+        elif kind == 'name' and value in JS_DECLARATION_KEYWORDS:
+            return i
+        i += 1
+    return i
+
+
+def js_definitions(tokens: List[Tuple[str, str, int]], matches: List[int]
+                   ) -> Tuple[Dict[str, Tuple[int, int]], List[Tuple[int, int, str]]]:
+    """Token spans of the functions, methods, classes and variables defined in tokens
+
+    Only definitions at the top level or one block down (a controller
+    function's body, a class body) are kept, so locals of individual
+    handlers never shadow them. Returns them by name, the first one
+    winning, and the top-level ones in order as (start, end, name).
+    """
+    definitions = {}
+    top_level = []
+    depth = 0
+    for i, (kind, value, _) in enumerate(tokens):
+        if kind == 'punct':
+            if value == '{':
+                depth += 1
+            elif value == '}':
+                depth -= 1
+            continue
+        if kind != 'name' or depth > 1 or i + 2 >= len(tokens):
+            continue
+        span = None
+        if value in ('const', 'let', 'var') and tokens[i + 1][0] == 'name' and tokens[i + 2][1] == '=':
+            name = tokens[i + 1][1]
+            span = (i + 3, statement_end(tokens, matches, i + 3))
+        elif value == 'class' and tokens[i + 1][0] == 'name':
+            name = tokens[i + 1][1]
+            body = next((j for j in range(i + 2, min(i + 8, len(tokens))) if tokens[j][1] == '{'), None)
+            if body is not None and matches[body] > body:
+                span = (body, matches[body])
+        elif (value not in JS_CONTROL_KEYWORDS and tokens[i + 1][1] == '(' and
+              (i == 0 or tokens[i - 1][1] != '.')):
+            # name(...) { ... } - a function declaration or a method
+            close = matches[i + 1]
+            if 0 < close < len(tokens) - 1 and tokens[close + 1][1] == '{' and matches[close + 1] > close:
+                name = value
+                span = (close + 1, matches[close + 1])
+        if span is not None:
+            definitions.setdefault(name, span)
+            if depth == 0:
+                top_level.append((span[0], span[1], name))
+    return definitions, top_level
+
+
+def socket_event_roles(graph: ImportGraph) -> Dict[str, Set[str]]:
+    """Roles each module's events are bound for, from the case labels around
+    the router's calls; modules the entry point reaches otherwise get 'all'"""
+    tokens = tokenize_js((graph.base_dir / SOCKET_ROUTER).read_bytes().decode('utf-8', errors='ignore'))
+    bindings = {}
+    for name, specifier in import_bindings(tokens).items():
+        module = graph.resolve(SOCKET_ROUTER, specifier)
+        if module is not None:
+            bindings[name] = module
+
+    bound: Dict[str, Set[str]] = {}
+    roles = []
+    for i, (kind, value, _) in enumerate(tokens[:-1]):
+        if kind != 'name':
+            continue
+        if value == 'case' and tokens[i + 1][0] == 'str':
+            roles.append(tokens[i + 1][1])
+        elif value == 'default' and tokens[i + 1][1] == ':':
+            roles.append('default')
+        elif value == 'break':
+            roles = []
+        elif value in bindings and tokens[i + 1][1] == '(' and tokens[i - 1][1] != '.':
+            bound.setdefault(bindings[value], set()).update(roles or ['all'])
+
+    module_roles: Dict[str, Set[str]] = {}
+    for start, roles in [(SOCKET_INDEX, {'all'}), *bound.items()]:
+        pending = [start]
+        seen = {start}
+        while pending:
+            module = pending.pop()
+            module_roles.setdefault(module, set()).update(roles)
+            for dependency in graph.imports(module):
+                if dependency not in seen and (dependency not in bound or dependency == start):
+                    seen.add(dependency)
+                    pending.append(dependency)
+    module_roles.pop(SOCKET_ROUTER, None)
+    return module_roles
+
+
+def socket_events(text: str) -> List[dict]:
+    """Find every socket.on(event, handler) in source and the check on the handler's path
+
+    Handlers are inline functions, possibly wrapped in a call, or names of
+    functions and methods defined in the same file. The check is the
+    strongest one in the handler or in any local definition it refers to,
+    followed transitively; each definition is searched once.
+    """
+    tokens = tokenize_js(text)
+    matches = match_brackets(tokens)
+    definitions, top_level = js_definitions(tokens, matches)
+    memo: Dict[str, Tuple[int, str]] = {}
+
+    def span_check(start: int, end: int, own: Optional[str] = None) -> Tuple[int, str]:
+        best = (0, '')
+        for i in range(start, end):
+            kind, value, _ = tokens[i]
+            if kind != 'name':
+                continue
+            if value in SOCKET_PERMISSION_CHECKS:
+                return 2, value
+            if tokens[i - 1][1] == '.':
+                owner = tokens[i - 3][1] if tokens[i - 2][1] == '?' else tokens[i - 2][1]
+                if value == 'role' and owner in SOCKET_ROLE_OWNERS and not best[0]:
+                    best = (1, f"{owner}.{value}")
+                if tokens[i - 2][1] != 'this':
+                    continue
+            if value in definitions and value != own:
+                found = definition_check(value)
+                if found[0] > best[0]:
+                    best = (found[0], value)
+                    if found[0] == 2:
+                        return best
+        return best
+
+    def definition_check(name: str) -> Tuple[int, str]:
+        if name not in memo:
+            memo[name] = (0, '')
+            memo[name] = span_check(*definitions[name], name)
+        return memo[name]
+
+    events = []
+    controllers = [span[0] for span in top_level]
+    i = 2
+    while i < len(tokens) - 2:
+        kind, value, offset = tokens[i]
+        if not (kind == 'name' and value == 'on' and tokens[i - 1][1] == '.' and
+                tokens[i - 2][1] == 'socket' and tokens[i + 1][1] == '('):
+            i += 1
+            continue
+        # The call is visited once: a socket.on() inside its handler counts
+        # towards this handler's check rather than as an event of its own
+        spans, call_end = argument_spans(tokens, matches, i + 1)
+        if len(spans) < 2 or spans[1][0] == spans[1][1]:
+            i = call_end + 1
+            continue
+        (event_start, event_end), (start, end) = spans[:2]
+        event = tokens[event_start][1] if event_end - event_start == 1 and \
+            tokens[event_start][0] in ('str', 'tmpl') else ''
+        handler_tokens = tokens[start:end]
+        if handler_tokens[0][1] == 'this' and len(handler_tokens) >= 3 and handler_tokens[1][1] == '.':
+            handler_tokens = handler_tokens[2:]
+        name = handler_tokens[0][1] if handler_tokens[0][0] == 'name' else ''
+        if name in definitions and (len(handler_tokens) == 1 or handler_tokens[1][1] == '.'):
+            handler = name
+            check = definition_check(name)
+        else:
+            handler = 'inline'
+            if name not in ('', 'async', 'function') and len(handler_tokens) > 1 and handler_tokens[1][1] == '(':
+                handler = f"{name}(inline)"
+            check = span_check(start, end)
+        k = bisect.bisect_right(controllers, i) - 1
+        controller = top_level[k][2] if k >= 0 and top_level[k][1] > i else ''
+        events.append({'offset': offset, 'event': event, 'controller': controller, 'handler': handler,
+                       'level': check[0], 'check': check[1]})
+        i = call_end + 1
+    return events
+
+
+def socket_event_result(level: int) -> Dict[str, str]:
+    """Classify one event handler by the strongest check on its path"""
+    if level == 2:
+        return {'status': '✅', 'notes': 'Handler checks permissions', 'issues': '', 'plan': ''}
+    if level == 1:
+        return {'status': '🔄', 'notes': "Handler only checks the user's role",
+                'issues': 'Role checks should be replaced with permission checks',
+                'plan': 'Check the page permission for this event'}
+    return {'status': '❌', 'notes': 'Handler without a permission check',
+            'issues': 'Socket event runs for any connected user',
+            'plan': 'Add a permission check to the handler'}
+
+
+def analyze_socket_events(path: Path = SOCKET_EVENTS_CSV_OUTPUT):
+    """Write one CSV row per Socket.IO event bound through the socket router"""
+    start = time.perf_counter()
+    graph = default_analyzer.import_graph
+    module_roles = socket_event_roles(graph)
+    counts = Counter()
+    files = 0
+    with open(path, 'w', encoding='utf-8', newline='') as f:
+        csv.writer(f, lineterminator='\n').writerow(SOCKET_EVENTS_CSV_HEADER)
+        writer = csv.writer(f, quoting=csv.QUOTE_ALL, lineterminator='\n')
+        for relative_path in sorted(module_roles):
+            content = (graph.base_dir / relative_path).read_bytes()
+            if b'.on(' not in content:
+                continue
+            text = content.decode('utf-8', errors='ignore')
+            events = socket_events(text)
+            if not events:
+                continue
+            files += 1
+            lines = LineIndex(text)
+            roles = '|'.join(sorted(module_roles[relative_path]))
+            for event in events:
+                result = socket_event_result(event['level'])
+                counts[result['status']] += 1
+                writer.writerow((relative_path, lines.position(event['offset'])[0], event['event'],
+                                 event['controller'], event['handler'], roles, event['check'],
+                                 result['status'], result['notes'], result['issues'], result['plan']))
+    elapsed = (time.perf_counter() - start) * 1000
+
+    print(f"Socket events: {sum(counts.values())} in {files} files ({elapsed:.0f} ms)")
+    print(f"✅ Permission check: {counts['✅']}")
+    print(f"🔄 Role check only: {counts['🔄']}")
+    print(f"❌ No check: {counts['❌']}")
+    print(f"Socket Event Report: {path}")
+
+
+def skip_braces(text: str, i: int) -> int:
+    """Index just past the {...} expression opening at i
+
+    Strings, templates and comments are stepped over, so braces inside them
+    do not count and every character is visited once.
+    """
+    depth = 0
+    n = len(text)
+    while i < n:
+        i = JSX_EXPRESSION_RE.match(text, i).end()
+        if i == n:
+            break
+        c = text[i]
+        if c in '\'"' or c == '/' and text.startswith(('//', '/*'), i):
+            i = JS_TOKEN_RE.match(text, i).end()
+            continue
+        if c == '`':
+            i = skip_template(text, i)
+            continue
+        if c == '{':
+            depth += 1
+        elif c == '}':
+            depth -= 1
+            if depth == 0:
+                return i + 1
+        i += 1
+    return n
+
+
+def scan_jsx(text: str) -> List[Tuple[int, str, str, Optional[str]]]:
+    """Find the action buttons in JSX source and the guard element around each
+
+    One left-to-right pass with explicit stacks for the open elements and
+    for the JavaScript expressions nested in their children. A '<' starts a
+    tag where a regex literal could start (see tokenize_js()), so generics
+    and comparisons are left alone. Tags, attributes and closing tags are
+    read forward without backtracking; an unclosed tag simply ends at the
+    next '>'. Returns (offset, element, label, guard) for every button or
+    <button> whose text starts with one of ACTION_BUTTON_LABELS, with the
+    innermost enclosing JSX_GUARDS element, or None when it is unguarded.
+    """
+    buttons = []
+    # Open elements as [name, offset, label, modes length, guard], where
+    # label is None for elements that are not buttons and '' until a
+    # button's text is seen, and guard is the innermost guard element open
+    # around the element or at it. Each name maps to the stack indexes of
+    # its open elements, so a closing tag finds its match directly.
+    elements: List[list] = []
+    open_names: Dict[str, List[int]] = {}
+    # A JavaScript context holds its brace depth; None is the children of elements[-1]
+    modes: List[Optional[list]] = [[0]]
+    prev = ';'
+    n = len(text)
+
+    def finish(element: list):
+        label = element[2]
+        if label and label.lower() in ACTION_BUTTON_LABELS:
+            buttons.append((element[1], element[0], label, element[4]))
+
+    def open_tag(i: int) -> int:
+        match = JSX_NAME_RE.match(text, i + 1)
+        name = match.group() if match else ''
+        j = match.end() if match else i + 1
+        self_closing = False
+        while j < n:
+            j = JSX_ATTRIBUTES_RE.match(text, j).end()
+            if j == n:
+                break
+            c = text[j]
+            if c == '>':
+                j += 1
+                break
+            if c == '/' and text.startswith('/>', j):
+                self_closing = True
+                j += 2
+                break
+            if c in '\'"':
+                j = JS_TOKEN_RE.match(text, j).end()
+            elif c == '{':
+                j = skip_braces(text, j)
+            else:
+                j += 1
+
+        guard = name if name in JSX_GUARDS else elements[-1][4] if elements else None
+        element = [name, i, '' if name.lower() == 'button' else None, len(modes), guard]
+        if self_closing:
+            finish(element)
+        else:
+            open_names.setdefault(name, []).append(len(elements))
+            elements.append(element)
+            modes.append(None)
+        return j
+
+    def close(k: int):
+        """Close elements[k] and every element still open inside it"""
+        while len(elements) > k:
+            element = elements.pop()
+            open_names[element[0]].pop()
+            finish(element)
+        del modes[element[3]:]
+
+    def close_tag(i: int) -> int:
+        end = text.find('>', i)
+        end = n if end == -1 else end + 1
+        indexes = open_names.get(text[i + 2:end - 1].strip())
+        if indexes:
+            close(indexes[-1])
+        return end
 
-    # Create CSV
-    csv_rows = []
-    csv_rows.append('File Path,Status,Notes,RBAC_Issues,Implementation_Plan')
+    i = 0
+    while i < n:
+        c = text[i]
+        frame = modes[-1]
+        if frame is None:
+            # JSX children: text up to the next tag or expression
+            if c == '{':
+                modes.append([0])
+                prev = '{'
+                i += 1
+            elif c == '<' and i + 1 < n and text[i + 1] == '/':
+                i = close_tag(i)
+            elif c == '<' and i + 1 < n and (text[i + 1].isalpha() or text[i + 1] == '>'):
+                i = open_tag(i)
+            else:
+                end = JSX_TEXT_RE.match(text, i + 1).end()
+                if elements[-1][2] == '':
+                    word = JSX_WORD_RE.search(text, i, end)
+                    if word:
+                        elements[-1][2] = word.group()
+                i = end
+            continue
 
-    # Analyze each file
-    for i, line in enumerate(lines, 1):
-        row = analyze_file(line)
-        if row:
-            csv_rows.append(','.join(row))
+        if c in '\'"':
+            i = JS_TOKEN_RE.match(text, i).end()
+            prev = 'str'
+        elif c == '`':
+            i = skip_template(text, i)
+            prev = '`'
+        elif c == '{':
+            frame[0] += 1
+            prev = '{'
+            i += 1
+        elif c == '}':
+            if frame[0] == 0 and len(modes) > 1:
+                # End of an expression in JSX children
+                modes.pop()
+            else:
+                frame[0] -= 1
+            prev = '}'
+            i += 1
+        elif c == '<':
+            if (prev in JS_REGEX_PRECEDERS or prev in JS_REGEX_KEYWORDS) and i + 1 < n and (
+                    text[i + 1].isalpha() or text[i + 1] == '>'):
+                i = open_tag(i)
+            else:
+                prev = c
+                i += 1
+        elif c == '/':
+            if text.startswith(('//', '/*'), i):
+                i = JS_TOKEN_RE.match(text, i).end()
+            elif prev in JS_REGEX_PRECEDERS or prev in JS_REGEX_KEYWORDS:
+                i = skip_regex_literal(text, i)
+                prev = 'regex'
+            else:
+                prev = c
+                i += 1
+        else:
+            # Plain code up to the next string, comment, brace or tag; only
+            # its last token matters for telling a tag from a comparison
+            end = JSX_CODE_RE.match(text, i).end()
+            code = text[i:end].rstrip()
+            if code:
+                j = len(code)
+                while j and (code[j - 1].isalnum() or code[j - 1] in '_$'):
+                    j -= 1
+                if j == len(code):
+                    prev = code[-1]
+                else:
+                    prev = code[j:] if code[j:] in JS_REGEX_KEYWORDS else 'name'
+            i = end
 
-        if i % 100 == 0:
-            print(f"Processed {i}/{len(lines)} files...")
+    if elements:
+        close(0)
+    buttons.sort()
+    return buttons
 
-    # Write CSV
-    csv_content = '\n'.join(csv_rows)
-    with open(CSV_OUTPUT, 'w', encoding='utf-8') as f:
-        f.write(csv_content)
 
+def jsx_files() -> List[Path]:
+    """Feature-module sources the action button scan covers"""
+    root = BASE_DIR / JSX_SCAN_ROOT
+    return sorted(path for path in root.rglob('*')
+                  if path.suffix in JSX_SCAN_EXTENSIONS and 'node_modules' not in path.parts)
+
+
+def analyze_buttons(path: Path = BUTTONS_CSV_OUTPUT):
+    """Write one CSV row per action button with the guard element wrapping it"""
+    start = time.perf_counter()
+    counts = Counter()
+    files = jsx_files()
+    with open(path, 'w', encoding='utf-8', newline='') as f:
+        csv.writer(f, lineterminator='\n').writerow(BUTTONS_CSV_HEADER)
+        writer = csv.writer(f, quoting=csv.QUOTE_ALL, lineterminator='\n')
+        for file_path in files:
+            relative_path = file_path.relative_to(BASE_DIR).as_posix()
+            text = file_path.read_bytes().decode('utf-8', errors='ignore')
+            index = None
+            for offset, element, label, guard in scan_jsx(text):
+                index = index or LineIndex(text)
+                line, column = index.position(offset)
+                status = '✅' if guard else '❌'
+                counts[status] += 1
+                writer.writerow((relative_path, line, column, element, label, guard or '', status))
+    elapsed = (time.perf_counter() - start) * 1000
+
+    print(f"Action buttons: {sum(counts.values())} in {len(files)} files ({elapsed:.0f} ms)")
+    print(f"✅ Inside {' or '.join(JSX_GUARDS)}: {counts['✅']}")
+    print(f"❌ Unguarded: {counts['❌']}")
+    print(f"Action Button Report: {path}")
+
+
+def compliance_rate(counters: Optional[Dict[str, int]] = None) -> Optional[float]:
+    """Compliant share of the files that need RBAC, in percent"""
+    counters = stats if counters is None else counters
+    actionable = counters['compliant'] + counters['needs_migration'] + counters['partial']
+    if actionable > 0:
+        return (counters['compliant'] / actionable) * 100
+    return None
+
+
+def duplicate_summary() -> List[str]:
+    """Summary lines on duplicated content; none when every file is unique
+
+    Copies count once per path in the totals above, so the compliance rate
+    is repeated with each distinct content counted once.
+    """
+    groups = default_analyzer.duplicate_groups()
+    if not groups:
+        return []
+    copies = sum(len(group) - 1 for group in groups)
+    lines = [f"Duplicate Content: {len(groups)} groups, {copies} extra copies"]
+    rate = compliance_rate(default_analyzer.unique_content_stats())
+    if rate is not None:
+        lines.append(f"RBAC Compliance Rate (unique content): {rate:.1f}%")
+    return lines
+
+
+def write_duplicates(path: Path = DUPLICATES_CSV_OUTPUT) -> int:
+    """Write one row per path in each duplicate group and return the group count"""
+    groups = default_analyzer.duplicate_groups()
+    with open(path, 'w', encoding='utf-8', newline='') as f:
+        csv.writer(f, lineterminator='\n').writerow(DUPLICATES_CSV_HEADER)
+        writer = csv.writer(f, quoting=csv.QUOTE_ALL, lineterminator='\n')
+        for number, group in enumerate(groups, 1):
+            digest = default_analyzer.content_digests[next(iter(group))]
+            for relative_path, analysis in group.items():
+                writer.writerow((number, digest, relative_path, analysis.status, analysis.notes))
+    return len(groups)
+
+
+def print_summary(total: int):
+    """Print the status counters"""
     print()
     print("=" * 50)
     print("RBAC Compliance Summary")
@@ -627,32 +3712,743 @@ def main():
     print(f"❌ Needs Migration: {stats['needs_migration']}")
     print(f"🔄 Partial/Review Needed: {stats['partial']}")
     print(f"❓ Files Not Found: {stats['not_found']}")
-    print(f"Total Files: {len(lines)}")
+    print(f"Total Files: {total}")
     print()
-    print(f"CSV Report: {CSV_OUTPUT}")
 
-    # Calculate compliance percentage (excluding "not needed")
-    actionable = stats['compliant'] + stats['needs_migration'] + stats['partial']
-    if actionable > 0:
-        compliance_rate = (stats['compliant'] / actionable) * 100
-        print(f"RBAC Compliance Rate: {compliance_rate:.1f}%")
+    # Compliance percentage excludes "not needed"
+    rate = compliance_rate()
+    if rate is not None:
+        print(f"RBAC Compliance Rate: {rate:.1f}%")
+    for line in duplicate_summary():
+        print(line)
 
-    # Write summary to file
-    with open(SUMMARY_OUTPUT, 'w') as f:
+
+def write_summary(total: int, path: Path = SUMMARY_OUTPUT):
+    """Write the status counters to rbac_summary.txt"""
+    rate = compliance_rate()
+    with open(path, 'w') as f:
         f.write("RBAC Compliance Analysis Summary\n")
         f.write("=" * 50 + "\n\n")
-        f.write(f"Total Files Analyzed: {len(lines)}\n\n")
+        f.write(f"Total Files Analyzed: {total}\n\n")
         f.write(f"✅ Fully Compliant: {stats['compliant']}\n")
         f.write(f"➖ No RBAC Needed: {stats['not_needed']}\n")
         f.write(f"❌ Needs Migration: {stats['needs_migration']}\n")
         f.write(f"🔄 Partial/Review Needed: {stats['partial']}\n")
         f.write(f"❓ Files Not Found: {stats['not_found']}\n\n")
-        if actionable > 0:
-            f.write(f"RBAC Compliance Rate: {compliance_rate:.1f}%\n")
+        if rate is not None:
+            f.write(f"RBAC Compliance Rate: {rate:.1f}%\n")
+        for line in duplicate_summary():
+            f.write(line + "\n")
         f.write(f"\nDetailed Report: {CSV_OUTPUT}\n")
 
-    print(f"Summary: {SUMMARY_OUTPUT}")
+
+class InotifyWatcher:
+    """Reports changed files in the watched directories through Linux inotify
+
+    Called through ctypes, so no third-party package is needed. changes()
+    returns None when the kernel queue overflowed or a directory appeared,
+    meaning the caller has to resynchronize from the tree.
+    """
+
+    label = 'inotify'
+    MASK = IN_CLOSE_WRITE | IN_MOVED_FROM | IN_MOVED_TO | IN_CREATE | IN_DELETE
+
+    def __init__(self, directories: Iterable[str]):
+        # Imported here so that importing the analyzer stays cheap
+        import ctypes
+        import ctypes.util
+
+        libc = ctypes.CDLL(ctypes.util.find_library('c'), use_errno=True)
+        self.add_watch = libc.inotify_add_watch
+        self.get_errno = ctypes.get_errno
+        self.fd = libc.inotify_init1(os.O_CLOEXEC)
+        if self.fd < 0:
+            raise OSError(self.get_errno(), 'inotify_init1 failed')
+        self.dirs: Dict[int, str] = {}
+        self.watch(directories)
+
+    def watch(self, directories: Iterable[str]):
+        """Add a watch for every directory not watched yet"""
+        watched = set(self.dirs.values())
+        for relative_dir in directories:
+            if relative_dir in watched:
+                continue
+            wd = self.add_watch(self.fd, os.fsencode(BASE_DIR / relative_dir), self.MASK)
+            if wd < 0:
+                error = self.get_errno()
+                if error == errno.ENOENT:
+                    continue
+                raise OSError(error, f'Cannot watch {relative_dir}')
+            self.dirs[wd] = relative_dir
+
+    def changes(self) -> Optional[Set[str]]:
+        """Block until files change and return their relative paths"""
+        import select
+
+        select.select([self.fd], [], [])
+        time.sleep(WATCH_DEBOUNCE)
+
+        changed = set()
+        resync = False
+        while select.select([self.fd], [], [], 0)[0]:
+            data = os.read(self.fd, 64 * 1024)
+            offset = 0
+            while offset < len(data):
+                wd, mask, _, length = struct.unpack_from('iIII', data, offset)
+                name = os.fsdecode(data[offset + 16:offset + 16 + length].rstrip(b'\0'))
+                offset += 16 + length
+
+                if mask & IN_Q_OVERFLOW:
+                    resync = True
+                elif mask & IN_IGNORED:
+                    self.dirs.pop(wd, None)
+                elif wd in self.dirs and name:
+                    if mask & IN_ISDIR:
+                        resync = resync or bool(mask & (IN_CREATE | IN_MOVED_TO))
+                    else:
+                        changed.add(f"{self.dirs[wd]}/{name}")
+        return None if resync else changed
+
+    def close(self):
+        os.close(self.fd)
+
+
+class PollingWatcher:
+    """Reports changed files by comparing stat() snapshots every interval"""
+
+    label = 'polling'
+
+    def __init__(self, list_paths, interval: float = WATCH_POLL_INTERVAL):
+        self.list_paths = list_paths
+        self.interval = interval
+        self.snapshot = self.scan()
+
+    def scan(self) -> Dict[str, Optional[Tuple[int, int]]]:
+        snapshot = {}
+        for relative_path in self.list_paths():
+            try:
+                st = os.stat(BASE_DIR / relative_path)
+                snapshot[relative_path] = (st.st_mtime_ns, st.st_size)
+            except OSError:
+                snapshot[relative_path] = None
+        return snapshot
+
+    def watch(self, directories: Iterable[str]):
+        pass
+
+    def changes(self) -> Optional[Set[str]]:
+        """Sleep one interval and return the paths whose snapshot differs"""
+        time.sleep(self.interval)
+        previous, self.snapshot = self.snapshot, self.scan()
+        return {path for path in previous.keys() | self.snapshot.keys()
+                if previous.get(path) != self.snapshot.get(path)}
+
+    def close(self):
+        pass
+
+
+def write_reports(results: Dict[str, Dict[str, str]], rollup: Optional[DirectoryRollup] = None,
+                  rollups: Optional[Path] = None):
+    """Rewrite the CSV, summary and, when given, rollups from in-memory results, atomically"""
+    tmp_path = CSV_OUTPUT.with_name(CSV_OUTPUT.name + '.tmp')
+    sink = CsvSink(tmp_path)
+    try:
+        for relative_path, analysis in results.items():
+            sink.write(relative_path, analysis)
+    finally:
+        sink.close()
+    os.replace(tmp_path, CSV_OUTPUT)
+
+    tmp_path = SUMMARY_OUTPUT.with_name(SUMMARY_OUTPUT.name + '.tmp')
+    write_summary(len(results), tmp_path)
+    os.replace(tmp_path, SUMMARY_OUTPUT)
+
+    if rollup is not None:
+        json_path = rollups.with_suffix('.json')
+        tmp_path, tmp_json_path = (path.with_name(path.name + '.tmp') for path in (rollups, json_path))
+        rollup.write(tmp_path, tmp_json_path)
+        os.replace(tmp_path, rollups)
+        os.replace(tmp_json_path, json_path)
+
+
+def update_results(results: Dict[str, Dict[str, str]], changed: Set[str], list_paths,
+                   entries: Dict[str, dict], discover: bool,
+                   rollup: Optional[DirectoryRollup] = None) -> Optional[Dict[str, Dict[str, str]]]:
+    """Reanalyze changed paths, adjusting the counters, and the rollup when
+    given, by each file's old and new status
+
+    Returns the new results; their order follows list_paths() whenever a
+    path was added or removed. Only discovered trees lose deleted files -
+    a path listed in files.txt is reported as not found instead. Returns
+    None, changing nothing, when none of the paths is listed.
+    """
+    # An edited backend module can change which controllers its imports guard
+    if any(path.startswith(IMPORT_GRAPH_ROOT + '/') for path in changed):
+        regraded = default_analyzer.import_graph.update() & results.keys()
+        for relative_path in regraded:
+            entries.pop(relative_path, None)
+        changed = changed | regraded
+
+    order = None
+    if changed - results.keys():
+        order = list_paths()
+        listed = set(order)
+        changed = {path for path in changed if path in results or path in listed}
+    if not changed:
+        return None
+
+    for relative_path in sorted(changed):
+        old = results.get(relative_path)
+        if old is not None:
+            stats[stat_key(old)] -= 1
+            if rollup is not None:
+                rollup.remove(relative_path, old)
+        if discover and not (BASE_DIR / relative_path).exists():
+            results.pop(relative_path, None)
+            entries.pop(relative_path, None)
+            default_analyzer.forget_content(relative_path)
+            order = order or list(results)
+            print(f"  {relative_path}: {old['status'] if old else '?'} -> removed")
+            continue
+
+        new = decide_by_path(relative_path) or analyze_path(relative_path, entries, entries)
+        results[relative_path] = new
+        if rollup is not None:
+            rollup.add(relative_path, new)
+        if old is None or old != new:
+            print(f"  {relative_path}: {old['status'] if old else 'added'} -> {new['status']} {new['notes']}")
+
+    if order is not None:
+        results = {path: results[path] for path in order if path in results}
+    return results
+
+
+def watch(discover: bool, jobs: int, cache: Optional[Dict[str, dict]], poll: bool, interval: float,
+          prefetch: int = 0, io_threads: int = PREFETCH_THREADS, rollups: Optional[Path] = None):
+    """Analyze the tree once, then keep the reports current as files change
+
+    Results and cache entries stay in memory, so an update only touches the
+    changed files: their old status is subtracted from the counters, the new
+    one added, and the CSV and summary are rewritten.
+    """
+    directories = []
+
+    def list_paths() -> List[str]:
+        if discover:
+            del directories[:]
+            return list(discover_files(directories=directories))
+        paths = list(iter_file_list())
+        directories[:] = sorted({os.path.dirname(path) for path in paths})
+        return paths
+
+    entries = {}
+    results = {}
+    # Every result gets an in-memory fingerprint, even with --no-cache
+    for relative_path, analysis in iter_results(list_paths(), jobs, {} if cache is None else cache, entries,
+                                                prefetch, io_threads):
+        results[relative_path] = analysis
+    rollup = None
+    if rollups:
+        rollup = DirectoryRollup()
+        for relative_path, analysis in results.items():
+            rollup.add(relative_path, analysis)
+    write_reports(results, rollup, rollups)
+    print_summary(len(results))
+
+    watcher = None
+    if not poll and sys.platform.startswith('linux'):
+        try:
+            watcher = InotifyWatcher(directories)
+        except (OSError, AttributeError) as e:
+            print(f"inotify unavailable ({e}), polling instead")
+    if watcher is None:
+        watcher = PollingWatcher(list_paths, interval)
+
+    print()
+    print(f"Watching {len(results)} files ({watcher.label}); press Ctrl+C to stop")
+    # Stopping with SIGTERM still saves the cache
+    import signal
+    signal.signal(signal.SIGTERM, lambda signum, frame: sys.exit(0))
+    try:
+        while True:
+            changed = watcher.changes()
+            start = time.perf_counter()
+            if changed is None:
+                # Lost events or new directories: recheck every file, which
+                # the in-memory fingerprints keep cheap for unchanged ones
+                changed = set(results) | set(list_paths())
+                watcher.watch(directories)
+            if not changed:
+                continue
+
+            updated = update_results(results, changed, list_paths, entries, discover, rollup)
+            if updated is None:
+                continue
+            results = updated
+            write_reports(results, rollup, rollups)
+            rate = compliance_rate()
+            print(f"Updated in {(time.perf_counter() - start) * 1000:.0f} ms - "
+                  f"✅ {stats['compliant']} ➖ {stats['not_needed']} ❌ {stats['needs_migration']} "
+                  f"🔄 {stats['partial']} ❓ {stats['not_found']}"
+                  + (f", compliance {rate:.1f}%" if rate is not None else ''))
+    except KeyboardInterrupt:
+        print()
+    finally:
+        watcher.close()
+        if cache is not None:
+            save_cache(entries)
+
+
+class AnalysisDaemon:
+    """Answers analyze requests on a Unix socket from warm caches
+
+    Compiled rules, the content feature memo and per-file results stay in
+    memory between requests, seeded from the incremental cache. A result is
+    reused while the file's size and mtime match (see analyze_cached()).
+    Editing rbac_rules.json drops everything derived from it; editing this
+    script stops the daemon once the current request is answered.
+
+    The protocol is one JSON line each way: {"paths": [...]} in, and
+    {"results": [...], "stats": {...}, "cache": {...}, "ms": ...} out.
+    """
+
+    def __init__(self, socket_path: Path = DAEMON_SOCKET, idle_timeout: float = DAEMON_IDLE_TIMEOUT):
+        self.socket_path = socket_path
+        self.idle_timeout = idle_timeout
+        self.cache = load_cache()
+        self.dirty = False
+        self.sources = self.source_mtimes()
+
+    @staticmethod
+    def source_mtimes() -> Tuple[int, int]:
+        return os.stat(__file__).st_mtime_ns, os.stat(RULES_FILE).st_mtime_ns
+
+    def sources_changed(self) -> bool:
+        """Invalidate rule-derived state if the rules changed, and results of
+        controllers the import graph now guards differently; True if the script changed"""
+        sources = self.source_mtimes()
+        if sources[1] != self.sources[1]:
+            compiled_rules.cache_clear()
+            default_analyzer.content_features.clear()
+            self.cache = {}
+            self.dirty = False
+        for relative_path in default_analyzer.import_graph.update():
+            self.cache.pop(relative_path, None)
+        script_changed = sources[0] != self.sources[0]
+        self.sources = sources
+        return script_changed
+
+    @staticmethod
+    def relative_path(path: str) -> Optional[str]:
+        """Repository-relative form of an absolute or relative path; None if outside"""
+        if os.path.isabs(path):
+            path = os.path.relpath(path, BASE_DIR)
+            if path == os.pardir or path.startswith(os.pardir + os.sep):
+                return None
+        return path.replace('\\', '/')
+
+    def analyze(self, paths: List[str]) -> dict:
+        """Classify paths against the warm cache and report this request's counters"""
+        start = time.perf_counter()
+        default_analyzer.reset()
+        for key in cache_stats:
+            cache_stats[key] = 0
+
+        updated = {}
+        results = []
+        for path in paths:
+            relative_path = self.relative_path(path)
+            if relative_path is None:
+                analysis = OUTSIDE_REPOSITORY._asdict()
+                stats[stat_key(analysis)] += 1
+            else:
+                analysis = (decide_by_path(relative_path) or
+                            analyze_cached(str(BASE_DIR / relative_path), relative_path, self.cache, updated))
+            results.append(dict(analysis, path=path))
+
+        for relative_path, entry in updated.items():
+            if self.cache.get(relative_path) is not entry:
+                self.cache[relative_path] = entry
+                self.dirty = True
+        return {'results': results, 'stats': dict(stats), 'cache': dict(cache_stats),
+                'ms': round((time.perf_counter() - start) * 1000, 3)}
+
+    def handle(self, conn: 'socket.socket') -> bool:
+        """Answer one request; True when the daemon should stop afterwards"""
+        conn.settimeout(DAEMON_REQUEST_TIMEOUT)
+        stop = False
+        try:
+            with conn.makefile('rb') as reader:
+                request = json.loads(reader.readline())
+            stop = self.sources_changed()
+            response = self.analyze(list(request['paths']))
+        except (OSError, ValueError, KeyError, TypeError) as e:
+            response = {'error': str(e)}
+        try:
+            conn.sendall(json.dumps(response, ensure_ascii=False).encode('utf-8') + b'\n')
+        except OSError:
+            pass
+        return stop
+
+    def serve(self):
+        """Accept requests until none arrives for idle_timeout seconds"""
+        import signal
+        import socket
+
+        if self.socket_path.exists():
+            if daemon_running(self.socket_path):
+                print(f"A daemon is already serving {self.socket_path}")
+                return
+            self.socket_path.unlink()
+
+        server = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        server.bind(str(self.socket_path))
+        os.chmod(self.socket_path, 0o600)
+        server.listen()
+        server.settimeout(self.idle_timeout)
+        # Stopping with SIGTERM still removes the socket and saves the cache
+        signal.signal(signal.SIGTERM, lambda signum, frame: sys.exit(0))
+        print(f"Serving on {self.socket_path} ({len(self.cache)} cached results, "
+              f"idle timeout {self.idle_timeout:g}s)")
+        try:
+            while True:
+                try:
+                    conn, _ = server.accept()
+                except socket.timeout:
+                    print("Idle, shutting down")
+                    break
+                with conn:
+                    if self.handle(conn):
+                        print(f"{Path(__file__).name} changed, shutting down")
+                        break
+        except KeyboardInterrupt:
+            print()
+        finally:
+            server.close()
+            self.socket_path.unlink(missing_ok=True)
+            if self.dirty:
+                save_cache(self.cache)
+
+
+def daemon_request(socket_path: Path, paths: List[str]) -> dict:
+    """Send one analyze request to a running daemon"""
+    import socket
+
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as client:
+        client.connect(str(socket_path))
+        client.sendall(json.dumps({'paths': paths}, ensure_ascii=False).encode('utf-8') + b'\n')
+        with client.makefile('rb') as reader:
+            return json.loads(reader.readline())
+
+
+def daemon_running(socket_path: Path) -> bool:
+    """True when something accepts connections on socket_path"""
+    import socket
+
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as client:
+        try:
+            client.connect(str(socket_path))
+        except OSError:
+            return False
+    return True
+
+
+def query_daemon(paths: List[str], socket_path: Path = DAEMON_SOCKET,
+                 idle_timeout: float = DAEMON_IDLE_TIMEOUT) -> int:
+    """Print the status of each path, starting a daemon when none is listening
+
+    Paths that exist relative to the working directory are sent as absolute
+    paths; anything else is taken as relative to the repository root.
+    """
+    import subprocess
+
+    paths = [os.path.abspath(path) if os.path.exists(path) else path for path in paths]
+    try:
+        response = daemon_request(socket_path, paths)
+    except (FileNotFoundError, ConnectionRefusedError):
+        subprocess.Popen([sys.executable, __file__, '--serve', '--socket', str(socket_path),
+                          '--idle-timeout', str(idle_timeout)],
+                         stdin=subprocess.DEVNULL, stdout=subprocess.DEVNULL,
+                         stderr=subprocess.DEVNULL, start_new_session=True)
+        deadline = time.monotonic() + DAEMON_START_TIMEOUT
+        while True:
+            time.sleep(0.05)
+            try:
+                response = daemon_request(socket_path, paths)
+                break
+            except (FileNotFoundError, ConnectionRefusedError):
+                if time.monotonic() > deadline:
+                    print(f"Error: no daemon answered on {socket_path}", file=sys.stderr)
+                    return 1
+
+    if 'error' in response:
+        print(f"Error: {response['error']}", file=sys.stderr)
+        return 1
+    for result in response['results']:
+        print(f"{result['status']}\t{result['path']}\t{result['notes']}")
+    return 0
+
+
+def parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
+    """Parse command line options"""
+    parser = argparse.ArgumentParser(description='RBAC Compliance File Analyzer')
+    parser.add_argument('-j', '--jobs', type=int, default=1,
+                        help='worker processes to use (0 = one per CPU, default: 1)')
+    parser.add_argument('--prefetch', nargs='?', type=int, const=PREFETCH_DEPTH, default=0, metavar='DEPTH',
+                        help='read up to DEPTH files ahead on a thread pool, for slow or network '
+                             f'filesystems (default depth: {PREFETCH_DEPTH})')
+    parser.add_argument('--io-threads', type=int, default=PREFETCH_THREADS, metavar='N',
+                        help=f'threads reading files for --prefetch (default: {PREFETCH_THREADS})')
+    parser.add_argument('--no-cache', action='store_true',
+                        help=f'ignore and do not update the incremental cache ({CACHE_OUTPUT.name})')
+    parser.add_argument('--jsonl', nargs='?', type=Path, const=JSONL_OUTPUT, metavar='PATH',
+                        help=f'also write one JSON object per file (default: {JSONL_OUTPUT.name})')
+    parser.add_argument('--sarif', nargs='?', type=Path, const=SARIF_OUTPUT, metavar='PATH',
+                        help=f'also write ❌/🔄 results as SARIF 2.1.0 (default: {SARIF_OUTPUT.name})')
+    parser.add_argument('--findings', nargs='?', type=Path, const=FINDINGS_CSV_OUTPUT, metavar='PATH',
+                        help='also write the line and column of each requireRole(), role check, '
+                             f'role list and unguarded action button in ❌/🔄 files '
+                             f'(default: {FINDINGS_CSV_OUTPUT.name})')
+    parser.add_argument('--rollups', nargs='?', type=Path, const=ROLLUPS_OUTPUT, metavar='PATH',
+                        help='also write status counts and the compliance rate of every directory, '
+                             f'and the same as JSON next to it (default: {ROLLUPS_OUTPUT.name})')
+    parser.add_argument('--discover', action='store_true',
+                        help=f'walk backend/ and react/ instead of reading {FILES_TXT.name} '
+                             '(the default when it is missing)')
+    parser.add_argument('--watch', action='store_true',
+                        help=f'keep running and update {CSV_OUTPUT.name} and {SUMMARY_OUTPUT.name} '
+                             'as files change')
+    parser.add_argument('--poll', nargs='?', type=float, const=WATCH_POLL_INTERVAL, metavar='SECONDS',
+                        help='with --watch, poll for changes instead of using inotify '
+                             f'(default interval: {WATCH_POLL_INTERVAL:g}s)')
+    parser.add_argument('--profile', nargs='?', type=Path, const=PROFILE_OUTPUT, metavar='PATH',
+                        help='time each phase, rule and content feature and list the slowest files; '
+                             f'printed and saved as JSON (default: {PROFILE_OUTPUT.name})')
+    parser.add_argument('--slowest', type=int, default=PROFILE_SLOWEST, metavar='N',
+                        help=f'slowest files listed by --profile (default: {PROFILE_SLOWEST})')
+    parser.add_argument('--endpoints', nargs='?', type=Path, const=ENDPOINTS_CSV_OUTPUT, metavar='PATH',
+                        help='only write the per-endpoint guard report for Express routes '
+                             f'(default: {ENDPOINTS_CSV_OUTPUT.name})')
+    parser.add_argument('--buttons', nargs='?', type=Path, const=BUTTONS_CSV_OUTPUT, metavar='PATH',
+                        help=f'only write the action buttons in {JSX_SCAN_ROOT}/ and whether '
+                             f'{" or ".join(JSX_GUARDS)} wraps each (default: {BUTTONS_CSV_OUTPUT.name})')
+    parser.add_argument('--socket-events', nargs='?', type=Path, const=SOCKET_EVENTS_CSV_OUTPUT, metavar='PATH',
+                        help='only write the Socket.IO events bound through the socket router and '
+                             f'the check on each handler (default: {SOCKET_EVENTS_CSV_OUTPUT.name})')
+    parser.add_argument('--importers', nargs='+', metavar='PATH',
+                        help=f'only show whether each {IMPORT_GRAPH_ROOT}/ module is guarded through the '
+                             'modules importing it, and list them')
+    parser.add_argument('--since', metavar='REF',
+                        help='only analyze files changed between REF and the working tree '
+                             f'and write {DELTA_CSV_OUTPUT.name}')
+    parser.add_argument('--serve', action='store_true',
+                        help='run a daemon answering --query requests from warm caches')
+    parser.add_argument('--query', nargs='+', metavar='PATH',
+                        help='print the status of each path, asking the daemon '
+                             '(started on demand) instead of analyzing here')
+    parser.add_argument('--socket', type=Path, default=DAEMON_SOCKET, metavar='PATH',
+                        help=f'Unix socket of the daemon (default: {DAEMON_SOCKET.name})')
+    parser.add_argument('--idle-timeout', type=float, default=DAEMON_IDLE_TIMEOUT, metavar='SECONDS',
+                        help=f'stop the daemon after this long without a request '
+                             f'(default: {DAEMON_IDLE_TIMEOUT:g})')
+    parser.add_argument('--shard', type=parse_shard, metavar='I/N',
+                        help='only analyze the paths hashing to shard I of N (1-based) and write a '
+                             f'partial ({SHARD_OUTPUT_NAME.format(index="I", count="N")}) for --merge')
+    parser.add_argument('--merge', nargs='+', type=Path, metavar='PARTIAL',
+                        help=f'combine the partials of every shard into {CSV_OUTPUT.name} and '
+                             f'{SUMMARY_OUTPUT.name}, exactly as one unsharded run writes them')
+    parser.add_argument('--history', nargs='?', type=Path, const=HISTORY_DB, metavar='PATH',
+                        help='record this run in the SQLite run history, or read it with the '
+                             f'queries below (default: {HISTORY_DB.name})')
+    parser.add_argument('--runs', action='store_true', help='list the recorded runs')
+    parser.add_argument('--regressions', type=int, metavar='RUN',
+                        help='list files whose status got worse between RUN and the latest run')
+    parser.add_argument('--trend', nargs='?', type=int, const=HISTORY_TREND_DEPTH, metavar='DEPTH',
+                        help='compliance rate per directory over the recent runs, grouping paths '
+                             f'by their first DEPTH components (default: {HISTORY_TREND_DEPTH})')
+    parser.add_argument('--stuck', type=int, metavar='N',
+                        help='list files that stayed 🔄 in each of the last N runs')
+    args = parser.parse_args(argv)
+    if args.watch and args.history:
+        parser.error('--watch does not record run history')
+    if args.shard and (args.watch or args.history or args.jsonl or args.sarif or args.findings or args.rollups):
+        parser.error('--shard only writes a partial for --merge')
+    if args.serve and args.query:
+        parser.error('--serve and --query are separate commands')
+    if args.watch and (args.jsonl or args.sarif or args.findings or args.profile or args.since or args.endpoints
+                       or args.buttons or args.socket_events or args.importers):
+        parser.error('--watch only maintains the CSV, summary and rollup reports')
+    return args
+
+
+def main(argv: Optional[List[str]] = None):
+    """Main analysis function"""
+    global profiler
+    args = parse_args(argv)
+    jobs = args.jobs if args.jobs > 0 else (os.cpu_count() or 1)
+
+    # Only the statuses are printed, so scripts can read them
+    if args.query:
+        return query_daemon(args.query, args.socket, args.idle_timeout)
+
+    print("RBAC Compliance File Analyzer")
+    print("=" * 50)
+
+    if args.serve:
+        AnalysisDaemon(args.socket, args.idle_timeout).serve()
+        return
+
+    # History queries read the database only
+    history_db = args.history or HISTORY_DB
+    if args.runs or args.regressions is not None or args.trend is not None or args.stuck is not None:
+        if not history_db.exists():
+            print(f"No run history at {history_db}; record one with --history")
+            return 1
+        if args.runs:
+            print_runs(history_db)
+        if args.regressions is not None:
+            print_regressions(history_db, args.regressions)
+        if args.trend is not None:
+            print_trend(history_db, args.trend)
+        if args.stuck is not None:
+            print_stuck(history_db, args.stuck)
+        return
+
+    if args.endpoints:
+        analyze_endpoints(args.endpoints)
+        return
+
+    if args.buttons:
+        analyze_buttons(args.buttons)
+        return
+
+    if args.socket_events:
+        analyze_socket_events(args.socket_events)
+        return
+
+    if args.importers:
+        print_importers(args.importers)
+        return
+
+    if args.since:
+        analyze_since(args.since)
+        return
+
+    if args.merge:
+        return merge_shards(args.merge, args.rollups)
+
+    # Read file list, or walk the source trees when there is none
+    discover = args.discover or not FILES_TXT.exists()
+    if discover:
+        print(f"Discovering files under {', '.join(DISCOVERY_ROOTS)} in {BASE_DIR}")
+    else:
+        print(f"Streaming files from {FILES_TXT}")
+    print()
+
+    # Only files whose fingerprint changed since the last run are rescanned
+    cache = None if args.no_cache else load_cache()
+    updated = {}
+    if args.shard and cache is not None:
+        # Other shards' entries stay for when they run from this directory
+        updated = {path: entry for path, entry in cache.items() if shard_of(path, args.shard[1]) != args.shard[0]}
+
+    if args.watch:
+        watch(discover, jobs, cache, args.poll is not None, args.poll or WATCH_POLL_INTERVAL,
+              args.prefetch, args.io_threads, args.rollups)
+        return
+    paths = iter_discovered() if discover else iter_file_list()
+
+    if args.shard:
+        index, count = args.shard
+        print(f"Shard {index} of {count}")
+        inputs = 0
+        positions = deque()
+
+        def shard_paths(paths: Iterable[str]) -> Iterator[str]:
+            nonlocal inputs
+            for position, relative_path in enumerate(paths):
+                inputs = position + 1
+                if shard_of(relative_path, count) == index:
+                    positions.append(position)
+                    yield relative_path
+
+        paths = shard_paths(paths)
+        sinks = [ShardSink(OUTPUT_DIR / SHARD_OUTPUT_NAME.format(index=index, count=count), args.shard, positions)]
+    else:
+        sinks = [CsvSink(CSV_OUTPUT)]
+    if args.jsonl:
+        sinks.append(JsonlSink(args.jsonl))
+    if args.sarif:
+        sinks.append(SarifSink(args.sarif))
+    if args.findings:
+        sinks.append(FindingsSink(args.findings))
+        if cache is not None:
+            # Entries from runs without --findings carry no findings to reuse
+            cache = {path: entry for path, entry in cache.items()
+                     if 'findings' in entry or entry['analysis']['status'] not in FINDING_STATUSES}
+    if args.rollups:
+        sinks.append(RollupSink(args.rollups))
+    history = HistorySink(args.history) if args.history else None
+    if history is not None:
+        sinks.append(history)
+
+    if args.profile:
+        profiler = Profiler(args.slowest)
+
+    # Analyze each file, handing every result to the sinks as it is produced
+    total = 0
+    decided = {}
+    try:
+        for relative_path, analysis in iter_results(paths, jobs, cache, updated, args.prefetch, args.io_threads,
+                                                    decided):
+            if profiler is not None:
+                start = time.perf_counter()
+            for sink in sinks:
+                sink.write(relative_path, analysis)
+            if profiler is not None:
+                profiler.phases['output'] += time.perf_counter() - start
+            total += 1
+
+            if total % 100 == 0:
+                print(f"Processed {total} files...")
+        if history is not None:
+            history.finish(stats)
+        hashed = record_decided_content(decided, hash_all=bool(args.shard))
+        if args.shard:
+            sinks[0].finish(inputs, stats)
+    finally:
+        for sink in sinks:
+            sink.close()
+
+    # Entries for files no longer listed are dropped here; an unchanged
+    # cache is not rewritten
+    if cache is not None and updated != cache:
+        save_cache(updated)
+
+    print_summary(total)
+    print(f"Stages: {stage_stats['path']} decided by path ({hashed} hashed for duplicates), "
+          f"{stage_stats['content']} read and matched")
+    if cache is not None:
+        print(f"Cache: {cache_stats['hits']} reused, {cache_stats['misses']} analyzed")
+    for sink in sinks:
+        print(f"{sink.label} Report: {sink.path}")
+
+    # A shard's duplicates and summary come from --merge
+    if not args.shard:
+        if default_analyzer.duplicate_groups():
+            write_duplicates()
+            print(f"Duplicates Report: {DUPLICATES_CSV_OUTPUT}")
+
+        write_summary(total)
+        print(f"Summary: {SUMMARY_OUTPUT}")
+
+    if profiler is not None:
+        report = profiler.report()
+        print_profile(report)
+        with open(args.profile, 'w', encoding='utf-8') as f:
+            json.dump(report, f, indent=2, ensure_ascii=False)
+        print(f"Profile: {args.profile}")
 
 
 if __name__ == '__main__':
-    main()
+    sys.exit(main())
@@ -0,0 +1,428 @@
+#!/usr/bin/env python3
+"""
+RBAC Analyzer Benchmarks
+Measures throughput of analyze_rbac.py on a synthetic corpus and on the real tree
+"""
+
+import re
+import sys
+import json
+import math
+import time
+import random
+import argparse
+import platform
+import tempfile
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+import analyze_rbac
+from analyze_rbac import BASE_DIR, OUTPUT_DIR, features_mask, scan_features
+
+RESULTS_OUTPUT = OUTPUT_DIR / 'bench_results.json'
+
+# Synthetic corpus profiles, measured on this repository: share of files,
+# where they live, median and 90th percentile size in bytes, and the chance
+# a file contains each RBAC pattern
+CORPUS_PROFILES = {
+    'controller': {
+        'share': 0.17, 'classifier': 'backend', 'median': 9400, 'p90': 26600,
+        'path': 'backend/controllers/{area}/{name}.controller.js',
+        'patterns': {
+            "  if (req.user.role !== 'admin') {{\n    return res.status(403).json({{ success: false }});\n  }}": 0.15,
+            "  if (!hasPermission(req.user, '{area}.{name}', 'write')) return res.status(403).end();": 0.01,
+        },
+    },
+    'routes': {
+        'share': 0.11, 'classifier': 'backend', 'median': 2300, 'p90': 5800,
+        'path': 'backend/routes/api/{name}.routes.js',
+        'patterns': {
+            "router.get('/{name}', authenticate, requirePageAccess('{area}.{name}', 'read'), {name}Controller.list);": 0.06,
+            "router.delete('/{name}/:id', authenticate, requireRole('admin', 'hr'), {name}Controller.remove);": 0.35,
+        },
+    },
+    'service': {
+        'share': 0.11, 'classifier': 'backend', 'median': 13700, 'p90': 39200,
+        'path': 'backend/services/{area}/{name}.service.js',
+        'patterns': {
+            "  const isAdmin = user.role === 'admin';": 0.01,
+        },
+    },
+    'feature-module': {
+        'share': 0.51, 'classifier': 'react', 'median': 17900, 'p90': 69100,
+        'path': 'react/src/feature-module/{area}/{name}.tsx',
+        'patterns': {
+            '        <button className="btn btn-primary" onClick={{() => handle{Name}()}}>Save</button>': 0.41,
+            "  if (user?.role === 'admin') {{ setCanEdit(true); }}": 0.01,
+            "export default withRoleCheck({Name}, ['admin', 'hr']);": 0.01,
+            '        <Button variant="danger" onClick={{() => remove{Name}(row.id)}}>Delete</Button>': 0.01,
+            "  const {{ canWrite }} = usePageAccess('{area}.{name}');": 0.02,
+        },
+    },
+    'modal': {
+        'share': 0.10, 'classifier': 'react', 'median': 10500, 'p90': 29100,
+        'path': 'react/src/core/modals/{area}/{Name}Modal.tsx',
+        'patterns': {
+            '          <Button type="submit" className="btn btn-primary">Submit</Button>': 0.04,
+            '          <button type="button" className="btn btn-light" onClick={{onHide}}>Cancel</button>': 0.39,
+        },
+    },
+}
+
+# Names for generated files; none of them trip an unrelated path rule
+CORPUS_AREAS = ('hrm', 'crm', 'finance', 'projects', 'assets', 'recruitment', 'payroll', 'sales')
+CORPUS_WORDS = ('employee', 'leave', 'ticket', 'invoice', 'holiday', 'training', 'shift', 'budget',
+                'client', 'deal', 'lead', 'pipeline', 'timesheet', 'overtime', 'promotion', 'asset')
+
+# Ordinary code the patterns are embedded in
+BACKEND_FILLER = (
+    "  const {name} = await {Name}.findById(req.params.id).lean();",
+    "  if (!{name}) return res.status(404).json({{ success: false, message: '{Name} not found' }});",
+    "  logger.info('Fetched {name} records', {{ companyId: req.user.companyId, count: items.length }});",
+    "  const filter = {{ companyId: req.user.companyId, isDeleted: false, status: req.query.status }};",
+    "  const [items, total] = await Promise.all([{Name}.find(filter).skip(skip).limit(limit), {Name}.countDocuments(filter)]);",
+    "export const update{Name} = asyncHandler(async (req, res) => {{",
+    "  return res.json({{ success: true, data: {name}, pagination: {{ page, limit, total }} }});",
+    "}});",
+    "",
+    "// Validate the {name} payload before it reaches the database",
+)
+ROUTES_FILLER = (
+    "router.get('/{name}', authenticate, validateQuery({name}QuerySchema), {name}Controller.list);",
+    "router.post('/{name}', authenticate, validateBody({name}Schema), {name}Controller.create);",
+    "router.put('/{name}/:id', authenticate, sanitizeParams(), {name}Controller.update);",
+    "",
+    "// {Name} endpoints",
+)
+REACT_FILLER = (
+    "  const [{name}, set{Name}] = useState<{Name} | null>(null);",
+    "  useEffect(() => {{ fetch{Name}List(filters).then(set{Name}); }}, [filters]);",
+    '      <div className="col-md-6"><label className="form-label">{Name} Name</label></div>',
+    '        <input type="text" className="form-control" value={{form.{name}}} onChange={{handleChange}} />',
+    "  const columns = [{{ title: '{Name}', dataIndex: '{name}', sorter: (a, b) => a.{name}.localeCompare(b.{name}) }}];",
+    '      </div>',
+    '    <div className="card-body">',
+    "",
+)
+FILLERS = {'controller': BACKEND_FILLER, 'service': BACKEND_FILLER, 'routes': ROUTES_FILLER,
+           'feature-module': REACT_FILLER, 'modal': REACT_FILLER}
+
+# Features the modal and feature-module rules in rbac_rules.json test
+FEATURE_BITS = analyze_rbac.compiled_rules().feature_bits
+MODAL_PERMISSION_FEATURES = features_mask('permission_button', 'use_page_access', 'can_call',
+                                          'has_permission_call')
+MODAL_FEATURES = MODAL_PERMISSION_FEATURES | features_mask('modal_action_button', 'on_click',
+                                                           'delete_word', 'edit_word')
+FEATURE_MODULE_FEATURES = MODAL_PERMISSION_FEATURES | features_mask(
+    'page_access_guard', 'with_role_check', 'role_comparison', 'action_button', 'hardcoded_roles')
+
+
+def legacy_react_checks(content: str, modal: bool) -> Tuple[bool, ...]:
+    """React content checks as they were before scan_features()"""
+    if modal:
+        has_permission_check = ('PermissionButton' in content or
+                                'usePageAccess' in content or
+                                'can(' in content or
+                                'hasPermission(' in content)
+        has_unprotected_button = bool(re.search(r'<Button[^>]*>(Edit|Delete|Add|Create|Save|Update|Remove|Submit)', content, re.IGNORECASE))
+        has_action_buttons = has_unprotected_button or ('onClick' in content and ('delete' in content.lower() or 'edit' in content.lower()))
+        return has_permission_check, has_action_buttons
+
+    has_permission_check = ('PermissionButton' in content or
+                            'usePageAccess' in content or
+                            'PageAccessGuard' in content or
+                            'can(' in content or
+                            'hasPermission(' in content)
+    has_with_role_check = 'withRoleCheck' in content
+    has_role_comparison = ('user?.role ===' in content or
+                           'user.role ===' in content or
+                           'publicMetadata?.role ===' in content)
+    has_unprotected_button = bool(re.search(r'<Button[^>]*>(Edit|Delete|Add|Create|Save|Update|Remove)', content, re.IGNORECASE))
+    has_hardcoded_roles = ('allowedRoles:' in content or
+                           "['admin'," in content or
+                           "['hr'," in content)
+    return (has_permission_check, has_with_role_check, has_role_comparison,
+            has_unprotected_button, has_hardcoded_roles)
+
+
+def matcher_react_checks(content: bytes, modal: bool) -> Tuple[bool, ...]:
+    """The same checks derived from one scan_features() call"""
+    if modal:
+        features = scan_features(content, MODAL_FEATURES)
+        return (bool(features & MODAL_PERMISSION_FEATURES),
+                bool(features & FEATURE_BITS['modal_action_button']) or (
+                    bool(features & FEATURE_BITS['on_click']) and
+                    bool(features & (FEATURE_BITS['delete_word'] | FEATURE_BITS['edit_word']))))
+
+    features = scan_features(content, FEATURE_MODULE_FEATURES)
+    return (bool(features & (MODAL_PERMISSION_FEATURES | FEATURE_BITS['page_access_guard'])),
+            bool(features & FEATURE_BITS['with_role_check']),
+            bool(features & FEATURE_BITS['role_comparison']),
+            bool(features & FEATURE_BITS['action_button']),
+            bool(features & FEATURE_BITS['hardcoded_roles']))
+
+
+def tree_files(tree: Path) -> List[Path]:
+    """Every JS/TS file under tree"""
+    return [path for path in sorted(tree.rglob('*'))
+            if path.suffix in analyze_rbac.SOURCE_EXTENSIONS and 'node_modules' not in path.parts]
+
+
+def load_tree(tree: Path) -> List[Tuple[str, str, bytes]]:
+    """Read every JS/TS file under tree into memory as (path, text, raw bytes)"""
+    files = []
+    for path in tree_files(tree):
+        raw = path.read_bytes()
+        files.append((str(path).lower(), raw.decode('utf-8', errors='ignore'), raw))
+    return files
+
+
+def best_of(repeat: int, run) -> float:
+    """Best-of-repeat seconds for run()"""
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        run()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def time_checks(files: List[Tuple[str, str, bytes]], checks, raw: bool, repeat: int) -> float:
+    """Best-of-repeat seconds to run checks over every file's text or raw bytes"""
+    def run():
+        for path_lower, text, data in files:
+            checks(data if raw else text, 'modal' in path_lower)
+    return best_of(repeat, run)
+
+
+def legacy_read(path: str) -> str:
+    """File reading as it was before read_source()"""
+    with open(path, 'r', encoding='utf-8', errors='ignore') as f:
+        return f.read()
+
+
+def bench_read(tree: Path, repeat: int) -> Dict[str, float]:
+    """Compare decoding reads with read_source() (bytes/mmap) on tree"""
+    paths = [str(path) for path in tree_files(tree)]
+
+    def run_read_source():
+        for path in paths:
+            content, _ = analyze_rbac.read_source(path)
+            analyze_rbac.release_source(content)
+
+    legacy = best_of(repeat, lambda: [legacy_read(path) for path in paths])
+    current = best_of(repeat, run_read_source)
+    print(f"{'legacy read':<14}{len(paths) / legacy:>12.0f}")
+    print(f"{'read_source':<14}{len(paths) / current:>12.0f}")
+    return {'legacy_read_files_per_sec': len(paths) / legacy,
+            'read_source_files_per_sec': len(paths) / current}
+
+
+def bench_matcher(tree: Path, repeat: int) -> Dict[str, float]:
+    """Compare the legacy per-pattern scans with scan_features() on tree"""
+    files = load_tree(tree)
+    if not files:
+        raise SystemExit(f"Error: no source files under {tree}")
+
+    mismatches = [path for path, text, raw in files
+                  if legacy_react_checks(text, 'modal' in path) !=
+                  matcher_react_checks(raw, 'modal' in path)]
+    if mismatches:
+        raise SystemExit(f"Error: matcher disagrees with legacy checks on {mismatches[:5]}")
+
+    megabytes = sum(len(raw) for _, _, raw in files) / 1e6
+    legacy = time_checks(files, legacy_react_checks, False, repeat)
+    matcher = time_checks(files, matcher_react_checks, True, repeat)
+
+    print(f"Tree: {tree} ({len(files)} files, {megabytes:.1f} MB)")
+    print(f"{'Checks':<14}{'files/sec':>12}{'MB/sec':>10}")
+    print(f"{'legacy':<14}{len(files) / legacy:>12.0f}{megabytes / legacy:>10.1f}")
+    print(f"{'matcher':<14}{len(files) / matcher:>12.0f}{megabytes / matcher:>10.1f}")
+    print(f"Speedup: {legacy / matcher:.2f}x")
+    return {'legacy_files_per_sec': len(files) / legacy, 'matcher_files_per_sec': len(files) / matcher}
+
+
+def corpus_file(rng: random.Random, kind: str, index: int) -> Tuple[str, str]:
+    """Generate one synthetic (relative_path, source) of the given kind"""
+    profile = CORPUS_PROFILES[kind]
+    area = rng.choice(CORPUS_AREAS)
+    name = f"{rng.choice(CORPUS_WORDS)}{index}"
+    names = {'area': area, 'name': name, 'Name': name[0].upper() + name[1:]}
+
+    # Sizes are log-normal through the profile's median and 90th percentile
+    sigma = math.log(profile['p90'] / profile['median']) / 1.2816
+    size = int(min(rng.lognormvariate(math.log(profile['median']), sigma), 40 * profile['median']))
+
+    lines = []
+    length = 0
+    filler = FILLERS[kind]
+    while length < size:
+        line = rng.choice(filler).format(**names)
+        lines.append(line)
+        length += len(line) + 1
+    for pattern, chance in profile['patterns'].items():
+        if rng.random() < chance:
+            for _ in range(rng.randint(1, 3)):
+                lines.insert(rng.randrange(len(lines) + 1), pattern.format(**names))
+    return profile['path'].format(**names), '\n'.join(lines) + '\n'
+
+
+def generate_corpus(root: Path, files: int, seed: int = 0) -> List[Tuple[str, str, str]]:
+    """Write a deterministic synthetic corpus under root
+
+    Returns (kind, full_path, relative_path) for every file; the same files
+    and seed always produce byte-identical trees.
+    """
+    rng = random.Random(seed)
+    kinds = list(CORPUS_PROFILES)
+    weights = [CORPUS_PROFILES[kind]['share'] for kind in kinds]
+    corpus = []
+    for index in range(files):
+        kind = rng.choices(kinds, weights)[0]
+        relative_path, source = corpus_file(rng, kind, index)
+        path = root / relative_path
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text(source, encoding='utf-8')
+        corpus.append((kind, str(path), relative_path))
+    return corpus
+
+
+def bench_classifiers(corpus: List[Tuple[str, str, str]], repeat: int) -> Dict[str, dict]:
+    """Time the backend and React classifiers, as analyze_backend_file() and
+    analyze_react_file() run them, over the corpus
+
+    Every repeat classifies with a fresh Analyzer: its content memo would
+    otherwise answer later repeats without scanning, and without repository
+    checks nothing is read or written outside the corpus.
+    """
+    classifiers = {'analyze_backend_file': 'backend', 'analyze_react_file': 'react'}
+    results = {}
+    print(f"{'Classifier':<24}{'files':>7}{'files/sec':>12}{'MB/sec':>10}{'ms/file':>10}")
+    for label, name in classifiers.items():
+        files = [(full_path, relative_path) for kind, full_path, relative_path in corpus
+                 if CORPUS_PROFILES[kind]['classifier'] == name]
+        if not files:
+            continue
+        megabytes = sum(Path(full_path).stat().st_size for full_path, _ in files) / 1e6
+
+        def run():
+            analyzer = analyze_rbac.Analyzer()
+            rule_set = getattr(analyzer.rules, name)
+            for full_path, relative_path in files:
+                analyzer.classify_with(rule_set, full_path, relative_path)
+
+        seconds = best_of(repeat, run)
+        results[label] = {
+            'files': len(files),
+            'megabytes': megabytes,
+            'seconds': seconds,
+            'files_per_sec': len(files) / seconds,
+            'mb_per_sec': megabytes / seconds,
+        }
+        print(f"{label:<24}{len(files):>7}{len(files) / seconds:>12.0f}"
+              f"{megabytes / seconds:>10.1f}{seconds * 1000 / len(files):>10.3f}")
+
+    files = sum(result['files'] for result in results.values())
+    seconds = sum(result['seconds'] for result in results.values())
+    megabytes = sum(result['megabytes'] for result in results.values())
+    results['total'] = {'files': files, 'megabytes': megabytes, 'seconds': seconds,
+                        'files_per_sec': files / seconds, 'mb_per_sec': megabytes / seconds}
+    print(f"{'total':<24}{files:>7}{files / seconds:>12.0f}{megabytes / seconds:>10.1f}"
+          f"{seconds * 1000 / files:>10.3f}")
+    return results
+
+
+def peak_rss_mb() -> Optional[float]:
+    """Peak resident set size of this process in MB, where the platform reports it"""
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports kilobytes, macOS bytes
+    return peak / (1e6 if sys.platform == 'darwin' else 1e3)
+
+
+def compare_results(results: dict, baseline_path: Path, max_regression: float) -> bool:
+    """Print throughput against a saved run; False if any classifier regressed too far"""
+    baseline = json.loads(baseline_path.read_text(encoding='utf-8'))
+    ok = True
+    print(f"Against {baseline_path} ({baseline.get('timestamp', 'unknown')})")
+    for name, result in results['classifiers'].items():
+        before = baseline.get('classifiers', {}).get(name)
+        if not before:
+            continue
+        change = (result['files_per_sec'] / before['files_per_sec'] - 1) * 100
+        regressed = change < -max_regression
+        ok = ok and not regressed
+        print(f"{name:<24}{before['files_per_sec']:>10.0f} -> {result['files_per_sec']:>8.0f} files/sec"
+              f" ({change:+.1f}%){'  REGRESSION' if regressed else ''}")
+    return ok
+
+
+def main(argv: Optional[List[str]] = None):
+    """Run the benchmarks"""
+    parser = argparse.ArgumentParser(description='RBAC Analyzer Benchmarks')
+    parser.add_argument('--tree', type=Path, default=BASE_DIR / 'react' / 'src' / 'feature-module',
+                        help='directory to benchmark (default: react/src/feature-module)')
+    parser.add_argument('--repeat', type=int, default=5,
+                        help='timing runs per variant, best is reported (default: 5)')
+    parser.add_argument('--files', type=int, default=3000,
+                        help='synthetic corpus size (default: 3000)')
+    parser.add_argument('--seed', type=int, default=0,
+                        help='synthetic corpus seed (default: 0)')
+    parser.add_argument('--corpus-dir', type=Path,
+                        help='write the synthetic corpus here and keep it (default: a temporary directory)')
+    parser.add_argument('--output', type=Path, default=RESULTS_OUTPUT,
+                        help=f'where to save the results as JSON (default: {RESULTS_OUTPUT.name})')
+    parser.add_argument('--baseline', type=Path,
+                        help='results JSON from an earlier run to compare against')
+    parser.add_argument('--max-regression', type=float, default=15.0,
+                        help='exit non-zero if a classifier is this many percent slower '
+                             'than --baseline (default: 15)')
+    args = parser.parse_args(argv)
+
+    print("RBAC Analyzer Benchmarks")
+    print("=" * 50)
+
+    results = {
+        'timestamp': datetime.now(timezone.utc).isoformat(timespec='seconds'),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'rules_version': analyze_rbac.rules_fingerprint(),
+        'repeat': args.repeat,
+    }
+
+    with tempfile.TemporaryDirectory(prefix='rbac-corpus-') as tmp:
+        root = args.corpus_dir or Path(tmp)
+        corpus = generate_corpus(root, args.files, args.seed)
+        megabytes = sum(Path(full_path).stat().st_size for _, full_path, _ in corpus) / 1e6
+        results['corpus'] = {'files': len(corpus), 'megabytes': megabytes, 'seed': args.seed}
+        print(f"Synthetic corpus: {len(corpus)} files, {megabytes:.1f} MB (seed {args.seed})")
+        results['classifiers'] = bench_classifiers(corpus, args.repeat)
+    print()
+
+    if args.tree.is_dir():
+        results['matcher'] = bench_matcher(args.tree, args.repeat)
+        results['read'] = bench_read(args.tree, args.repeat)
+        print()
+
+    results['peak_rss_mb'] = peak_rss_mb()
+    if results['peak_rss_mb'] is not None:
+        print(f"Peak RSS: {results['peak_rss_mb']:.1f} MB")
+
+    args.output.write_text(json.dumps(results, indent=2) + '\n', encoding='utf-8')
+    print(f"Results: {args.output}")
+
+    if args.baseline:
+        print()
+        if not compare_results(results, args.baseline, args.max_regression):
+            return 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())